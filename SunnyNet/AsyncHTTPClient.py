@@ -0,0 +1,145 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+from .ClientPool import ClientPool
+from .HTTPClient import ClientResponse
+from .Router import _split_url
+
+HeadersType = Union[Mapping[str, str], Iterable[Tuple[str, str]], None]
+
+
+class _HostLimit:
+    """ 单个主机的并发限制，没有进行中或等待中的请求时从字典中删除。 """
+
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class AsyncSunnyHTTPClient:
+    """
+    asyncio HTTP 客户端
+
+    request() 在有界线程池中执行阻塞的 open/send/读取响应，客户端上下文从 ClientPool 复用。
+    同时限制全局并发数和单个主机的并发数，超时后协程抛出 asyncio.TimeoutError，
+    返回的 ClientResponse 是只读快照，响应数据在第一次 get_body 时才解压。
+
+    用法::
+
+        async with AsyncSunnyHTTPClient(max_concurrency=32, per_host=4) as client:
+            response = await client.get("https://example.com/", timeout=10)
+            print(response.get_status_code(), response.get_body_string())
+    """
+
+    def __init__(self, max_concurrency: int = 16, per_host: int = 0, timeout: float = 30.0,
+                 pool: Optional[ClientPool] = None, proxy: str = "", redirect: bool = True,
+                 http2_config: Optional[str] = None, random_tls: bool = False, out_router_ip: str = ""):
+        """
+        :param max_concurrency: 全局最大并发数，同时也是线程池大小。
+        :param per_host: 单个主机的最大并发数，0 表示不限制。
+        :param timeout: 默认超时时间（秒）。
+        :param pool: 客户端连接池，None 时创建一个。
+        :param proxy: 上游代理，格式同 SunnyHTTPClient.set_proxy。
+        :param redirect: 是否允许自动重定向。
+        :param http2_config: HTTP/2 指纹配置，请使用 tools.HTTP2_fp_Config_ 常量之一。
+        :param random_tls: 是否使用随机 TLS 指纹。
+        :param out_router_ip: 出口 IP。
+        """
+        if not isinstance(max_concurrency, int) or max_concurrency < 1:
+            raise ValueError("参数错误：max_concurrency 应为大于 0 的整数")
+        if not isinstance(per_host, int) or per_host < 0:
+            raise ValueError("参数错误：per_host 应为大于等于 0 的整数")
+        self.__max_concurrency = max_concurrency
+        self.__per_host = per_host
+        self.__timeout = timeout
+        self.__pool = pool if pool is not None else ClientPool(max_idle=max_concurrency)
+        self.__config = dict(proxy=proxy, redirect=redirect, http2_config=http2_config, random_tls=random_tls,
+                             out_router_ip=out_router_ip)
+        self.__executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="SunnyNet-http")
+        self.__semaphore = None
+        self.__host_limits: Dict[str, _HostLimit] = {}
+        self.__closed = False
+
+    def __fetch(self, method: str, url: str, headers: list, data, timeout: Optional[float]) -> ClientResponse:
+        """ 在线程池中执行的阻塞请求。 """
+        native_timeout = int(timeout * 1000) if timeout else None
+        with self.__pool.client(timeout=native_timeout, **self.__config) as client:
+            client.open(method, url)
+            for name, value in headers:
+                client.set_header(name, value)
+            return client.send(data, snapshot=True)
+
+    async def request(self, method: str, url: str, headers: HeadersType = None, data=b"",
+                      timeout: Optional[float] = None) -> ClientResponse:
+        """
+        发送请求。
+
+        :param method: 请求方法。
+        :param url: 完整 URL。
+        :param headers: 请求头，字典或 (名称, 值) 序列。
+        :param data: 请求数据，bytes 或字符串。
+        :param timeout: 超时时间（秒），包括排队等待的时间，None 使用默认值。
+        :return: ClientResponse 快照。
+        :raises asyncio.TimeoutError: 超时。
+        """
+        if self.__closed:
+            raise RuntimeError("客户端已关闭")
+        if timeout is None:
+            timeout = self.__timeout
+        if isinstance(headers, Mapping):
+            headers = list(headers.items())
+        else:
+            headers = list(headers or ())
+        return await asyncio.wait_for(self.__request(method, url, headers, data, timeout), timeout or None)
+
+    async def __request(self, method: str, url: str, headers: list, data, timeout: Optional[float]):
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.__max_concurrency)
+        if not self.__per_host:
+            return await self.__run(method, url, headers, data, timeout)
+        # 字典只保留有请求的主机，长时间运行访问大量主机时不会一直增长；都在事件循环线程中执行，不需要加锁
+        host = _split_url(url)[0]
+        limit = self.__host_limits.get(host)
+        if limit is None:
+            limit = self.__host_limits[host] = _HostLimit(self.__per_host)
+        limit.users += 1
+        try:
+            async with limit.semaphore:
+                return await self.__run(method, url, headers, data, timeout)
+        finally:
+            limit.users -= 1
+            if not limit.users:
+                del self.__host_limits[host]
+
+    async def __run(self, method: str, url: str, headers: list, data, timeout: Optional[float]):
+        async with self.__semaphore:
+            loop = asyncio.get_running_loop()
+            # 协程被取消时原生请求仍会执行到超时为止，线程池大小限制了实际并发
+            return await loop.run_in_executor(self.__executor, self.__fetch, method, url, headers, data, timeout)
+
+    async def get(self, url: str, headers: HeadersType = None, timeout: Optional[float] = None) -> ClientResponse:
+        return await self.request("GET", url, headers, b"", timeout)
+
+    async def post(self, url: str, data=b"", headers: HeadersType = None,
+                   timeout: Optional[float] = None) -> ClientResponse:
+        return await self.request("POST", url, headers, data, timeout)
+
+    def stats(self) -> dict:
+        """ 连接池计数，见 ClientPool.stats。 """
+        return self.__pool.stats()
+
+    async def close(self) -> None:
+        """ 等待进行中的请求结束并关闭线程池。 """
+        if self.__closed:
+            return
+        self.__closed = True
+        await asyncio.get_running_loop().run_in_executor(None, self.__executor.shutdown, True)
+
+    async def __aenter__(self) -> "AsyncSunnyHTTPClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
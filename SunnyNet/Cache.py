@@ -0,0 +1,390 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Union
+
+from .Event import HTTPEvent
+from .FileBody import FileBody
+from .Headers import Headers
+from .Pipeline import STOP
+
+_CACHEABLE_STATUS = frozenset((200, 203, 204, 300, 301, 404, 410))
+
+
+def _cache_control(value: str) -> Dict[str, str]:
+    """ 解析 Cache-Control，返回 {指令: 值}。 """
+    result = {}
+    for item in value.split(","):
+        name, _, arg = item.strip().partition("=")
+        if name:
+            result[name.lower()] = arg.strip().strip('"')
+    return result
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _http_date(value: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class _Entry:
+    """ 缓存条目。body 为 None 时表示数据保存在磁盘上。 """
+
+    __slots__ = ("status", "headers", "body", "expires", "etag", "size", "vary")
+
+    def __init__(self, status: int, headers: str, body: Optional[bytes], expires: float, etag: str, size: int,
+                 vary: tuple = ()):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires = expires
+        self.etag = etag
+        self.size = size
+        self.vary = vary
+
+    def meta(self) -> dict:
+        return {"status": self.status, "headers": self.headers, "expires": self.expires,
+                "etag": self.etag, "size": self.size, "vary": list(self.vary)}
+
+
+class _MemoryStore:
+    """ 内存存储，按字节数 LRU 淘汰。 """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.entries = OrderedDict()
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def load_body(self, key: str, entry: _Entry) -> bytes:
+        return entry.body
+
+    def put(self, key: str, entry: _Entry) -> int:
+        """ 返回因此淘汰的条目数。 """
+        self.remove(key)
+        self.entries[key] = entry
+        self.used += entry.size
+        evicted = 0
+        while self.used > self.max_bytes and len(self.entries) > 1:
+            old_key = next(iter(self.entries))
+            self.remove(old_key)
+            evicted += 1
+        return evicted
+
+    def refresh(self, key: str, entry: _Entry) -> None:
+        pass
+
+    def remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.used -= entry.size
+
+
+class _DiskStore(_MemoryStore):
+    """ 磁盘存储，内存中只保留索引，重启后从目录恢复。 """
+
+    def __init__(self, max_bytes: int, directory: str):
+        super().__init__(max_bytes)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.__load()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def __load(self) -> None:
+        items = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    meta = json.load(file)
+                items.append((os.path.getmtime(path), meta))
+            except (OSError, ValueError):
+                continue
+        for _, meta in sorted(items, key=lambda item: item[0]):
+            entry = _Entry(meta["status"], meta["headers"], None, meta["expires"], meta["etag"], meta["size"],
+                           tuple(meta.get("vary", ())))
+            super().put(meta["key"], entry)
+
+    def load_body(self, key: str, entry: _Entry) -> Optional[bytes]:
+        try:
+            with open(self.__path(key) + ".bin", "rb") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, entry: _Entry) -> int:
+        # 先删除旧条目，否则基类 put 中的 remove 会删掉刚写入的文件
+        self.remove(key)
+        path = self.__path(key)
+        with open(path + ".bin", "wb") as file:
+            file.write(entry.body)
+        entry.body = None
+        self.refresh(key, entry)
+        return super().put(key, entry)
+
+    def refresh(self, key: str, entry: _Entry) -> None:
+        meta = entry.meta()
+        meta["key"] = key
+        with open(self.__path(key) + ".json", "w", encoding="utf-8") as file:
+            json.dump(meta, file, ensure_ascii=False)
+
+    def remove(self, key: str) -> None:
+        if key in self.entries:
+            path = self.__path(key)
+            for suffix in (".json", ".bin"):
+                try:
+                    os.remove(path + suffix)
+                except OSError:
+                    pass
+        super().remove(key)
+
+
+class ResponseCache:
+    """
+    本地响应缓存 / Map Local
+
+    请求阶段按 方法 + URL + 指定协议头 查找缓存，命中时直接用 Response.set_status_code/set_all_header/set_body 返回，
+    不会连接上游服务器；响应阶段按 Cache-Control、Expires、ETag、Vary 保存可缓存的响应，按字节数 LRU 淘汰。
+    过期但带有 ETag 的条目会在请求时加上 If-None-Match 重新验证，收到 304 时用缓存内容回复。
+
+    用法::
+
+        cache = ResponseCache(max_bytes=256 * 1024 * 1024, directory="./cache")
+        cache.map_local("https://example.com/app.js", open("app.js", "rb").read(),
+                        headers={"Content-Type": "application/javascript"})
+        app.set_callback(http_callback=cache)
+
+    也可以作为 Pipeline 的中间件使用（命中时返回 Pipeline.STOP）。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: Optional[str] = None,
+                 key_headers: Iterable[str] = (), default_ttl: int = 0, max_entry_bytes: int = 8 * 1024 * 1024):
+        """
+        :param max_bytes: 缓存总大小上限（字节），超过时淘汰最久未使用的条目。
+        :param directory: 磁盘缓存目录，None 表示只使用内存。
+        :param key_headers: 始终参与缓存键的请求头，例如 ["Accept-Encoding"]。
+        :param default_ttl: 响应没有任何过期信息时的缓存秒数，0 表示不缓存这类响应。
+        :param max_entry_bytes: 单个响应的大小上限，超过时不缓存。
+        """
+        if not isinstance(max_bytes, int) or max_bytes <= 0:
+            raise TypeError("参数类型错误：max_bytes 应为正整数")
+        self.__store = _MemoryStore(max_bytes) if directory is None else _DiskStore(max_bytes, directory)
+        self.__key_headers = tuple(sorted(name.lower() for name in key_headers))
+        self.__default_ttl = default_ttl
+        self.__max_entry_bytes = max_entry_bytes
+        self.__lock = threading.Lock()
+        # {方法 + URL: Vary 中的请求头名称}
+        self.__vary = {key.split("\n", 1)[0]: entry.vary for key, entry in self.__store.entries.items() if entry.vary}
+        # {方法 + URL: _Entry}，map_local 登记的固定响应
+        self.__local = {}
+        # {MessageId: 缓存键}，正在用 If-None-Match 重新验证的请求
+        self.__revalidating = {}
+        self.__counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "revalidated": 0}
+
+    def map_local(self, url: str, body: Union[bytes, str], status: int = 200,
+                  headers: Union[Dict[str, str], str, None] = None, method: str = "GET") -> None:
+        """
+        登记固定响应，匹配的请求总是直接返回该内容。
+
+        :param url: 完整 URL。
+        :param body: 响应数据。
+        :param status: 状态码。
+        :param headers: 响应协议头，字典或完整协议头字符串。
+        :param method: 请求方法。
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not isinstance(body, (bytes, bytearray)):
+            raise TypeError("参数类型错误：body 应为字节数组或字符串")
+        if isinstance(headers, dict):
+            headers = Headers(headers.items()).to_text()
+        with self.__lock:
+            self.__local[method.upper() + " " + url] = _Entry(status, headers or "", bytes(body), 0, "", len(body))
+
+    def unmap_local(self, url: str, method: str = "GET") -> None:
+        """ 删除 map_local 登记的固定响应。 """
+        with self.__lock:
+            self.__local.pop(method.upper() + " " + url, None)
+
+    def clear(self) -> None:
+        """ 清空缓存（不影响 map_local）。 """
+        with self.__lock:
+            for key in list(self.__store.entries):
+                self.__store.remove(key)
+            self.__vary.clear()
+
+    def stats(self) -> dict:
+        """
+        获取计数。
+
+        :return: 包含 hits、misses、stores、evictions、revalidated、entries、bytes 的字典。
+        """
+        with self.__lock:
+            stats = dict(self.__counters)
+            stats["entries"] = len(self.__store.entries)
+            stats["bytes"] = self.__store.used
+        return stats
+
+    def __key(self, base: str, request, vary) -> str:
+        names = self.__key_headers if not vary else tuple(sorted(set(self.__key_headers) | set(vary)))
+        if not names:
+            return base
+        headers = request.headers()
+        return base + "\n" + "\n".join("%s:%s" % (name, ",".join(headers.get_all(name))) for name in names)
+
+    @staticmethod
+    def __serve(response, entry: _Entry, body: bytes) -> None:
+        response.set_status_code(entry.status)
+        response.set_all_header(entry.headers)
+        response.set_body(body)
+
+    def handle_request(self, Conn: HTTPEvent) -> bool:
+        """
+        请求阶段：命中缓存时直接回复。
+
+        :return: 命中并已回复时返回 True。
+        """
+        method = Conn.get_method().upper()
+        base = method + " " + Conn.get_url()
+        with self.__lock:
+            entry = self.__local.get(base)
+        if entry is not None:
+            self.__serve(Conn.get_response(), entry, entry.body)
+            return True
+        if method != "GET":
+            return False
+        request = Conn.get_request()
+        directives = _cache_control(",".join(request.headers().get_all("Cache-Control")))
+        if "no-store" in directives:
+            return False
+        key = self.__key(base, request, self.__vary.get(base))
+        with self.__lock:
+            entry = self.__store.get(key)
+            body = None
+            if entry is not None and entry.expires > time.time() and "no-cache" not in directives:
+                body = self.__store.load_body(key, entry)
+            if body is not None:
+                self.__counters["hits"] += 1
+            else:
+                self.__counters["misses"] += 1
+        if body is not None:
+            self.__serve(Conn.get_response(), entry, body)
+            return True
+        if entry is not None and entry.etag and "if-none-match" not in request.headers():
+            request.headers()["If-None-Match"] = entry.etag
+            with self.__lock:
+                self.__revalidating[Conn.get_message_id()] = key
+        return False
+
+    def handle_response(self, Conn: HTTPEvent) -> bool:
+        """
+        响应阶段：保存可缓存的响应，或处理重新验证返回的 304。
+
+        :return: 保存或更新了缓存时返回 True。
+        """
+        with self.__lock:
+            revalidate_key = self.__revalidating.pop(Conn.get_message_id(), None)
+        method = Conn.get_method().upper()
+        if method != "GET":
+            return False
+        response = Conn.get_response()
+        status = response.get_status_code()
+        headers = response.headers()
+        if status == 304 and revalidate_key is not None:
+            return self.__revalidated(revalidate_key, response, headers)
+        if status not in _CACHEABLE_STATUS:
+            return False
+        request = Conn.get_request()
+        if "no-store" in _cache_control(",".join(request.headers().get_all("Cache-Control"))):
+            return False
+        ttl = self.__ttl(headers)
+        etag = headers.get("ETag", "")
+        if ttl is None or (ttl <= 0 and not etag):
+            return False
+        vary = tuple(sorted({name.strip().lower() for value in headers.get_all("Vary")
+                             for name in value.split(",") if name.strip()}))
+        if "*" in vary:
+            return False
+        if response.body_length() > self.__max_entry_bytes:
+            return False
+        body = response.body()
+        if isinstance(body, FileBody):
+            return False
+        base = method + " " + Conn.get_url()
+        entry = _Entry(status, response.get_all_header(), bytes(body), time.time() + ttl, etag, len(body), vary)
+        key = self.__key(base, request, vary)
+        with self.__lock:
+            if vary:
+                self.__vary[base] = vary
+            else:
+                self.__vary.pop(base, None)
+            self.__counters["evictions"] += self.__store.put(key, entry)
+            self.__counters["stores"] += 1
+        return True
+
+    def __revalidated(self, key: str, response, headers: Headers) -> bool:
+        with self.__lock:
+            entry = self.__store.get(key)
+            body = None if entry is None else self.__store.load_body(key, entry)
+            if body is None:
+                return False
+            ttl = self.__ttl(headers)
+            entry.expires = time.time() + (ttl or 0)
+            self.__store.refresh(key, entry)
+            self.__counters["revalidated"] += 1
+        self.__serve(response, entry, body)
+        return True
+
+    def __ttl(self, headers: Headers) -> Optional[int]:
+        """ 返回可缓存秒数，None 表示不可缓存。 """
+        directives = _cache_control(",".join(headers.get_all("Cache-Control")))
+        if "no-store" in directives or "private" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0
+        age = _seconds(headers.get("Age")) or 0
+        for name in ("s-maxage", "max-age"):
+            value = _seconds(directives.get(name))
+            if value is not None:
+                return value - age
+        expires = headers.get("Expires")
+        if expires is not None:
+            expires_at = _http_date(expires)
+            if expires_at is None:
+                return 0
+            date = _http_date(headers.get("Date", "")) or time.time()
+            return int(expires_at - date) - age
+        return self.__default_ttl
+
+    def __call__(self, Conn: HTTPEvent):
+        event_type = Conn.get_event_type()
+        if event_type == HTTPEvent.EVENT_TYPE_REQUEST:
+            if self.handle_request(Conn):
+                return STOP
+        elif event_type == HTTPEvent.EVENT_TYPE_RESPONSE:
+            self.handle_response(Conn)
+        else:
+            with self.__lock:
+                self.__revalidating.pop(Conn.get_message_id(), None)
+        return None
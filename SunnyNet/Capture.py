@@ -0,0 +1,297 @@
+import base64
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from .Dispatch import EventSnapshot
+from .Event import HTTPEvent
+from .FileBody import FileBody
+from .Headers import Headers
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_JSONL = "jsonl"
+FORMAT_HAR = "har"
+
+
+def _iso_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _header_list(text: str) -> list:
+    return [{"name": name, "value": value} for name, value in Headers.parse(text or "").items()]
+
+
+def _body_bytes(value) -> bytes:
+    """ Response.SPILL_THRESHOLD 生效时响应体是 FileBody，HAR 需要文本，读出全部数据。 """
+    if isinstance(value, FileBody):
+        return value.tobytes()
+    return bytes(value or b"")
+
+
+def _content(data: bytes, mime_type: str) -> dict:
+    """ 文本原样保存，只有二进制数据才使用 base64。 """
+    content = {"size": len(data), "mimeType": mime_type}
+    if not data:
+        content["text"] = ""
+        return content
+    try:
+        content["text"] = data.decode("utf-8")
+    except UnicodeDecodeError:
+        content["text"] = base64.b64encode(data).decode("ascii")
+        content["encoding"] = "base64"
+    return content
+
+
+def _entry(started: float, finished: float, snapshot: EventSnapshot) -> dict:
+    """ 把快照转换为 HAR entry。 """
+    request_headers = _header_list(snapshot.get_request_headers())
+    request_body = _body_bytes(snapshot.get_request_body())
+    request = {
+        "method": snapshot.get_method(),
+        "url": snapshot.get_url(),
+        "httpVersion": "HTTP/1.1",
+        "headers": request_headers,
+        "queryString": [],
+        "cookies": [],
+        "headersSize": -1,
+        "bodySize": len(request_body),
+    }
+    if request_body:
+        mime_type = next((h["value"] for h in request_headers if h["name"].lower() == "content-type"), "")
+        post_data = _content(request_body, mime_type)
+        post_data.pop("size")
+        request["postData"] = post_data
+    response_headers = _header_list(snapshot.get_response_headers())
+    response_body = _body_bytes(snapshot.get_response_body())
+    mime_type = next((h["value"] for h in response_headers if h["name"].lower() == "content-type"), "")
+    elapsed = max((finished - started) * 1000, 0)
+    entry = {
+        "startedDateTime": _iso_time(started),
+        "time": elapsed,
+        "request": request,
+        "response": {
+            "status": snapshot.get_status_code(),
+            "statusText": "",
+            "httpVersion": "HTTP/1.1",
+            "headers": response_headers,
+            "cookies": [],
+            "content": _content(response_body, mime_type),
+            "redirectURL": "",
+            "headersSize": -1,
+            "bodySize": len(response_body),
+        },
+        "cache": {},
+        "timings": {"send": 0, "wait": elapsed, "receive": 0},
+        "_theologyId": snapshot.get_theology_id(),
+        "_messageId": snapshot.get_message_id(),
+        "_pid": snapshot.get_pid(),
+    }
+    if snapshot.get_event_type() == HTTPEvent.EVENT_TYPE_ERROR:
+        entry["_error"] = snapshot.get_error()
+    return entry
+
+
+class CaptureWriter:
+    """
+    HAR / JSON Lines 抓包写入器
+
+    回调线程中只复制事件快照并放入有界队列，由专用写入线程按 TheologyID 配对请求与响应。
+    MessageId 只标识一次回调（请求、响应阶段各不相同，用于读写该次回调的原生数据），
+    TheologyID 是同一个请求在各阶段共用的唯一 ID，因此只按 TheologyID 配对；响应阶段的 MessageId 写入 _messageId。
+    配对后生成 HAR entry 并缓冲写入文件，可选 gzip/zstd 压缩，按大小或时间滚动文件。
+    文本 Body 原样保存，只有二进制 Body 使用 base64。
+
+    用法::
+
+        capture = CaptureWriter("./capture/traffic", format="har", compress="gzip", max_bytes=100 * 1024 * 1024)
+        app.set_callback(http_callback=capture)
+        ...
+        capture.close()
+    """
+
+    def __init__(self, path: str, format: str = FORMAT_JSONL, compress: Optional[str] = None,
+                 capture_body: bool = True, max_bytes: int = 100 * 1024 * 1024, max_seconds: int = 0,
+                 max_queue: int = 10000, flush_interval: float = 1.0, max_pending: int = 10000):
+        """
+        :param path: 文件路径前缀，实际文件名为 前缀-时间-序号.jsonl / .har，压缩时追加 .gz / .zst。
+        :param format: "jsonl" 每行一条记录，"har" 为标准 HAR 文件。
+        :param compress: None、"gzip" 或 "zstd"（需要安装 zstandard）。
+        :param capture_body: 是否保存请求/响应数据。
+        :param max_bytes: 单个文件写入的最大字节数（压缩前），超过后滚动到新文件，0 表示不限制。
+        :param max_seconds: 单个文件的最长写入时间（秒），超过后滚动到新文件，0 表示不限制。
+        :param max_queue: 队列最大长度，队列已满时丢弃新的快照。
+        :param flush_interval: 空闲时把缓冲写入磁盘的间隔（秒）。
+        :param max_pending: 等待响应的请求最多保留多少个。
+        """
+        if format not in (FORMAT_JSONL, FORMAT_HAR):
+            raise ValueError("参数错误：format 应为 jsonl 或 har")
+        if compress not in (None, "gzip", "zstd"):
+            raise ValueError("参数错误：compress 应为 None、gzip 或 zstd")
+        if compress == "zstd" and zstandard is None:
+            raise ImportError("zstd 压缩需要安装 zstandard：pip install zstandard")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.__path = path
+        self.__format = format
+        self.__compress = compress
+        self.__capture_body = capture_body
+        self.__max_bytes = max_bytes
+        self.__max_seconds = max_seconds
+        self.__flush_interval = flush_interval
+        self.__max_pending = max_pending
+        self.__queue = queue.Queue(max_queue)
+        self.__lock = threading.Lock()
+        self.__counters = {"captured": 0, "dropped": 0, "written": 0, "failed": 0, "files": 0}
+        self.__files = []
+        self.__file = None
+        self.__raw = None
+        self.__written = 0
+        self.__opened_at = 0.0
+        self.__entries = 0
+        self.__sequence = 0
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, name="SunnyNet-capture", daemon=True)
+        self.__thread.start()
+
+    def __call__(self, Conn: HTTPEvent) -> None:
+        if self.__closed:
+            return
+        if Conn.get_event_type() == HTTPEvent.EVENT_TYPE_REQUEST:
+            # 请求阶段只记录时间，请求数据在响应阶段与响应一起复制
+            item = (time.time(), Conn.get_theology_id(), None)
+        else:
+            try:
+                snapshot = EventSnapshot.capture(Conn, self.__capture_body)
+            except Exception:
+                return
+            item = (time.time(), snapshot.get_theology_id(), snapshot)
+        try:
+            self.__queue.put_nowait(item)
+        except queue.Full:
+            self.__count("dropped")
+            return
+        self.__count("captured")
+
+    def __count(self, name: str) -> None:
+        with self.__lock:
+            self.__counters[name] += 1
+
+    def stats(self) -> dict:
+        """
+        获取计数。
+
+        :return: 包含 captured、dropped、written、failed（转换或写入失败）、files、queued 的字典。
+        """
+        with self.__lock:
+            stats = dict(self.__counters)
+        stats["queued"] = self.__queue.qsize()
+        return stats
+
+    def files(self) -> List[str]:
+        """ 已创建的文件列表。 """
+        with self.__lock:
+            return list(self.__files)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        停止写入并关闭文件。
+
+        :param wait: 是否等待队列中的快照全部写入。
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__queue.put(None)
+        if wait:
+            self.__thread.join()
+
+    def __run(self) -> None:
+        pending = OrderedDict()
+        while True:
+            try:
+                item = self.__queue.get(timeout=self.__flush_interval)
+            except queue.Empty:
+                if self.__file is not None:
+                    self.__file.flush()
+                self.__rotate_if_needed()
+                continue
+            if item is None:
+                break
+            timestamp, theology_id, snapshot = item
+            if snapshot is None:
+                pending[theology_id] = timestamp
+                if len(pending) > self.__max_pending:
+                    pending.popitem(last=False)
+                continue
+            started = pending.pop(theology_id, timestamp)
+            try:
+                self.__write(_entry(started, timestamp, snapshot))
+            except Exception:
+                self.__count("failed")
+        self.__close_file()
+
+    def __write(self, entry: dict) -> None:
+        self.__rotate_if_needed()
+        if self.__file is None:
+            self.__open_file()
+        data = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self.__format == FORMAT_HAR:
+            data = (b"," if self.__entries else b"") + data
+        else:
+            data += b"\n"
+        self.__file.write(data)
+        self.__written += len(data)
+        self.__entries += 1
+        self.__count("written")
+
+    def __rotate_if_needed(self) -> None:
+        if self.__file is None:
+            return
+        if (self.__max_bytes and self.__written >= self.__max_bytes) or \
+                (self.__max_seconds and time.time() - self.__opened_at >= self.__max_seconds):
+            self.__close_file()
+
+    def __open_file(self) -> None:
+        self.__sequence += 1
+        name = "%s-%s-%04d.%s" % (self.__path, time.strftime("%Y%m%d-%H%M%S"), self.__sequence, self.__format)
+        if self.__compress == "gzip":
+            name += ".gz"
+            self.__raw = open(name, "wb")
+            self.__file = gzip.GzipFile(fileobj=self.__raw, mode="wb")
+        elif self.__compress == "zstd":
+            name += ".zst"
+            self.__raw = open(name, "wb")
+            self.__file = zstandard.ZstdCompressor().stream_writer(self.__raw)
+        else:
+            self.__raw = None
+            self.__file = open(name, "wb", buffering=1024 * 1024)
+        self.__written = 0
+        self.__entries = 0
+        self.__opened_at = time.time()
+        if self.__format == FORMAT_HAR:
+            header = {"version": "1.2", "creator": {"name": "SunnyNet", "version": "1.0"}}
+            self.__file.write(('{"log":%s' % json.dumps(header)[:-1]).encode("utf-8") + b',"entries":[')
+        with self.__lock:
+            self.__files.append(name)
+            self.__counters["files"] += 1
+
+    def __close_file(self) -> None:
+        if self.__file is None:
+            return
+        if self.__format == FORMAT_HAR:
+            self.__file.write(b"]}}")
+        self.__file.close()
+        if self.__raw is not None:
+            self.__raw.close()
+        self.__file = None
+        self.__raw = None
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+from .HTTPClient import SunnyHTTPClient
+
+
+class PooledClient(SunnyHTTPClient):
+    """
+    由 ClientPool 创建的 SunnyHTTPClient
+
+    创建时已经按配置设置好代理、超时、重定向、随机 TLS 和出口 IP，reset() 重建上下文后重新设置；
+    HTTP/2 指纹需要在 open 之后设置，由 open 自动完成。
+    with 语句结束时自动归还连接池，请不要再修改这些配置。
+    """
+
+    def __init__(self, pool: "ClientPool", key: Tuple):
+        super().__init__()
+        self.pool = pool
+        self.key = key
+        self.__http2_config = key[3]
+        self.__apply_config()
+        self.created_at = time.monotonic()
+        self.idle_since = self.created_at
+        self.failed = False
+        self.used = False
+
+    def __apply_config(self) -> None:
+        proxy, timeout, redirect, _, random_tls, out_router_ip = self.key
+        if proxy:
+            self.set_proxy(proxy)
+        if timeout is not None:
+            self.set_timeouts(timeout)
+        if not redirect:
+            self.set_redirect(False)
+        if random_tls:
+            self.set_random_tls(True)
+        if out_router_ip:
+            self.set_OutRouterIP(out_router_ip)
+
+    def reset(self):
+        """ 重建客户端上下文，并重新设置连接池的配置。 """
+        super().reset()
+        self.__apply_config()
+
+    def open(self, method: str, url: str):
+        super().open(method, url)
+        self.used = True
+        if self.__http2_config:
+            self.set_http2_config(self.__http2_config)
+
+    def release(self) -> None:
+        """ 归还连接池。 """
+        self.pool.release(self)
+
+    def __enter__(self) -> "PooledClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.failed = True
+        self.pool.release(self)
+
+
+class ClientPool:
+    """
+    SunnyHTTPClient 连接池
+
+    按配置（代理、超时、重定向、HTTP/2 指纹、随机 TLS、出口 IP）分组保存空闲客户端，
+    复用已经创建并设置好的客户端上下文，避免每次请求都 CreateHTTPClient 并重复全部 HTTPSet* 调用。
+    空闲过久、存活过久、最后一次请求失败（或 health_check 返回 False）的客户端不会被复用。
+
+    用法::
+
+        pool = ClientPool(max_idle=32, max_idle_time=60, max_age=600)
+        with pool.client(proxy="http://127.0.0.1:8888", timeout=10000) as client:
+            client.open("GET", "https://example.com/")
+            client.send()
+            print(client.get_status_code())
+    """
+
+    def __init__(self, max_idle: int = 16, max_idle_time: float = 60.0, max_age: float = 600.0,
+                 health_check: Optional[Callable[[PooledClient], bool]] = None,
+                 client_class: type = PooledClient):
+        """
+        :param max_idle: 每种配置最多保留的空闲客户端数量。
+        :param max_idle_time: 空闲超过该时间（秒）的客户端被淘汰，0 表示不限制。
+        :param max_age: 创建超过该时间（秒）的客户端被淘汰，0 表示不限制。
+        :param health_check: 归还时调用，返回 False 的客户端被丢弃；默认丢弃最后一次请求没有状态码的客户端。
+        :param client_class: 客户端类型，应为 PooledClient 的子类。
+        """
+        if not isinstance(max_idle, int) or max_idle < 0:
+            raise ValueError("参数错误：max_idle 应为大于等于 0 的整数")
+        self.__max_idle = max_idle
+        self.__max_idle_time = max_idle_time
+        self.__max_age = max_age
+        self.__health_check = health_check or self.__default_health_check
+        self.__client_class = client_class
+        self.__idle: Dict[Tuple, deque] = {}
+        self.__lock = threading.Lock()
+        self.__counters = {"created": 0, "reused": 0, "released": 0, "evicted": 0, "discarded": 0}
+
+    @staticmethod
+    def __default_health_check(client: PooledClient) -> bool:
+        return not client.used or client.get_status_code() > 0
+
+    @staticmethod
+    def make_key(proxy: str = "", timeout: Optional[int] = None, redirect: bool = True,
+                 http2_config: Optional[str] = None, random_tls: bool = False, out_router_ip: str = "") -> Tuple:
+        """ 生成配置键，参数含义同 client()。 """
+        if not isinstance(proxy, str) or not isinstance(out_router_ip, str):
+            raise TypeError("参数类型错误：proxy、out_router_ip 应为字符串")
+        if timeout is not None and not isinstance(timeout, int):
+            raise TypeError("参数类型错误：timeout 应为整数")
+        return proxy, timeout, bool(redirect), http2_config or None, bool(random_tls), out_router_ip
+
+    def __expired(self, client: PooledClient, now: float) -> bool:
+        if self.__max_age and now - client.created_at >= self.__max_age:
+            return True
+        return bool(self.__max_idle_time) and now - client.idle_since >= self.__max_idle_time
+
+    def client(self, proxy: str = "", timeout: Optional[int] = None, redirect: bool = True,
+               http2_config: Optional[str] = None, random_tls: bool = False,
+               out_router_ip: str = "") -> PooledClient:
+        """
+        取出一个按配置设置好的客户端，没有可用的空闲客户端时创建新的。
+
+        :param proxy: 上游代理，格式同 SunnyHTTPClient.set_proxy，空字符串表示不使用。
+        :param timeout: 超时时间（毫秒），None 表示使用默认值。
+        :param redirect: 是否允许自动重定向。
+        :param http2_config: HTTP/2 指纹配置，请使用 tools.HTTP2_fp_Config_ 常量之一。
+        :param random_tls: 是否使用随机 TLS 指纹。
+        :param out_router_ip: 出口 IP，空字符串表示由系统选择。
+        :return: 客户端，使用完毕后通过 with 语句或 release() 归还。
+        """
+        key = self.make_key(proxy, timeout, redirect, http2_config, random_tls, out_router_ip)
+        now = time.monotonic()
+        expired = []
+        client = None
+        with self.__lock:
+            idle = self.__idle.get(key)
+            while idle:
+                # 取最近归还的客户端，过期的直接丢弃
+                candidate = idle.pop()
+                if self.__expired(candidate, now):
+                    expired.append(candidate)
+                    continue
+                client = candidate
+                break
+            self.__counters["evicted"] += len(expired)
+            if client is not None:
+                self.__counters["reused"] += 1
+        # 在锁外释放原生上下文
+        del expired
+        if client is None:
+            client = self.__client_class(self, key)
+            with self.__lock:
+                self.__counters["created"] += 1
+        client.failed = False
+        client.used = False
+        return client
+
+    def release(self, client: PooledClient) -> None:
+        """ 归还客户端。失败或过期的客户端被丢弃。 """
+        if client.pool is not self:
+            raise ValueError("参数错误：客户端不属于这个连接池")
+        now = time.monotonic()
+        healthy = not client.failed
+        if healthy:
+            try:
+                healthy = bool(self.__health_check(client))
+            except Exception:
+                healthy = False
+        with self.__lock:
+            self.__counters["released"] += 1
+            if not healthy:
+                self.__counters["discarded"] += 1
+                return
+            client.idle_since = now
+            if self.__expired(client, now) or not self.__max_idle:
+                self.__counters["evicted"] += 1
+                return
+            idle = self.__idle.setdefault(client.key, deque())
+            idle.append(client)
+            if len(idle) > self.__max_idle:
+                idle.popleft()
+                self.__counters["evicted"] += 1
+
+    def prune(self) -> int:
+        """
+        淘汰全部过期的空闲客户端。
+
+        :return: 淘汰的数量。
+        """
+        now = time.monotonic()
+        removed = []
+        with self.__lock:
+            for key in list(self.__idle):
+                idle = self.__idle[key]
+                keep = deque()
+                for client in idle:
+                    (removed if self.__expired(client, now) else keep).append(client)
+                if keep:
+                    self.__idle[key] = keep
+                else:
+                    del self.__idle[key]
+            self.__counters["evicted"] += len(removed)
+        return len(removed)
+
+    def clear(self) -> None:
+        """ 释放全部空闲客户端。 """
+        with self.__lock:
+            self.__idle = {}
+
+    def stats(self) -> dict:
+        """
+        获取计数。
+
+        :return: 包含 created、reused、released、evicted、discarded、idle 的字典。
+        """
+        with self.__lock:
+            stats = dict(self.__counters)
+            stats["idle"] = sum(len(idle) for idle in self.__idle.values())
+        return stats
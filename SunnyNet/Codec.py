@@ -0,0 +1,289 @@
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from SunnyNet import tools
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAX_SIZE = 256 * 1024 * 1024
+""" 默认解压上限（字节），解压结果超过该大小时放弃解压。 """
+
+_CHUNK = 64 * 1024
+
+_lock = threading.Lock()
+_backends: Dict[str, List] = {}
+_ordered: Dict[str, List] = {}
+
+
+class _LimitExceeded(Exception):
+    pass
+
+
+def register(encoding: str, name: str, decompress: Callable[[bytes, int], bytes], priority: bool = False) -> None:
+    """
+    登记解压后端。
+
+    :param encoding: Content-Encoding 名称，例如 gzip、br。
+    :param name: 后端名称，用于 backends() 显示。
+    :param decompress: 解压函数 decompress(data, max_size) -> bytes，失败时抛出异常，
+                       超过 max_size 时应尽早停止。
+    :param priority: 为 True 时插入到最前面。
+    """
+    if not isinstance(encoding, str) or not isinstance(name, str):
+        raise TypeError("参数类型错误：encoding、name 应为字符串")
+    if not callable(decompress):
+        raise TypeError("参数类型错误：decompress 应为函数")
+    with _lock:
+        items = _backends.setdefault(encoding.lower(), [])
+        items[:] = [item for item in items if item[0] != name]
+        if priority:
+            items.insert(0, (name, decompress))
+        else:
+            items.append((name, decompress))
+        _ordered.pop(encoding.lower(), None)
+
+
+def backends(encoding: str) -> List[str]:
+    """
+    获取某种编码的后端名称，按实际使用顺序排列（首次解压时按测速结果排序）。
+    """
+    return [name for name, _ in _get_ordered(encoding.lower())]
+
+
+def decompress(encoding: str, data: bytes, max_size: int = None) -> Optional[bytes]:
+    """
+    按 Content-Encoding 解压数据。
+
+    依次尝试该编码的各个后端，纯 Python 后端分块解压，解压结果超过 max_size 时立即停止。
+
+    :param encoding: Content-Encoding 名称，不区分大小写。
+    :param data: 压缩数据。
+    :param max_size: 解压上限（字节），None 使用 MAX_SIZE。
+    :return: 解压后的数据；不支持的编码、数据无效或超过上限时返回 None。
+    """
+    if not data:
+        return None
+    items = _get_ordered(encoding.strip().lower())
+    if max_size is None:
+        max_size = MAX_SIZE
+    for _, func in items:
+        try:
+            result = func(data, max_size)
+        except _LimitExceeded:
+            return None
+        except Exception:
+            continue
+        if result:
+            return bytes(result)
+    return None
+
+
+def benchmark(encoding: str = None, rounds: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    对各后端测速并按速度重新排序。
+
+    SunnyNet.start() 时通过 warmup() 执行一次，也可以手动调用重新测速。
+
+    :param encoding: 只测试指定编码，None 表示全部。
+    :param rounds: 每个后端的解压次数。
+    :return: {编码: {后端名称: 平均耗时(微秒)}}，不可用的后端不出现在结果中。
+    """
+    encodings = [encoding.lower()] if encoding else list(_backends)
+    result = {}
+    for name in encodings:
+        result[name] = _benchmark(name, rounds)
+    return result
+
+
+def warmup() -> None:
+    """
+    对尚未测速的编码执行测速。
+
+    SunnyNet.start() 启动时会调用，避免第一次解压时在回调线程中测速；
+    没有调用时仍会在首次解压该编码时测速。
+    """
+    with _lock:
+        encodings = [name for name in _backends if name not in _ordered]
+    for name in encodings:
+        _benchmark(name, 20)
+
+
+def _get_ordered(encoding: str) -> List:
+    items = _ordered.get(encoding)
+    if items is None:
+        if encoding not in _backends:
+            return []
+        _benchmark(encoding, 20)
+        items = _ordered[encoding]
+    return items
+
+
+def _sample() -> bytes:
+    """ 测速用的 JSON 样本。 """
+    rows = ",".join('{"id":%d,"name":"item-%d","price":%d.%02d,"tags":["a","b","c"],"ok":true}'
+                    % (i, i, i * 7 % 1000, i % 100) for i in range(200))
+    return ('{"code":0,"data":[%s]}' % rows).encode("utf-8")
+
+
+def _compress_sample(encoding: str, raw: bytes) -> Optional[bytes]:
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        return compressor.compress(raw) + compressor.flush()
+    if encoding == "deflate":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        return compressor.compress(raw) + compressor.flush()
+    if encoding == "zlib":
+        return zlib.compress(raw)
+    if encoding == "br":
+        return brotli.compress(raw) if brotli is not None else bytes(tools.BrCompress(raw))
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor().compress(raw) if zstandard is not None else bytes(tools.ZSTDCompress(raw))
+    return None
+
+
+def _benchmark(encoding: str, rounds: int) -> Dict[str, float]:
+    with _lock:
+        items = list(_backends.get(encoding, []))
+    raw = _sample()
+    try:
+        sample = _compress_sample(encoding, raw)
+    except Exception:
+        sample = None
+    timings = {}
+    if sample:
+        for name, func in items:
+            try:
+                if func(sample, MAX_SIZE) != raw:
+                    continue
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    func(sample, MAX_SIZE)
+                timings[name] = (time.perf_counter() - start) / rounds * 1e6
+            except Exception:
+                continue
+    # 测速通过的后端按耗时排序，其余的保持登记顺序放在后面作为兜底
+    ordered = sorted((item for item in items if item[0] in timings), key=lambda item: timings[item[0]])
+    ordered += [item for item in items if item[0] not in timings]
+    with _lock:
+        _ordered[encoding] = ordered
+    return timings
+
+
+def _zlib_decompress(data, max_size: int, wbits: int) -> bytes:
+    """ 分块解压 zlib/gzip/deflate，支持多段 gzip。 """
+    output = []
+    total = 0
+    while data:
+        decompressor = zlib.decompressobj(wbits)
+        try:
+            chunk = decompressor.decompress(data, max_size - total + 1)
+        except zlib.error:
+            # 第一段无效时交给下一个后端，后续段无效视为尾部填充数据
+            if not output:
+                raise
+            break
+        if decompressor.unconsumed_tail:
+            raise _LimitExceeded()
+        chunk += decompressor.flush()
+        total += len(chunk)
+        if total > max_size:
+            raise _LimitExceeded()
+        output.append(chunk)
+        if not decompressor.eof:
+            # 数据被截断：返回部分结果会让调用方误以为解压成功
+            raise zlib.error("压缩数据不完整")
+        data = decompressor.unused_data
+    return b"".join(output)
+
+
+def _gzip(data, max_size: int) -> bytes:
+    return _zlib_decompress(data, max_size, 31)
+
+
+def _zlib(data, max_size: int) -> bytes:
+    return _zlib_decompress(data, max_size, 15)
+
+
+def _deflate(data, max_size: int) -> bytes:
+    # HTTP 的 deflate 实际上既可能是 zlib 格式也可能是裸 deflate，按头部判断
+    if len(data) >= 2 and data[0] & 0x0F == 8 and ((data[0] << 8) | data[1]) % 31 == 0:
+        return _zlib_decompress(data, max_size, 15)
+    return _zlib_decompress(data, max_size, -15)
+
+
+def _brotli(data, max_size: int) -> bytes:
+    decompressor = brotli.Decompressor()
+    # brotli >= 1.2 支持 output_buffer_limit，每次输出不超过剩余额度；旧版本只能按小块输入，超过上限后停止输入
+    limited = hasattr(decompressor, "can_accept_more_data")
+    step = _CHUNK if limited else 1024
+    view = memoryview(data)
+    output = []
+    total = 0
+    for offset in range(0, len(view), step):
+        if limited:
+            chunk = decompressor.process(bytes(view[offset:offset + step]), output_buffer_limit=max_size - total + 1)
+        else:
+            chunk = decompressor.process(bytes(view[offset:offset + step]))
+        while True:
+            total += len(chunk)
+            if total > max_size:
+                raise _LimitExceeded()
+            output.append(chunk)
+            if not limited or decompressor.can_accept_more_data() or not chunk:
+                break
+            chunk = decompressor.process(b"", output_buffer_limit=max_size - total + 1)
+    if not decompressor.is_finished():
+        raise brotli.error("压缩数据不完整")
+    return b"".join(output)
+
+
+def _zstd(data, max_size: int) -> bytes:
+    output = []
+    total = 0
+    # 默认只读取第一帧，多帧数据需要 read_across_frames
+    with zstandard.ZstdDecompressor().stream_reader(data, read_across_frames=True) as reader:
+        while True:
+            chunk = reader.read(_CHUNK)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_size:
+                raise _LimitExceeded()
+            output.append(chunk)
+    return b"".join(output)
+
+
+def _native(func: Callable[[bytes], bytes]) -> Callable[[bytes, int], bytes]:
+    """ 把 tools 中的 DLL 解压函数包装为后端，只能在解压完成后检查大小。 """
+
+    def decompress(data, max_size: int) -> bytes:
+        result = func(data)
+        if len(result) > max_size:
+            raise _LimitExceeded()
+        return result
+
+    return decompress
+
+
+register("gzip", "zlib", _gzip)
+register("gzip", "native", _native(tools.GzipUnCompress))
+register("deflate", "zlib", _deflate)
+register("deflate", "native", _native(tools.DeflateUnCompress))
+register("zlib", "zlib", _zlib)
+register("zlib", "native", _native(tools.ZlibUnCompress))
+if brotli is not None:
+    register("br", "brotli", _brotli)
+register("br", "native", _native(tools.BrUnCompress))
+if zstandard is not None:
+    register("zstd", "zstandard", _zstd)
+register("zstd", "native", _native(tools.ZSTDUnCompress))
@@ -0,0 +1,420 @@
+import asyncio
+import inspect
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from .Event import HTTPEvent, TCPEvent, UDPEvent, WebSocketEvent
+
+# 每种事件的全部事件类型
+EVENT_TYPES = {
+    HTTPEvent: (HTTPEvent.EVENT_TYPE_REQUEST, HTTPEvent.EVENT_TYPE_RESPONSE, HTTPEvent.EVENT_TYPE_ERROR),
+    TCPEvent: (TCPEvent.EVENT_TYPE_ABOUT, TCPEvent.EVENT_TYPE_OK, TCPEvent.EVENT_TYPE_SEND,
+               TCPEvent.EVENT_TYPE_RECEIVE, TCPEvent.EVENT_TYPE_CLOSE),
+    UDPEvent: (UDPEvent.EVENT_TYPE_CLOSED, UDPEvent.EVENT_TYPE_SEND, UDPEvent.EVENT_TYPE_RECEIVE),
+    WebSocketEvent: (WebSocketEvent.EVENT_TYPE_CONNECTION_SUCCESS, WebSocketEvent.EVENT_TYPE_SEND,
+                     WebSocketEvent.EVENT_TYPE_RECEIVE, WebSocketEvent.EVENT_TYPE_CLOSE),
+}
+
+# 可以修改数据的事件类型, 回调线程需要等待这些事件处理完成后才能返回
+BLOCKING_EVENT_TYPES = {
+    HTTPEvent: frozenset((HTTPEvent.EVENT_TYPE_REQUEST, HTTPEvent.EVENT_TYPE_RESPONSE)),
+    TCPEvent: frozenset((TCPEvent.EVENT_TYPE_ABOUT, TCPEvent.EVENT_TYPE_SEND, TCPEvent.EVENT_TYPE_RECEIVE)),
+    UDPEvent: frozenset((UDPEvent.EVENT_TYPE_SEND, UDPEvent.EVENT_TYPE_RECEIVE)),
+    WebSocketEvent: frozenset((WebSocketEvent.EVENT_TYPE_SEND, WebSocketEvent.EVENT_TYPE_RECEIVE)),
+}
+
+
+def is_async_callback(func) -> bool:
+    """ 判断回调函数是否为 async def 定义的协程函数。 """
+    return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+
+class LoopThread:
+    """
+    在后台线程中运行的事件循环
+
+    未指定事件循环时，SunnyNet 使用它来执行 async 回调。
+    """
+
+    def __init__(self):
+        self.__loop = None
+        self.__thread = None
+        self.__lock = threading.Lock()
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """ 获取事件循环，首次调用时启动后台线程。 """
+        if self.__loop is not None:
+            return self.__loop
+        with self.__lock:
+            if self.__loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self.__run, args=(loop,), name="SunnyNet-asyncio", daemon=True)
+                thread.start()
+                self.__thread = thread
+                self.__loop = loop
+        return self.__loop
+
+    @staticmethod
+    def __run(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def close(self) -> None:
+        """ 停止事件循环并等待后台线程退出。 """
+        with self.__lock:
+            loop, thread = self.__loop, self.__thread
+            self.__loop = None
+            self.__thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join()
+        loop.close()
+
+
+def _report_exception(future) -> None:
+    """ 只读事件不等待结果，协程中的异常在这里输出。 """
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+
+def async_callback(func: Callable, get_loop: Callable[[], asyncio.AbstractEventLoop],
+                   blocking_types: frozenset) -> Callable:
+    """
+    将 async 回调包装为普通回调，供原始回调线程调用。
+
+    事件类型属于 blocking_types（可修改请求/响应的事件）时，阻塞等待协程完成后再返回；
+    其他只读事件提交后立即返回，不等待结果。回调返回后原生数据可能已经释放，
+    因此只读事件传给协程的是在回调线程中复制的 EventSnapshot（方法名与事件类一致），而不是事件对象。
+
+    :param func: async def 定义的回调函数。
+    :param get_loop: 返回用于执行协程的事件循环。
+    :param blocking_types: 需要等待完成的事件类型集合。
+    """
+
+    def callback(event):
+        if event.get_event_type() in blocking_types:
+            asyncio.run_coroutine_threadsafe(func(event), get_loop()).result()
+            return
+        snapshot = EventSnapshot.capture(event, capture_body=True)
+        future = asyncio.run_coroutine_threadsafe(func(snapshot), get_loop())
+        future.add_done_callback(_report_exception)
+
+    callback.__wrapped__ = func
+    return callback
+
+
+def wrap_callback(func: Optional[Callable], event_class, get_loop) -> Optional[Callable]:
+    """ async 回调包装为普通回调，普通回调原样返回。 """
+    if func is None or not is_async_callback(func):
+        return func
+    return async_callback(func, get_loop, BLOCKING_EVENT_TYPES[event_class])
+
+
+class EventSnapshot:
+    """
+    事件快照
+
+    在原始回调线程中复制事件的字段，回调返回后仍然可以读取，也可以传递到其他线程或进程。
+    方法名与对应的事件类保持一致，未采集的字段返回空值。
+    """
+
+    __slots__ = ("kind", "fields")
+
+    KIND_HTTP = "http"
+    KIND_TCP = "tcp"
+    KIND_UDP = "udp"
+    KIND_WEBSOCKET = "websocket"
+
+    def __init__(self, kind: str, fields: dict):
+        """
+        :param kind: 事件种类，EventSnapshot.KIND_ 常量之一。
+        :param fields: 字段表。
+        """
+        self.kind = kind
+        self.fields = fields
+
+    def __getstate__(self):
+        return self.kind, self.fields
+
+    def __setstate__(self, state):
+        self.kind, self.fields = state
+
+    def __get(self, name, default=""):
+        return self.fields.get(name, default)
+
+    def get_event_type(self) -> int:
+        return self.__get("event_type", 0)
+
+    def get_theology_id(self) -> int:
+        return self.__get("theology_id", 0)
+
+    def get_message_id(self) -> int:
+        return self.__get("message_id", 0)
+
+    def get_sunny_net_context(self) -> int:
+        return self.__get("sunny_context", 0)
+
+    def get_pid(self) -> int:
+        return self.__get("pid", 0)
+
+    def get_timestamp(self) -> float:
+        """ 采集快照时的 Unix 时间戳（秒）。 """
+        return self.__get("timestamp", 0.0)
+
+    def get_url(self) -> str:
+        return self.__get("url")
+
+    def get_method(self) -> str:
+        return self.__get("method")
+
+    def get_error(self) -> str:
+        return self.__get("error")
+
+    def get_local_addr(self) -> str:
+        return self.__get("local_addr")
+
+    def get_remote_addr(self) -> str:
+        return self.__get("remote_addr")
+
+    def get_message_type(self) -> int:
+        return self.__get("message_type", 0)
+
+    def get_body(self) -> bytes:
+        """ TCP/UDP/WebSocket 的数据，HTTP 事件为响应数据（请求事件为请求数据）。 """
+        return self.__get("body", b"")
+
+    def get_request_headers(self) -> str:
+        return self.__get("request_headers")
+
+    def get_request_body(self) -> bytes:
+        return self.__get("request_body", b"")
+
+    def get_status_code(self) -> int:
+        return self.__get("status_code", 0)
+
+    def get_response_headers(self) -> str:
+        return self.__get("response_headers")
+
+    def get_response_body(self) -> bytes:
+        return self.__get("response_body", b"")
+
+    @classmethod
+    def capture(cls, event, capture_body: bool = False) -> "EventSnapshot":
+        """
+        在回调中复制事件字段。
+
+        :param event: HTTPEvent、TCPEvent、UDPEvent 或 WebSocketEvent。
+        :param capture_body: 是否复制请求/响应/消息数据。TCP 事件的数据总是复制。
+        """
+        fields = {
+            "timestamp": time.time(),
+            "event_type": event.get_event_type(),
+            "theology_id": event.get_theology_id(),
+            "message_id": event.get_message_id(),
+            "sunny_context": event.get_sunny_net_context(),
+            "pid": event.get_pid(),
+        }
+        if isinstance(event, HTTPEvent):
+            event_type = fields["event_type"]
+            fields["url"] = event.get_url()
+            fields["method"] = event.get_method()
+            fields["error"] = event.get_error()
+            request = event.get_request()
+            fields["request_headers"] = request.get_headers()
+            if capture_body:
+                fields["request_body"] = request.body()
+            if event_type == HTTPEvent.EVENT_TYPE_RESPONSE:
+                response = event.get_response()
+                fields["status_code"] = response.get_status_code()
+                fields["response_headers"] = response.get_all_header()
+                if capture_body:
+                    fields["response_body"] = response.body()
+            fields["body"] = fields.get("response_body", fields.get("request_body", b""))
+            return cls(cls.KIND_HTTP, fields)
+        if isinstance(event, WebSocketEvent):
+            fields["url"] = event.get_url()
+            fields["method"] = event.get_method()
+            fields["message_type"] = event.get_message_type()
+            if capture_body:
+                fields["body"] = event.get_body()
+            return cls(cls.KIND_WEBSOCKET, fields)
+        fields["local_addr"] = event.get_local_addr()
+        fields["remote_addr"] = event.get_remote_addr()
+        if isinstance(event, TCPEvent):
+            fields["body"] = bytes(event.get_body())
+            return cls(cls.KIND_TCP, fields)
+        if capture_body:
+            fields["body"] = event.get_body()
+        return cls(cls.KIND_UDP, fields)
+
+
+def _run_handler(handler, snapshot):
+    handler(snapshot)
+
+
+class WorkerPool:
+    """
+    只读回调的线程池/进程池分发
+
+    在原始回调中只复制事件快照（EventSnapshot）并放入有界队列，立即返回，
+    由后台线程（或进程池）调用处理函数。适用于日志、统计等不修改数据的回调。
+
+    用法::
+
+        pool = WorkerPool(log_response, workers=4, max_queue=10000)
+        app.set_callback(http_callback=pool)
+    """
+
+    POLICY_DROP_OLDEST = "drop_oldest"
+    """ 队列已满时丢弃最早的快照。 """
+    POLICY_DROP_NEWEST = "drop_newest"
+    """ 队列已满时丢弃新的快照。 """
+    POLICY_BLOCK = "block"
+    """ 队列已满时阻塞回调线程直到有空位。 """
+
+    def __init__(self, handler: Callable[[EventSnapshot], None], workers: int = 4, max_queue: int = 10000,
+                 policy: str = POLICY_DROP_OLDEST, use_process: bool = False, capture_body: bool = False,
+                 event_types: Optional[frozenset] = None):
+        """
+        :param handler: 处理函数，接收一个 EventSnapshot 参数；使用进程池时必须是模块级函数。
+        :param workers: 工作线程（或进程）数量。
+        :param max_queue: 队列最大长度。
+        :param policy: 队列已满时的处理策略，WorkerPool.POLICY_ 常量之一。
+        :param use_process: 是否使用进程池执行处理函数。
+        :param capture_body: 快照中是否复制请求/响应数据。
+        :param event_types: 只分发这些事件类型，None 表示全部。
+        """
+        if not callable(handler):
+            raise TypeError("参数类型错误：handler 应为函数")
+        if policy not in (self.POLICY_DROP_OLDEST, self.POLICY_DROP_NEWEST, self.POLICY_BLOCK):
+            raise ValueError("参数错误：policy 应为 WorkerPool.POLICY_ 常量之一")
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("参数错误：workers 应为大于 0 的整数")
+        if not isinstance(max_queue, int) or max_queue < 1:
+            raise ValueError("参数错误：max_queue 应为大于 0 的整数")
+        self.__handler = handler
+        self.__policy = policy
+        self.__capture_body = capture_body
+        self.__event_types = None if event_types is None else frozenset(event_types)
+        self.__queue = queue.Queue(max_queue)
+        self.__lock = threading.Lock()
+        self.__counters = {"submitted": 0, "dropped": 0, "processed": 0, "failed": 0}
+        self.__closed = False
+        self.__executor = ProcessPoolExecutor(workers) if use_process else None
+        self.__threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self.__worker, name=f"SunnyNet-worker-{i}", daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+
+    def __call__(self, event) -> None:
+        if self.__closed:
+            return
+        if self.__event_types is not None and event.get_event_type() not in self.__event_types:
+            return
+        self.submit(EventSnapshot.capture(event, self.__capture_body))
+
+    def submit(self, snapshot: EventSnapshot) -> bool:
+        """
+        按队列策略放入一个快照。
+
+        :return: 放入成功返回 True，被丢弃返回 False。
+        """
+        if self.__policy == self.POLICY_BLOCK:
+            self.__queue.put(snapshot)
+            self.__count("submitted")
+            return True
+        try:
+            self.__queue.put_nowait(snapshot)
+            self.__count("submitted")
+            return True
+        except queue.Full:
+            pass
+        if self.__policy == self.POLICY_DROP_NEWEST:
+            self.__count("dropped")
+            return False
+        while True:
+            try:
+                self.__queue.get_nowait()
+                self.__queue.task_done()
+                self.__count("dropped")
+            except queue.Empty:
+                pass
+            try:
+                self.__queue.put_nowait(snapshot)
+                self.__count("submitted")
+                return True
+            except queue.Full:
+                continue
+
+    def __count(self, name: str) -> None:
+        with self.__lock:
+            self.__counters[name] += 1
+
+    def __worker(self):
+        while True:
+            snapshot = self.__queue.get()
+            try:
+                if snapshot is None:
+                    return
+                if self.__executor is not None:
+                    self.__executor.submit(_run_handler, self.__handler, snapshot).result()
+                else:
+                    self.__handler(snapshot)
+                self.__count("processed")
+            except Exception:
+                self.__count("failed")
+                traceback.print_exc()
+            finally:
+                self.__queue.task_done()
+
+    def stats(self) -> dict:
+        """
+        获取计数。
+
+        :return: 包含 submitted、dropped、processed、failed、queued 的字典。
+        """
+        with self.__lock:
+            stats = dict(self.__counters)
+        stats["queued"] = self.__queue.qsize()
+        return stats
+
+    def dropped(self) -> int:
+        """ 获取因队列已满被丢弃的快照数量。 """
+        return self.__counters["dropped"]
+
+    def join(self) -> None:
+        """ 等待队列中已有的快照全部处理完成。 """
+        self.__queue.join()
+
+    def close(self, wait: bool = True) -> None:
+        """
+        停止工作线程。
+
+        :param wait: 是否等待队列中已有的快照处理完成。
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        if not wait:
+            while True:
+                try:
+                    self.__queue.get_nowait()
+                    self.__queue.task_done()
+                except queue.Empty:
+                    break
+        for _ in self.__threads:
+            self.__queue.put(None)
+        for thread in self.__threads:
+            thread.join()
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
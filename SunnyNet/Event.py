@@ -1,10 +1,21 @@
+from contextlib import nullcontext
 from ctypes import *
-from typing import Union
+from typing import Optional, Union
 
-from SunnyNet import tools, TCPTools, UDPTools, WebsocketTools
-from SunnyNet.SunnyDLL import PointerToText, DLLSunny, PtrToInt, PtrToByte, PointerToBytes
+from SunnyNet import Codec, TCPTools, UDPTools, WebsocketTools
+from SunnyNet.FileBody import FileBody
+from SunnyNet.Headers import Headers
+from SunnyNet.SunnyDLL import PointerToText, DLLSunny, PtrToInt, PtrToByte, PointerToBytes, BorrowedBuffer, \
+    BufferTypes, BytesToPointer, BytesToText
 
-from typing import Union
+
+def _to_text(value) -> str:
+    """ 回调传入的原始字节在首次访问时才解码。 """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return BytesToText(value)
 
 
 class Request:
@@ -12,8 +23,11 @@ class Request:
     HTTP 请求操作类
 
     该类用于处理 HTTP 请求，包括请求体、请求头、Cookies 等操作。
+    请求体、解码后的字符串和协议头在一次回调内只读取一次，调用对应的修改方法后重新读取。
     """
 
+    __slots__ = ("__message_id", "__body", "__text", "__headers", "__header_map")
+
     def __init__(self, message_id: int):
         """
         初始化 Request 实例。
@@ -21,6 +35,49 @@ class Request:
         :param message_id: 消息 ID。
         """
         self.__message_id = message_id
+        self.__body = None
+        self.__text = None
+        self.__headers = None
+        self.__header_map = None
+
+    def __body_changed(self):
+        self.__body = None
+        self.__text = None
+        # 修改 body 后 Content-Length 等协议头可能变化
+        self.__headers_changed()
+
+    def __headers_changed(self, replaced: bool = False):
+        # 单独修改协议头前先写回 headers() 中尚未写回的修改，整体重置时直接丢弃
+        if not replaced:
+            self.flush_headers()
+        self.__headers = None
+        self.__header_map = None
+
+    def headers(self) -> Headers:
+        """
+        获取可修改的协议头字典（不区分大小写，支持同名多值）。
+
+        首次调用时一次性读取全部协议头，修改在回调返回时通过一次 SetRequestALLHeader 写回。
+
+        :return: Headers 对象，同一次回调内多次调用返回同一个对象。
+        """
+        if self.__header_map is None:
+            self.__header_map = Headers.parse(self.get_headers())
+        return self.__header_map
+
+    def flush_headers(self) -> bool:
+        """
+        立即写回 headers() 中的修改。通常不需要手动调用，回调返回时会自动写回。
+
+        :return: 有修改并已写回时返回 True。
+        """
+        headers = self.__header_map
+        if headers is None or not headers.is_modified():
+            return False
+        DLLSunny.SetRequestALLHeader(self.__message_id, create_string_buffer(headers.to_text().encode("utf-8")))
+        headers.mark_flushed()
+        self.__headers = None
+        return True
 
     def raw_request_data_to_file(self, save_file: str) -> bool:
         """
@@ -51,6 +108,8 @@ class Request:
 
         :return: 数据长度。
         """
+        if self.__body is not None:
+            return len(self.__body)
         return PtrToInt(DLLSunny.GetRequestBodyLen(self.__message_id))
 
     def body(self) -> bytes:
@@ -58,30 +117,48 @@ class Request:
 
         :return: POST 数据的字节数组。
         """
-        ptr = DLLSunny.GetRequestBody(self.__message_id)
-        data = PtrToByte(ptr, 0, self.body_length())
-        DLLSunny.Free(ptr)
-        return data
+        if self.__body is None:
+            length = PtrToInt(DLLSunny.GetRequestBodyLen(self.__message_id))
+            ptr = DLLSunny.GetRequestBody(self.__message_id)
+            self.__body = PtrToByte(ptr, 0, length)
+            DLLSunny.Free(ptr)
+        return self.__body
+
+    def body_view(self) -> BorrowedBuffer:
+        """ 借用 POST 提交数据，不复制。
+
+        用法：with Conn.get_request().body_view() as view: ...
+        view 为只读 memoryview，仅在 with 块内有效。
+
+        :return: BorrowedBuffer 对象。
+        """
+        length = self.body_length()
+        return BorrowedBuffer(DLLSunny.GetRequestBody(self.__message_id), length)
 
     def body_to_str(self) -> str:
         """ 获取 POST 提交数据字符串。
 
         :return: POST 数据的字符串形式。
         """
-        try:
-            return self.body().decode("gbk")
-        except UnicodeDecodeError:
-            return self.body().decode("utf-8")
+        if self.__text is None:
+            data = self.body()
+            try:
+                self.__text = data.decode("gbk")
+            except UnicodeDecodeError:
+                self.__text = data.decode("utf-8")
+        return self.__text
 
     def set_body(self, data: bytes) -> bool:
         """ 修改 POST 提交数据字节数组。
 
-        :param data: 新的字节数据。
+        :param data: 新的字节数据，可以是 bytes、bytearray、memoryview 或 mmap，不会额外复制。
         :return: 成功返回 True。
         """
-        if not isinstance(data, bytes):
+        if not isinstance(data, BufferTypes):
             raise TypeError("参数类型错误：data 应为字节数组")
-        return PtrToInt(DLLSunny.SetRequestData(self.__message_id, create_string_buffer(data), len(data))) == 1
+        pointer, length = BytesToPointer(data)
+        self.__body_changed()
+        return PtrToInt(DLLSunny.SetRequestData(self.__message_id, pointer, length)) == 1
 
     def set_str(self, data: str) -> bool:
         """ 修改 POST 提交数据为字符串。
@@ -114,7 +191,7 @@ class Request:
         """
         if not isinstance(config, str):
             raise TypeError("参数类型错误：config 应为字符串")
-        DLLSunny.SetRequestHTTP2Config(self.__message_id, config)
+        DLLSunny.SetRequestHTTP2Config(self.__message_id, create_string_buffer(config.encode("utf-8")))
 
     def random_ja3(self) -> bool:
         """ 随机化请求的 JA3 指纹。
@@ -146,6 +223,7 @@ class Request:
         """
         if not isinstance(headers, str):
             raise TypeError("参数类型错误：headers 应为字符串")
+        self.__headers_changed(True)
         DLLSunny.SetRequestALLHeader(self.__message_id, create_string_buffer(headers.encode("utf-8")))
 
     def set_cookie(self, value: str):
@@ -155,6 +233,7 @@ class Request:
         """
         if not isinstance(value, str):
             raise TypeError("参数类型错误：value 应为字符串")
+        self.__headers_changed()
         DLLSunny.SetRequestAllCookie(self.__message_id, create_string_buffer(value.encode("utf-8")))
 
     def set_header(self, key: str, value: Union[list, tuple, str]):
@@ -166,6 +245,7 @@ class Request:
         """
         if not isinstance(key, str):
             raise TypeError("参数类型错误：key 应为字符串")
+        self.__headers_changed()
         if isinstance(value, str):
             DLLSunny.SetRequestHeader(self.__message_id, create_string_buffer(key.encode("utf-8")),
                                       create_string_buffer(value.encode("utf-8")))
@@ -197,6 +277,7 @@ class Request:
             raise TypeError("参数类型错误：key 应为字符串")
         if not isinstance(value, str):
             raise TypeError("参数类型错误：value 应为字符串")
+        self.__headers_changed()
         DLLSunny.SetRequestCookie(self.__message_id, create_string_buffer(key.encode("utf-8")),
                                   create_string_buffer(value.encode("utf-8")))
 
@@ -208,6 +289,7 @@ class Request:
         """
         if not isinstance(key, str):
             raise TypeError("参数类型错误：key 应为字符串")
+        self.__headers_changed()
         DLLSunny.DelRequestHeader(self.__message_id, create_string_buffer(key.encode("utf-8")))
 
     def remove_compression_mark(self):
@@ -220,7 +302,10 @@ class Request:
 
         :return: 返回完整的协议头字符串。
         """
-        return PointerToText(DLLSunny.GetRequestAllHeader(self.__message_id))
+        self.flush_headers()
+        if self.__headers is None:
+            self.__headers = PointerToText(DLLSunny.GetRequestAllHeader(self.__message_id))
+        return self.__headers
 
     def get_header(self, key: str) -> str:
         """
@@ -241,8 +326,7 @@ class Request:
         """
         if not isinstance(key, str):
             raise TypeError("参数类型错误：key 应为字符串")
-        return PointerToText(
-            DLLSunny.GetRequestHeader(self.__message_id, create_string_buffer(key.encode("utf-8")))).split("\n")
+        return self.headers().get_all(key) or [""]
 
     def get_proto(self) -> str:
         """
@@ -283,12 +367,8 @@ class Request:
         return cookie[1].replace(";", "").strip() if len(cookie) >= 2 else ""
 
     def del_headers(self) -> None:
-        """ 删除全部协议头。 """
-        headers = self.get_headers()
-        for item in headers.split("\r\n"):
-            name = item.split(":")[0]
-            if name:
-                self.del_header(name)
+        """ 删除全部协议头，回调返回时一次性写回。 """
+        self.headers().clear()
 
     def stop(self):
         """
@@ -304,8 +384,16 @@ class Response:
     HTTP 响应操作类
 
     该类用于处理 HTTP 响应，包括状态码、响应体、请求头等操作。
+    响应体、解压后的数据、解码后的字符串和协议头在一次回调内只读取一次，调用对应的修改方法后重新读取。
     """
 
+    SPILL_THRESHOLD = 0
+    """ 响应体超过该字节数时 body() 自动写入临时文件并返回 FileBody，0 表示不启用。 """
+    SPILL_DIR = None
+    """ 自动写入时使用的临时目录，None 使用系统临时目录。 """
+
+    __slots__ = ("__message_id", "__body", "__body_auto", "__text", "__headers", "__header_map")
+
     def __init__(self, message_id: int):
         """
         初始化 Response 实例。
@@ -313,6 +401,56 @@ class Response:
         :param message_id: 消息 ID。
         """
         self.__message_id = message_id
+        self.__body = None
+        self.__body_auto = None
+        self.__text = None
+        self.__headers = None
+        self.__header_map = None
+
+    def __body_changed(self):
+        self.__body = None
+        self.__body_auto = None
+        self.__text = None
+        # 修改 body 后 Content-Length 等协议头可能变化
+        self.__headers_changed()
+
+    def __headers_changed(self, replaced: bool = False):
+        # 单独修改协议头前先写回 headers() 中尚未写回的修改，整体重置时直接丢弃
+        if not replaced:
+            self.flush_headers()
+        self.__headers = None
+        self.__header_map = None
+        # Content-Encoding 可能变化，解压结果需要重新计算
+        self.__body_auto = None
+        self.__text = None
+
+    def headers(self) -> Headers:
+        """
+        获取可修改的协议头字典（不区分大小写，支持同名多值）。
+
+        首次调用时通过 GetResponseAllHeader 一次性读取全部协议头，修改在回调返回时通过一次 SetResponseAllHeader 写回。
+
+        :return: Headers 对象，同一次回调内多次调用返回同一个对象。
+        """
+        if self.__header_map is None:
+            self.__header_map = Headers.parse(self.get_all_header())
+        return self.__header_map
+
+    def flush_headers(self) -> bool:
+        """
+        立即写回 headers() 中的修改。通常不需要手动调用，回调返回时会自动写回。
+
+        :return: 有修改并已写回时返回 True。
+        """
+        headers = self.__header_map
+        if headers is None or not headers.is_modified():
+            return False
+        DLLSunny.SetResponseAllHeader(self.__message_id, create_string_buffer(headers.to_text().encode("utf-8")))
+        headers.mark_flushed()
+        self.__headers = None
+        self.__body_auto = None
+        self.__text = None
+        return True
 
     def set_status_code(self, status: int):
         """
@@ -352,62 +490,104 @@ class Response:
         """
         return PointerToText(DLLSunny.GetResponseServerAddress(self.__message_id))
 
-    def body(self) -> bytes:
+    def body(self) -> Union[bytes, FileBody]:
         """ 获取响应数据。
 
+        设置了 Response.SPILL_THRESHOLD 且响应体超过该大小时，数据写入临时文件并返回 FileBody。
+
         :return: 原始字节数组。
         """
-        ptr = DLLSunny.GetResponseBody(self.__message_id)
-        data = PtrToByte(ptr, 0, self.body_length())
-        DLLSunny.Free(ptr)
-        return data
+        if self.__body is None:
+            length = PtrToInt(DLLSunny.GetResponseBodyLen(self.__message_id))
+            if 0 < self.SPILL_THRESHOLD < length:
+                self.__body = self.__spill(length, None, self.SPILL_DIR)
+                return self.__body
+            ptr = DLLSunny.GetResponseBody(self.__message_id)
+            self.__body = PtrToByte(ptr, 0, length)
+            DLLSunny.Free(ptr)
+        return self.__body
+
+    def __spill(self, length: int, save_file: Optional[str], directory: Optional[str]) -> FileBody:
+        with BorrowedBuffer(DLLSunny.GetResponseBody(self.__message_id), length) as view:
+            return FileBody.from_view(view, save_file, directory)
+
+    def body_to_file(self, save_file: Optional[str] = None) -> FileBody:
+        """ 将响应数据分块写入文件，Python 侧只占用一个分块大小的内存。
+
+        :param save_file: 保存路径，None 表示写入临时文件（FileBody.close() 时删除）。
+        :return: 基于 mmap 的 FileBody 对象，支持切片、哈希和正则搜索。
+        """
+        if save_file is not None and not isinstance(save_file, str):
+            raise TypeError("参数类型错误：save_file 应为字符串")
+        body = self.__body
+        if isinstance(body, FileBody) and save_file is None:
+            return body
+        if body is not None:
+            return FileBody.from_view(memoryview(body.mmap if isinstance(body, FileBody) else body), save_file,
+                                      self.SPILL_DIR)
+        return self.__spill(PtrToInt(DLLSunny.GetResponseBodyLen(self.__message_id)), save_file, self.SPILL_DIR)
+
+    def body_view(self) -> BorrowedBuffer:
+        """ 借用响应数据，不复制。
+
+        用法：with Conn.get_response().body_view() as view: ...
+        view 为只读 memoryview，仅在 with 块内有效。
+
+        :return: BorrowedBuffer 对象。
+        """
+        length = self.body_length()
+        return BorrowedBuffer(DLLSunny.GetResponseBody(self.__message_id), length)
 
     def body_auto(self) -> bytes:
         """ 获取响应数据并自动解压缩。
 
+        优先使用 Codec 中测速最快的后端，解压失败或超过 Codec.MAX_SIZE 时返回原始数据。
+
         :return: 解压缩后的字节数据。
         """
-        data = self.body()
-        encoding = self.get_header("Content-Encoding").lower()
-        if encoding == "gzip":
-            return tools.GzipUnCompress(data) or data
-        if encoding == "br":
-            return tools.BrUnCompress(data) or data
-        if encoding == "deflate":
-            return tools.DeflateUnCompress(data) or data
-        if encoding == "zstd":
-            return tools.ZSTDUnCompress(data) or data
-        if encoding == "zlib":
-            return tools.ZlibUnCompress(data) or data
-        return data
+        if self.__body_auto is None:
+            data = self.body()
+            encoding = self.get_header("Content-Encoding")
+            if encoding:
+                data = Codec.decompress(encoding, data.mmap if isinstance(data, FileBody) else data) or data
+            self.__body_auto = data
+        return self.__body_auto
 
     def body_auto_str(self) -> str:
         """ 获取解压缩后的响应数据字符串。
 
         :return: 解压缩后的字符串。
         """
-        data = self.body_auto()
-        try:
-            return data.decode("gbk")
-        except UnicodeDecodeError:
-            return data.decode("utf-8")
+        if self.__text is None:
+            data = self.body_auto()
+            try:
+                self.__text = data.decode("gbk")
+            except UnicodeDecodeError:
+                self.__text = data.decode("utf-8")
+        return self.__text
 
     def body_length(self) -> int:
         """ 获取响应数据长度。
 
         :return: 数据长度。
         """
+        if self.__body is not None:
+            return len(self.__body)
         ptr = DLLSunny.GetResponseBodyLen(self.__message_id)
         return PtrToInt(ptr)
 
     def set_body(self, data: bytes):
         """ 修改响应数据。
 
-        :param data: 新的字节数据。
+        :param data: 新的字节数据，可以是 bytes、bytearray、memoryview、mmap 或 FileBody。
         """
-        if not isinstance(data, bytes):
+        if isinstance(data, FileBody):
+            data = data.mmap
+        if not isinstance(data, BufferTypes):
             raise TypeError("参数类型错误：data 应为字节数组")
-        DLLSunny.SetResponseData(self.__message_id, create_string_buffer(data), len(data))
+        pointer, length = BytesToPointer(data)
+        self.__body_changed()
+        DLLSunny.SetResponseData(self.__message_id, pointer, length)
 
     def set_body_str(self, data: str):
         """ 修改响应数据为字符串。
@@ -426,6 +606,7 @@ class Response:
         """
         if not isinstance(key, str):
             raise TypeError("参数类型错误：key 应为字符串")
+        self.__headers_changed()
         if isinstance(value, str):
             DLLSunny.SetResponseHeader(self.__message_id, create_string_buffer(key.encode("utf-8")),
                                        create_string_buffer(value.encode("utf-8")))
@@ -443,6 +624,7 @@ class Response:
         """
         if not isinstance(headers, str):
             raise TypeError("参数类型错误：headers 应为字符串")
+        self.__headers_changed(True)
         DLLSunny.SetResponseAllHeader(self.__message_id, create_string_buffer(headers.encode("utf-8")))
 
     def del_header(self, name: str) -> None:
@@ -452,6 +634,7 @@ class Response:
         """
         if not isinstance(name, str):
             raise TypeError("参数类型错误：name 应为字符串")
+        self.__headers_changed()
         DLLSunny.DelResponseHeader(self.__message_id, create_string_buffer(name.encode("utf-8")))
 
     def get_all_header(self) -> str:
@@ -459,15 +642,14 @@ class Response:
 
         :return: 所有协议头的字符串。
         """
-        return PointerToText(DLLSunny.GetAllHeader(self.__message_id))
+        self.flush_headers()
+        if self.__headers is None:
+            self.__headers = PointerToText(DLLSunny.GetResponseAllHeader(self.__message_id))
+        return self.__headers
 
     def del_all_header(self):
-        """ 删除所有协议头。 """
-        headers = self.get_all_header()
-        for line in headers.split("\r\n"):
-            parts = line.split(":")
-            if parts:
-                self.del_header(parts[0])
+        """ 删除所有协议头，回调返回时一次性写回。 """
+        self.headers().clear()
 
     def get_header(self, key: str) -> str:
         """ 获取指定协议头。
@@ -495,8 +677,7 @@ class Response:
         """
         if not isinstance(key, str):
             raise TypeError("参数类型错误：key 应为字符串")
-        key_buffer = create_string_buffer(key.encode("utf-8"))
-        return PointerToText(DLLSunny.GetResponseHeader(self.__message_id, key_buffer)).replace("\r", "").split("\n")
+        return self.headers().get_all(key) or [""]
 
 class HTTPEvent:
     """
@@ -512,11 +693,16 @@ class HTTPEvent:
     EVENT_TYPE_ERROR = 3
     """ HTTP 事件类型常量：请求错误。 """
 
+    __slots__ = ("__message_id", "__theology_id", "__event_type", "__method", "__url", "__error",
+                 "__pid", "__sunny_net_context", "__request", "__response", "__client_ip")
+
     def __init__(self, sunny_context: int, theology_id: int, message_id: int, event_type: int,
-                 method: str, url: str, error: str, pid: int):
+                 method: Union[str, bytes], url: Union[str, bytes], error: Union[str, bytes], pid: int):
         """
         初始化 HTTPEvent 实例。
 
+        构造时不调用 DLL，method、url、error 可以是回调传入的原始字节，首次访问时才解码。
+
         :param sunny_context: Sunny 上下文 ID。
         :param theology_id: 唯一的 Theology ID。
         :param message_id: 消息 ID。
@@ -534,21 +720,18 @@ class HTTPEvent:
         self.__error = error
         self.__pid = pid
         self.__sunny_net_context = sunny_context
-        self.__request = Request(message_id)
-        self.__response = Response(message_id)
-        self.__is_debug = error == "Debug"
-        if self.__is_debug:
-            self.__error = ""
-        else:
-            self.__error = error
-        self.__client_ip = PointerToText(DLLSunny.GetRequestClientIp(message_id))
+        self.__request = None
+        self.__response = None
+        self.__client_ip = None
 
     def get_client_ip(self) -> str:
-        """ 获取客户端 IP 地址。
+        """ 获取客户端 IP 地址，同一个事件只读取一次。
 
         :return: 客户端 IP 地址。
         """
-        return PointerToText(DLLSunny.GetRequestClientIp(self.__message_id))
+        if self.__client_ip is None:
+            self.__client_ip = PointerToText(DLLSunny.GetRequestClientIp(self.__message_id))
+        return self.__client_ip
 
     def set_OutRouterIP(self, ip) -> bool:
         """
@@ -560,13 +743,15 @@ class HTTPEvent:
         """
         if not isinstance(ip, str):
             raise TypeError("参数类型错误：ip 应为字符串")
-        return bool(DLLSunny.RequestSetOutRouterIP(self.__message_id, ip))
+        return bool(DLLSunny.RequestSetOutRouterIP(self.__message_id, create_string_buffer(ip.encode("utf-8"))))
 
     def get_request(self) -> Request:
         """ 获取请求对象。
 
         :return: 请求对象。当事件类型为请求时有效。
         """
+        if self.__request is None:
+            self.__request = Request(self.__message_id)
         return self.__request
 
     def get_response(self) -> Response:
@@ -574,8 +759,17 @@ class HTTPEvent:
 
         :return: 响应对象。当事件类型为请求或响应时有效。
         """
+        if self.__response is None:
+            self.__response = Response(self.__message_id)
         return self.__response
 
+    def flush_headers(self) -> None:
+        """ 写回请求/响应 headers() 中尚未写回的修改。回调返回时由 SunnyNet 自动调用。 """
+        if self.__request is not None:
+            self.__request.flush_headers()
+        if self.__response is not None:
+            self.__response.flush_headers()
+
     def get_theology_id(self) -> int:
         """ 获取唯一 ID。
 
@@ -614,21 +808,32 @@ class HTTPEvent:
 
         :return: 请求的 URL。
         """
-        return self.__url
+        url = self.__url
+        if not isinstance(url, str):
+            url = self.__url = _to_text(url)
+        return url
 
     def get_error(self) -> str:
         """ 获取错误信息。
 
         :return: 错误信息。当事件类型为错误时有效。
         """
-        return self.__error
+        if self.is_debug():
+            return ""
+        error = self.__error
+        if not isinstance(error, str):
+            error = self.__error = _to_text(error)
+        return error
 
     def get_method(self) -> str:
         """ 获取请求方法。
 
         :return: 请求方法。
         """
-        return self.__method
+        method = self.__method
+        if not isinstance(method, str):
+            method = self.__method = _to_text(method)
+        return method
 
     def get_pid(self) -> int:
         """ 获取进程 ID。
@@ -642,7 +847,7 @@ class HTTPEvent:
 
         :return: 如果返回 True，表示脚本代码处理通知此请求需要下断。
         """
-        return self.__is_debug
+        return self.__error == b"Debug" or self.__error == "Debug"
 
     def get_user(self) -> str:
         """ 获取用户信息。
@@ -675,11 +880,17 @@ class TCPEvent:
     TARGET_SERVER = 2
     """ 消息发送目标常量：发送到服务器。 """
 
-    def __init__(self, sunny_context: int, local_addr: str, remote_addr: str, theology_id: int,
-                 message_id: int, event_type: int, pid: int, message_data: bytes):
+    __slots__ = ("__data_pointer", "__data_length", "__message_id", "__theology_id", "__event_type",
+                 "__remote_addr", "__local_addr", "__data", "__pid", "__sunny_net_context")
+
+    def __init__(self, sunny_context: int, local_addr: Union[str, bytes], remote_addr: Union[str, bytes],
+                 theology_id: int, message_id: int, event_type: int, pid: int, message_data: bytes,
+                 data_pointer: int = 0, data_length: int = 0):
         """
         初始化 TCPEvent 实例。
 
+        构造时不调用 DLL，地址可以是回调传入的原始字节，首次访问时才解码。
+
         :param sunny_context: Sunny 上下文 ID。
         :param local_addr: 本地地址。
         :param remote_addr: 远程地址。
@@ -687,8 +898,12 @@ class TCPEvent:
         :param message_id: 消息 ID。
         :param event_type: 事件类型。
         :param pid: 进程 ID。
-        :param message_data: 消息数据。
+        :param message_data: 消息数据，为 None 时在首次访问时从 data_pointer 复制。
+        :param data_pointer: 回调期间有效的原始数据指针。
+        :param data_length: 原始数据长度。
         """
+        self.__data_pointer = data_pointer
+        self.__data_length = data_length
         self.__message_id = message_id
         self.__theology_id = theology_id
         self.__event_type = event_type
@@ -697,8 +912,6 @@ class TCPEvent:
         self.__data = message_data
         self.__pid = pid
         self.__sunny_net_context = sunny_context
-        self.__request = Request(message_id)
-        self.__response = Response(message_id)
 
     def get_theology_id(self) -> int:
         """ 获取唯一 ID。
@@ -717,7 +930,7 @@ class TCPEvent:
         """
         if not isinstance(ip, str):
             raise TypeError("参数类型错误：ip 应为字符串")
-        return bool(DLLSunny.RequestSetOutRouterIP(self.__message_id, ip))
+        return bool(DLLSunny.RequestSetOutRouterIP(self.__message_id, create_string_buffer(ip.encode("utf-8"))))
 
     def get_sunny_net_context(self) -> int:
         """ 获取 SunnyNet 上下文 ID。
@@ -752,14 +965,20 @@ class TCPEvent:
 
         :return: 本地地址。
         """
-        return self.__local_addr
+        local_addr = self.__local_addr
+        if not isinstance(local_addr, str):
+            local_addr = self.__local_addr = _to_text(local_addr)
+        return local_addr
 
     def get_remote_addr(self) -> str:
         """ 获取远程地址。
 
         :return: 远程地址。
         """
-        return self.__remote_addr
+        remote_addr = self.__remote_addr
+        if not isinstance(remote_addr, str):
+            remote_addr = self.__remote_addr = _to_text(remote_addr)
+        return remote_addr
 
     def get_pid(self) -> int:
         """ 获取进程 ID。
@@ -773,8 +992,21 @@ class TCPEvent:
 
         :return: 消息数据。
         """
+        if self.__data is None:
+            self.__data = PtrToByte(self.__data_pointer, 0, self.__data_length) if self.__data_pointer else b""
         return self.__data
 
+    def body_view(self):
+        """ 借用本次事件的数据，不复制。
+
+        view 为只读 memoryview，仅在 with 块内（且回调返回前）有效。
+
+        :return: 可用于 with 语句的对象。
+        """
+        if self.__data is not None:
+            return nullcontext(memoryview(self.__data))
+        return BorrowedBuffer(self.__data_pointer, self.__data_length, free=False)
+
     def set_proxy(self, proxy_url: str,outTime:int) -> bool:
         """ 设置代理请求。
 
@@ -811,16 +1043,16 @@ class TCPEvent:
     def set_body(self, data: bytes) -> None:
         """ 修改本次事件发送/接收的数据。
 
-        :param data: 新的数据，可以是字节数组。
+        :param data: 新的数据，可以是 bytes、bytearray、memoryview 或 mmap，不会额外复制。
         """
         if data is None:
-            empty_data = bytearray()
-            DLLSunny.SetTcpBody(self.__message_id, self.__event_type, create_string_buffer(empty_data), len(empty_data))
+            DLLSunny.SetTcpBody(self.__message_id, self.__event_type, b"", 0)
             return
-        if not isinstance(data, bytes):
+        if not isinstance(data, BufferTypes):
             raise TypeError("参数类型错误：data 应为字节数组")
         self.__data = data
-        DLLSunny.SetTcpBody(self.__message_id, self.__event_type, create_string_buffer(data), len(data))
+        pointer, length = BytesToPointer(data)
+        DLLSunny.SetTcpBody(self.__message_id, self.__event_type, pointer, length)
 
     def set_body_str(self, data: str) -> None:
         """
@@ -848,7 +1080,7 @@ class TCPEvent:
         """
         if not isinstance(send_target, int):
             raise TypeError("参数类型错误：send_target 应为整数")
-        if not isinstance(message, bytes):
+        if not isinstance(message, BufferTypes):
             raise TypeError("参数类型错误：message 应为字节数组")
         return TCPTools.SendMessage(send_target, self.__theology_id, message)
 
@@ -886,11 +1118,16 @@ class UDPEvent:
     TARGET_SERVER = 2
     """ 消息发送目标常量：发送到服务器。 """
 
-    def __init__(self, sunny_context: int, local_addr: str, remote_addr: str, theology_id: int,
-                 message_id: int, event_type: int, pid: int):
+    __slots__ = ("__message_id", "__theology_id", "__event_type", "__remote_addr", "__local_addr",
+                 "__pid", "__sunny_net_context")
+
+    def __init__(self, sunny_context: int, local_addr: Union[str, bytes], remote_addr: Union[str, bytes],
+                 theology_id: int, message_id: int, event_type: int, pid: int):
         """
         初始化 UDPEvent 实例。
 
+        构造时不调用 DLL，地址可以是回调传入的原始字节，首次访问时才解码。
+
         :param sunny_context: Sunny 上下文 ID。
         :param local_addr: 本地地址。
         :param remote_addr: 远程地址。
@@ -906,8 +1143,6 @@ class UDPEvent:
         self.__local_addr = local_addr
         self.__pid = pid
         self.__sunny_net_context = sunny_context
-        self.__request = Request(message_id)
-        self.__response = Response(message_id)
 
     def get_pid(self) -> int:
         """ 获取进程 ID。
@@ -954,14 +1189,20 @@ class UDPEvent:
 
         :return: 本地地址。
         """
-        return self.__local_addr
+        local_addr = self.__local_addr
+        if not isinstance(local_addr, str):
+            local_addr = self.__local_addr = _to_text(local_addr)
+        return local_addr
 
     def get_remote_addr(self) -> str:
         """ 获取远程地址。
 
         :return: 远程地址。
         """
-        return self.__remote_addr
+        remote_addr = self.__remote_addr
+        if not isinstance(remote_addr, str):
+            remote_addr = self.__remote_addr = _to_text(remote_addr)
+        return remote_addr
 
     def get_body(self) -> bytes:
         """ 获取本次事件的数据。
@@ -971,20 +1212,29 @@ class UDPEvent:
         ptr = DLLSunny.GetUdpData(self.__message_id)
         return PointerToBytes(ptr)
 
+    def body_view(self) -> BorrowedBuffer:
+        """ 借用本次事件的数据，不复制。
+
+        view 为只读 memoryview，仅在 with 块内有效。
+
+        :return: BorrowedBuffer 对象。
+        """
+        return BorrowedBuffer.length_prefixed(DLLSunny.GetUdpData(self.__message_id))
+
     def set_body(self, data: bytes) -> bool:
         """ 修改本次事件发送/接收的数据。
 
-        :param data: 新的数据，可以是字节数组。
+        :param data: 新的数据，可以是 bytes、bytearray、memoryview 或 mmap，不会额外复制。
 
         :return: 如果成功设置数据则返回 True，否则返回 False。
         """
         if data is None:
-            empty_data = bytearray()
-            ptr = DLLSunny.SetUdpData(self.__message_id, create_string_buffer(empty_data), len(empty_data))
+            ptr = DLLSunny.SetUdpData(self.__message_id, b"", 0)
             return bool(ptr)
-        if not isinstance(data, bytes):
+        if not isinstance(data, BufferTypes):
             raise TypeError("参数类型错误：data 应为字节数组")
-        ptr = DLLSunny.SetUdpData(self.__message_id, create_string_buffer(data), len(data))
+        pointer, length = BytesToPointer(data)
+        ptr = DLLSunny.SetUdpData(self.__message_id, pointer, length)
         return bool(ptr)
 
     def set_body_str(self, data: str) -> None:
@@ -1012,7 +1262,7 @@ class UDPEvent:
         """
         if not isinstance(send_target, int):
             raise TypeError("参数类型错误：send_target 应为整数")
-        if not isinstance(message, bytes):
+        if not isinstance(message, BufferTypes):
             raise TypeError("参数类型错误：message 应为字节数组")
         return UDPTools.SendMessage(send_target, self.__theology_id, message)
 
@@ -1051,11 +1301,16 @@ class WebSocketEvent:
     TARGET_SERVER = 2
     """ 消息发送目标常量：发送到服务器。 """
 
+    __slots__ = ("__message_id", "__theology_id", "__event_type", "__method", "__url", "__pid",
+                 "__sunny_net_context", "__request", "__ws_type")
+
     def __init__(self, sunny_context: int, theology_id: int, message_id: int, event_type: int,
-                 method: str, url: str, pid: int, ws_type: int):
+                 method: Union[str, bytes], url: Union[str, bytes], pid: int, ws_type: int):
         """
         初始化 WebSocketEvent 实例。
 
+        构造时不调用 DLL，method、url 可以是回调传入的原始字节，首次访问时才解码。
+
         :param sunny_context: Sunny 上下文 ID。
         :param theology_id: 唯一的 Theology ID。
         :param message_id: 消息 ID。
@@ -1072,9 +1327,14 @@ class WebSocketEvent:
         self.__url = url
         self.__pid = pid
         self.__sunny_net_context = sunny_context
-        self.__request = Request(message_id)
+        self.__request = None
         self.__ws_type = ws_type
 
+    def __get_request(self) -> Request:
+        if self.__request is None:
+            self.__request = Request(self.__message_id)
+        return self.__request
+
     def get_pid(self) -> int:
         """ 获取进程 ID。
 
@@ -1149,6 +1409,16 @@ class WebSocketEvent:
         DLLSunny.Free(pointer)
         return body_data
 
+    def body_view(self) -> BorrowedBuffer:
+        """ 借用本次事件的数据，不复制。
+
+        view 为只读 memoryview，仅在 with 块内有效。
+
+        :return: BorrowedBuffer 对象。
+        """
+        length = self.get_body_length()
+        return BorrowedBuffer(DLLSunny.GetWebsocketBody(self.__message_id), length)
+
     def get_body_length(self) -> int:
         """ 获取本次事件的数据长度。
 
@@ -1159,16 +1429,16 @@ class WebSocketEvent:
     def set_body(self, data: bytes) -> bool:
         """ 修改本次事件发送/接收的数据。
 
-        :param data: 新的数据，可以是字节数组。
+        :param data: 新的数据，可以是 bytes、bytearray、memoryview 或 mmap，不会额外复制。
         :return: 如果设置成功返回 True，否则返回 False。
         """
         if data is None:
-            empty_data = bytearray()
-            pointer = DLLSunny.SetWebsocketBody(self.__message_id, create_string_buffer(empty_data), len(empty_data))
+            pointer = DLLSunny.SetWebsocketBody(self.__message_id, b"", 0)
             return bool(pointer)
-        if not isinstance(data, bytes):
+        if not isinstance(data, BufferTypes):
             raise TypeError("参数类型错误：data 应为字节数组")
-        pointer = DLLSunny.SetWebsocketBody(self.__message_id, create_string_buffer(data), len(data))
+        data_pointer, length = BytesToPointer(data)
+        pointer = DLLSunny.SetWebsocketBody(self.__message_id, data_pointer, length)
         return bool(pointer)
 
     def set_body_str(self, data: str) -> None:
@@ -1198,7 +1468,7 @@ class WebSocketEvent:
             raise TypeError("参数类型错误：send_target 应为整数")
         if not isinstance(message_type, int):
             raise TypeError("参数类型错误：message_type 应为整数")
-        if not isinstance(message, bytes):
+        if not isinstance(message, BufferTypes):
             raise TypeError("参数类型错误：message 应为字节数组")
         return WebsocketTools.SendMessage(send_target, self.__theology_id, message_type, message)
 
@@ -1214,28 +1484,34 @@ class WebSocketEvent:
 
         :return: 请求的 URL。
         """
-        return self.__url
+        url = self.__url
+        if not isinstance(url, str):
+            url = self.__url = _to_text(url)
+        return url
 
     def get_method(self) -> str:
         """ 获取请求方法。
 
         :return: 请求方法。
         """
-        return self.__method
+        method = self.__method
+        if not isinstance(method, str):
+            method = self.__method = _to_text(method)
+        return method
 
     def get_headers(self) -> str:
         """ 获取请求时的全部协议头。
 
         :return: 请求头。
         """
-        return self.__request.get_headers()
+        return self.__get_request().get_headers()
 
     def get_cookies(self) -> str:
         """ 获取请求时的全部 Cookies。
 
         :return: 所有 Cookies。
         """
-        return self.__request.get_cookies()
+        return self.__get_request().get_cookies()
 
     def get_cookie(self, key: str) -> str:
         """ 获取指定 Cookie。
@@ -1243,7 +1519,7 @@ class WebSocketEvent:
         :param key: Cookie 的键。
         :return: 指定 Cookie 的值。
         """
-        return self.__request.get_cookie(key)
+        return self.__get_request().get_cookie(key)
 
     def get_cookie_value(self, key: str) -> str:
         """ 获取指定 Cookie 的值，不包括 Cookie 的键。
@@ -1251,4 +1527,4 @@ class WebSocketEvent:
         :param key: Cookie 的键。
         :return: 指定 Cookie 的值。
         """
-        return self.__request.get_cookie_value(key)
+        return self.__get_request().get_cookie_value(key)
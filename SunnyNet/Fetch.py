@@ -0,0 +1,273 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+from .ClientPool import ClientPool
+from .HTTPClient import ClientResponse
+from .Replay import ReplayReport
+from .Router import _split_url
+
+RequestType = Union[str, Tuple]
+
+
+class FetchResult:
+    """ fetch_many 的单个结果。 """
+
+    __slots__ = ("index", "method", "url", "response", "elapsed", "error")
+
+    def __init__(self, index: int, method: str, url: str, response: Optional[ClientResponse], elapsed: float,
+                 error: str):
+        """
+        :param index: 请求在输入中的序号。
+        :param method: 请求方法。
+        :param url: 请求 URL。
+        :param response: 响应快照，发送时抛出异常则为 None。
+        :param elapsed: 耗时（毫秒）。
+        :param error: 错误信息，成功时为空字符串。
+        """
+        self.index = index
+        self.method = method
+        self.url = url
+        self.response = response
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.response is not None and self.response.ok
+
+    def __repr__(self) -> str:
+        return "<FetchResult #%d %s %s %r>" % (self.index, self.method, self.url, self.response or self.error)
+
+
+def _normalize(index: int, item: RequestType) -> tuple:
+    """ 把 URL 或 (method, url[, headers[, data]]) 转为 (序号, 主机名, method, url, headers, data)。 """
+    if isinstance(item, str):
+        method, url, headers, data = "GET", item, (), b""
+    elif isinstance(item, tuple) and 2 <= len(item) <= 4:
+        method, url = item[0], item[1]
+        headers = item[2] if len(item) > 2 and item[2] else ()
+        data = item[3] if len(item) > 3 and item[3] is not None else b""
+    else:
+        raise TypeError("参数类型错误：请求应为 URL 字符串或 (method, url[, headers[, data]]) 元组")
+    if hasattr(headers, "items"):
+        headers = headers.items()
+    return index, _split_url(url)[0], method, url, tuple(headers), data
+
+
+class _HostScheduler:
+    """
+    按主机名轮询的调度器
+
+    从输入中预读最多 buffer 个请求，按主机名分队列，轮流从每个主机取一个请求，
+    单个主机进行中的请求数不超过 per_host，慢主机只会占住自己的名额。
+    """
+
+    def __init__(self, source: Iterator[RequestType], per_host: int, buffer: int):
+        self.__source = enumerate(source)
+        self.__per_host = per_host
+        self.__buffer = buffer
+        self.__condition = threading.Condition()
+        self.__queues = {}
+        self.__inflight = {}
+        self.__ready = deque()
+        self.__ready_set = set()
+        self.__pending = 0
+        self.__exhausted = False
+        self.__stopped = False
+        self.error = None
+
+    def __can_run(self, host: str) -> bool:
+        return bool(self.__queues.get(host)) and (
+                not self.__per_host or self.__inflight.get(host, 0) < self.__per_host)
+
+    def __mark_ready(self, host: str) -> None:
+        if host not in self.__ready_set and self.__can_run(host):
+            self.__ready.append(host)
+            self.__ready_set.add(host)
+
+    def __fill(self) -> None:
+        while not self.__exhausted and self.__pending < self.__buffer:
+            try:
+                index, item = next(self.__source)
+                job = _normalize(index, item)
+            except StopIteration:
+                self.__exhausted = True
+                break
+            except Exception as e:
+                self.error = e
+                self.__exhausted = True
+                break
+            self.__queues.setdefault(job[1], deque()).append(job)
+            self.__pending += 1
+            self.__mark_ready(job[1])
+
+    def next(self) -> Optional[tuple]:
+        """ 取下一个请求，全部完成或已停止时返回 None。 """
+        with self.__condition:
+            while not self.__stopped:
+                self.__fill()
+                if self.__ready:
+                    host = self.__ready.popleft()
+                    self.__ready_set.discard(host)
+                    job = self.__queues[host].popleft()
+                    if not self.__queues[host]:
+                        del self.__queues[host]
+                    self.__pending -= 1
+                    self.__inflight[host] = self.__inflight.get(host, 0) + 1
+                    # 轮到队尾，其他主机先执行
+                    self.__mark_ready(host)
+                    return job
+                if self.__exhausted and not self.__pending:
+                    return None
+                self.__condition.wait()
+            return None
+
+    def done(self, host: str) -> None:
+        with self.__condition:
+            count = self.__inflight[host] - 1
+            if count:
+                self.__inflight[host] = count
+            else:
+                del self.__inflight[host]
+            self.__mark_ready(host)
+            self.__condition.notify_all()
+
+    def stop(self) -> None:
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+
+
+class FetchStream:
+    """
+    fetch_many 的返回值
+
+    迭代时按完成顺序产生 FetchResult；迭代结束（或中途 close）后可以通过 report() 获取吞吐和延迟百分位。
+    """
+
+    def __init__(self, requests: Iterable[RequestType], concurrency: int, per_host: int, buffer: int,
+                 pool: ClientPool, config: dict):
+        self.__scheduler = _HostScheduler(iter(requests), per_host, buffer)
+        self.__concurrency = concurrency
+        self.__pool = pool
+        self.__config = config
+        self.__results = queue.Queue(concurrency * 4)
+        self.__latencies = []
+        self.__statuses = {}
+        self.__errors = {}
+        self.__started = 0.0
+        self.__finished = 0.0
+        self.__iterating = False
+
+    def __worker(self) -> None:
+        scheduler = self.__scheduler
+        try:
+            while True:
+                job = scheduler.next()
+                if job is None:
+                    return
+                index, host, method, url, headers, data = job
+                started = time.perf_counter()
+                response, error = None, ""
+                try:
+                    with self.__pool.client(**self.__config) as client:
+                        client.open(method, url)
+                        for name, value in headers:
+                            client.set_header(name, value)
+                        response = client.send(data, snapshot=True)
+                    error = response.get_error()
+                except Exception as e:
+                    error = repr(e)
+                elapsed = (time.perf_counter() - started) * 1000
+                scheduler.done(host)
+                self.__results.put(FetchResult(index, method, url, response, elapsed, error))
+        finally:
+            self.__results.put(None)
+
+    def __iter__(self) -> Iterator[FetchResult]:
+        if self.__iterating:
+            raise RuntimeError("fetch_many 的结果只能迭代一次")
+        self.__iterating = True
+        self.__started = time.perf_counter()
+        threads = [threading.Thread(target=self.__worker, name=f"SunnyNet-fetch-{i}", daemon=True)
+                   for i in range(self.__concurrency)]
+        for thread in threads:
+            thread.start()
+        running = len(threads)
+        try:
+            while running:
+                result = self.__results.get()
+                if result is None:
+                    running -= 1
+                    continue
+                self.__record(result)
+                yield result
+        finally:
+            self.__scheduler.stop()
+            # 提前结束迭代时取走剩余结果，让工作线程退出
+            while running:
+                if self.__results.get() is None:
+                    running -= 1
+            self.__finished = time.perf_counter()
+        if self.__scheduler.error is not None:
+            raise self.__scheduler.error
+
+    def __record(self, result: FetchResult) -> None:
+        self.__latencies.append(result.elapsed)
+        status = result.response.get_status_code() if result.response is not None else 0
+        self.__statuses[status] = self.__statuses.get(status, 0) + 1
+        if result.error:
+            self.__errors[result.error] = self.__errors.get(result.error, 0) + 1
+
+    def report(self) -> ReplayReport:
+        """ 目前为止的统计，summary() 包含 count、rate、p50、p90、p95、p99 等。 """
+        finished = self.__finished or time.perf_counter()
+        elapsed = finished - self.__started if self.__started else 0.0
+        return ReplayReport(self.__latencies, self.__statuses, self.__errors, elapsed, 0.0)
+
+
+def fetch_many(requests: Iterable[RequestType], concurrency: int = 16, per_host: int = 4, buffer: int = 10000,
+               pool: Optional[ClientPool] = None, timeout: Optional[int] = None, proxy: str = "",
+               redirect: bool = True, http2_config: Optional[str] = None, random_tls: bool = False,
+               out_router_ip: str = "") -> FetchStream:
+    """
+    并发请求大量 URL，按完成顺序返回结果。
+
+    输入按需读取（最多预读 buffer 个），按主机名轮询调度，单个主机的并发数不超过 per_host，
+    一个慢主机不会占满全部工作线程。客户端上下文从 ClientPool 复用。
+
+    用法::
+
+        results = fetch_many(open("urls.txt").read().split(), concurrency=64, per_host=4, timeout=10000)
+        for result in results:
+            if result.ok:
+                save(result.url, result.response.get_body())
+        print(results.report().summary())
+
+    :param requests: URL 字符串或 (method, url[, headers[, data]]) 元组，headers 为字典或 (名称, 值) 序列。
+    :param concurrency: 工作线程数。
+    :param per_host: 单个主机的最大并发数，0 表示不限制。
+    :param buffer: 最多预读的请求数。
+    :param pool: 客户端连接池，None 时创建一个。
+    :param timeout: 单个请求的超时时间（毫秒）。
+    :param proxy: 上游代理，格式同 SunnyHTTPClient.set_proxy。
+    :param redirect: 是否允许自动重定向。
+    :param http2_config: HTTP/2 指纹配置，请使用 tools.HTTP2_fp_Config_ 常量之一。
+    :param random_tls: 是否使用随机 TLS 指纹。
+    :param out_router_ip: 出口 IP。
+    :return: FetchStream，迭代得到 FetchResult。
+    """
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ValueError("参数错误：concurrency 应为大于 0 的整数")
+    if not isinstance(per_host, int) or per_host < 0:
+        raise ValueError("参数错误：per_host 应为大于等于 0 的整数")
+    if not isinstance(buffer, int) or buffer < 1:
+        raise ValueError("参数错误：buffer 应为大于 0 的整数")
+    if pool is None:
+        pool = ClientPool(max_idle=concurrency)
+    config = dict(timeout=timeout, proxy=proxy, redirect=redirect, http2_config=http2_config,
+                  random_tls=random_tls, out_router_ip=out_router_ip)
+    return FetchStream(requests, concurrency, per_host, buffer, pool, config)
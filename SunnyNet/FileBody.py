@@ -0,0 +1,156 @@
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+from typing import Iterator, Optional, Union
+
+CHUNK_SIZE = 1024 * 1024
+""" 写入文件时每次复制的字节数。 """
+
+
+def write_chunks(view: memoryview, file, chunk_size: int = CHUNK_SIZE) -> int:
+    """ 分块写入 memoryview，不额外复制整块数据。 """
+    total = len(view)
+    for offset in range(0, total, chunk_size):
+        file.write(view[offset:offset + chunk_size])
+    return total
+
+
+class FileBody:
+    """
+    保存在文件中的 Body
+
+    通过 mmap 按需访问文件内容，不会把整个 Body 读入内存。
+    支持 len()、切片、in、find()、正则搜索和分块计算哈希；mmap 属性可直接传给 set_body、hashlib 等接受缓冲区的函数。
+
+    临时文件在 close() 或对象被回收时删除，指定路径保存的文件会保留。
+    """
+
+    def __init__(self, path: str, delete: bool = False):
+        """
+        :param path: 文件路径。
+        :param delete: close() 时是否删除文件。
+        """
+        self.__path = path
+        self.__delete = delete
+        self.__file = open(path, "rb")
+        self.__size = os.fstat(self.__file.fileno()).st_size
+        # 空文件无法映射
+        self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if self.__size else None
+
+    @classmethod
+    def from_view(cls, view: memoryview, save_file: Optional[str] = None, directory: Optional[str] = None,
+                  chunk_size: int = CHUNK_SIZE) -> "FileBody":
+        """
+        将 memoryview 分块写入文件并映射。
+
+        :param view: 数据。
+        :param save_file: 保存路径，None 表示写入临时文件（close 时删除）。
+        :param directory: 临时文件所在目录，None 使用系统临时目录。
+        :param chunk_size: 每次写入的字节数。
+        """
+        if save_file is None:
+            fd, path = tempfile.mkstemp(prefix="sunny_body_", suffix=".bin", dir=directory)
+            with os.fdopen(fd, "wb") as file:
+                write_chunks(view, file, chunk_size)
+            return cls(path, True)
+        with open(save_file, "wb") as file:
+            write_chunks(view, file, chunk_size)
+        return cls(save_file, False)
+
+    @property
+    def path(self) -> str:
+        """ 文件路径。 """
+        return self.__path
+
+    @property
+    def mmap(self) -> Union[mmap.mmap, bytes]:
+        """ 只读 mmap 对象（空文件时为 b""）。 """
+        if self.__file is None:
+            raise ValueError("FileBody 已关闭")
+        return self.__mmap if self.__mmap is not None else b""
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __getitem__(self, item) -> Union[int, bytes]:
+        return self.mmap[item]
+
+    def __contains__(self, item) -> bool:
+        return self.find(item) >= 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.iter_chunks()
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """ 按块读取内容。 """
+        data = self.mmap
+        for offset in range(0, self.__size, chunk_size):
+            yield data[offset:offset + chunk_size]
+
+    def find(self, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        """ 查找子串，返回位置，找不到返回 -1。 """
+        return self.mmap.find(sub, start, self.__size if end is None else end)
+
+    def search(self, pattern: Union[bytes, "re.Pattern"], flags: int = 0) -> Optional["re.Match"]:
+        """ 在内容中进行正则搜索（字节正则）。 """
+        return re.compile(pattern, flags).search(self.mmap)
+
+    def finditer(self, pattern: Union[bytes, "re.Pattern"], flags: int = 0) -> Iterator["re.Match"]:
+        """ 在内容中迭代全部正则匹配（字节正则）。 """
+        return re.compile(pattern, flags).finditer(self.mmap)
+
+    def hash(self, algorithm: str = "sha256") -> str:
+        """
+        计算哈希值。
+
+        :param algorithm: hashlib 支持的算法名称，例如 md5、sha1、sha256。
+        :return: 十六进制哈希字符串。
+        """
+        hasher = hashlib.new(algorithm)
+        data = self.mmap
+        view = memoryview(data)
+        try:
+            for offset in range(0, self.__size, CHUNK_SIZE):
+                hasher.update(view[offset:offset + CHUNK_SIZE])
+        finally:
+            view.release()
+        return hasher.hexdigest()
+
+    def tobytes(self) -> bytes:
+        """ 读取全部内容到内存。 """
+        return self.mmap[:]
+
+    def decode(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        """ 读取全部内容并解码为字符串。 """
+        return self.tobytes().decode(encoding, errors)
+
+    def close(self) -> None:
+        """ 关闭映射和文件，临时文件会被删除。可重复调用。 """
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__mmap = None
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+            if self.__delete:
+                try:
+                    os.remove(self.__path)
+                except OSError:
+                    pass
+
+    def __enter__(self) -> "FileBody":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __repr__(self) -> str:
+        return "FileBody(path=%r, size=%d)" % (self.__path, self.__size)
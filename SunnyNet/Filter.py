@@ -0,0 +1,218 @@
+import fnmatch
+import ipaddress
+import re
+from typing import Iterable, Optional, Union
+
+Pattern = Union[str, "re.Pattern"]
+
+
+# 正则开头作用于整个表达式的内联标志，例如 (?i)；这些标志已经包含在 re.Pattern.flags 中
+_LEADING_FLAGS = re.compile(rb"^(?:\(\?[aiLmsux]+\))+")
+_INLINE_FLAGS = re.compile(rb"\(\?[aiLmsux]+\)")
+_SCOPED_FLAGS = ((re.IGNORECASE, b"i"), (re.MULTILINE, b"m"), (re.DOTALL, b"s"), (re.VERBOSE, b"x"))
+
+
+class _PatternSet:
+    """
+    多个通配符/正则合并后的匹配器。
+
+    通配符匹配整个字符串，re.Pattern 按 search 语义匹配（例如 re.compile("/api/") 匹配 URL 中任意位置）。
+    通配符和简单正则合并为一个分支表达式，各正则自己的标志以 (?flags:...) 的形式保留；
+    带分组（可能有反向引用）或无法转换标志的正则单独编译，逐个匹配。
+    """
+
+    __slots__ = ("__combined", "__separate")
+
+    def __init__(self, combined: Optional["re.Pattern"], separate: list):
+        self.__combined = combined
+        self.__separate = separate
+
+    def matches(self, data: bytes) -> bool:
+        if self.__combined is not None and self.__combined.search(data) is not None:
+            return True
+        for pattern in self.__separate:
+            if pattern.search(data) is not None:
+                return True
+        return False
+
+
+def _compile_patterns(patterns: Optional[Iterable[Pattern]], ignore_case: bool) -> Optional[_PatternSet]:
+    """
+    将多个通配符/正则编译为一个匹配器。
+
+    字符串按通配符处理（例如 *.example.com），re.Pattern 对象按正则处理。
+    大部分规则合并为一个分支表达式，匹配时只需执行一次，与规则数量无关。
+    """
+    if patterns is None:
+        return None
+    if isinstance(patterns, (str, bytes, re.Pattern)):
+        patterns = [patterns]
+    base_flags = re.IGNORECASE if ignore_case else 0
+    parts = []
+    separate = []
+    for item in patterns:
+        if isinstance(item, re.Pattern):
+            source = item.pattern
+            if isinstance(source, str):
+                source = source.encode("utf-8")
+            # 字节正则不支持 re.UNICODE，str 正则默认带有该标志
+            flags = item.flags & ~re.UNICODE
+            stripped = _LEADING_FLAGS.sub(b"", source)
+            if item.groups or _INLINE_FLAGS.search(stripped) or flags & ~(re.I | re.M | re.S | re.X):
+                separate.append(re.compile(source, flags | base_flags))
+                continue
+            scoped = b"".join(letter for flag, letter in _SCOPED_FLAGS if flags & flag)
+            parts.append(b"(?" + scoped + b":" + stripped + b")")
+        elif isinstance(item, str):
+            parts.append(b"(?:\\A" + fnmatch.translate(item).encode("utf-8") + b")")
+        elif isinstance(item, bytes):
+            parts.append(b"(?:\\A" + fnmatch.translate(item.decode("utf-8")).encode("utf-8") + b")")
+        else:
+            raise TypeError("参数类型错误：规则应为字符串或 re.Pattern")
+    if not parts and not separate:
+        return None
+    combined = re.compile(b"|".join(parts), base_flags) if parts else None
+    return _PatternSet(combined, separate)
+
+
+class _CIDRSet:
+    """ 按前缀长度分组的网段集合，查询次数只与不同前缀长度的个数有关。 """
+
+    def __init__(self, cidrs: Iterable[str]):
+        if isinstance(cidrs, str):
+            cidrs = [cidrs]
+        self.__groups = {4: {}, 6: {}}
+        for cidr in cidrs:
+            network = ipaddress.ip_network(cidr, strict=False)
+            shift = network.max_prefixlen - network.prefixlen
+            self.__groups[network.version].setdefault(shift, set()).add(
+                int(network.network_address) >> shift
+            )
+
+    def contains(self, address) -> bool:
+        """ address 为回调传入的 "ip:port" 字节串。 """
+        ip = _parse_ip(address)
+        if ip is None:
+            return False
+        value = int(ip)
+        for shift, networks in self.__groups[ip.version].items():
+            if (value >> shift) in networks:
+                return True
+        return False
+
+
+def _parse_ip(address):
+    if not address:
+        return None
+    if isinstance(address, bytes):
+        address = address.decode("latin-1")
+    if address.startswith("["):
+        host = address[1:].split("]", 1)[0]
+    elif address.count(":") == 1:
+        host = address.split(":", 1)[0]
+    else:
+        host = address
+    try:
+        return ipaddress.ip_address(host)
+    except ValueError:
+        return None
+
+
+def _url_host(url: bytes) -> bytes:
+    """ 从 URL 中取出主机名（不含端口）。 """
+    start = url.find(b"://")
+    start = 0 if start < 0 else start + 3
+    end = len(url)
+    for sep in (b"/", b"?", b"#"):
+        pos = url.find(sep, start)
+        if 0 <= pos < end:
+            end = pos
+    host = url[start:end]
+    at = host.rfind(b"@")
+    if at >= 0:
+        host = host[at + 1:]
+    if host.startswith(b"["):
+        return host[1:].split(b"]", 1)[0]
+    return host.split(b":", 1)[0]
+
+
+class EventFilter:
+    """
+    回调事件过滤器
+
+    在 SunnyNet 的原始回调中、创建事件对象之前进行判断，不匹配的事件不会构造任何 Python 对象。
+    规则在创建时编译一次；同一项中的多个规则为“或”，不同项之间为“且”，未设置的项不限制。
+
+    用法::
+
+        app.set_callback(http_callback, http_filter=EventFilter(hosts=["*.example.com"], methods=["POST"]))
+    """
+
+    def __init__(self, hosts: Iterable[Pattern] = None, urls: Iterable[Pattern] = None,
+                 methods: Iterable[str] = None, event_types: Iterable[int] = None,
+                 pids: Iterable[int] = None, local_cidrs: Iterable[str] = None,
+                 remote_cidrs: Iterable[str] = None):
+        """
+        创建过滤器。
+
+        :param hosts: 主机名规则，字符串为通配符（例如 *.example.com，匹配整个主机名），也可以是 re.Pattern（search 语义，需要完整匹配时请使用 ^...$）。仅 HTTP/WebSocket。
+        :param urls: URL 规则，字符串为通配符（匹配完整 URL），也可以是 re.Pattern（search 语义，匹配 URL 中任意位置）。仅 HTTP/WebSocket。
+        :param methods: 请求方法，例如 ["GET", "POST"]。仅 HTTP/WebSocket。
+        :param event_types: 事件类型，请使用对应事件类的 EVENT_TYPE_ 常量。
+        :param pids: 进程 PID。
+        :param local_cidrs: 本地地址网段，例如 ["127.0.0.0/8"]。仅 TCP/UDP。
+        :param remote_cidrs: 远程地址网段，例如 ["10.0.0.0/8", "::1/128"]。仅 TCP/UDP。
+        """
+        self.__hosts = _compile_patterns(hosts, True)
+        self.__urls = _compile_patterns(urls, False)
+        if isinstance(methods, str):
+            methods = [methods]
+        self.__methods = None if methods is None else frozenset(m.upper().encode("utf-8") for m in methods)
+        if isinstance(event_types, int):
+            event_types = [event_types]
+        self.__event_types = None if event_types is None else frozenset(event_types)
+        if isinstance(pids, int):
+            pids = [pids]
+        self.__pids = None if pids is None else frozenset(pids)
+        self.__local = None if local_cidrs is None else _CIDRSet(local_cidrs)
+        self.__remote = None if remote_cidrs is None else _CIDRSet(remote_cidrs)
+
+    def __common(self, event_type: int, pid: int) -> bool:
+        if self.__event_types is not None and event_type not in self.__event_types:
+            return False
+        if self.__pids is not None and pid not in self.__pids:
+            return False
+        return True
+
+    def match_http(self, event_type: int, method: bytes, url: bytes, pid: int) -> bool:
+        """
+        判断 HTTP/WebSocket 事件是否需要处理。
+
+        :param method: 回调传入的原始请求方法字节。
+        :param url: 回调传入的原始 URL 字节。
+        """
+        if not self.__common(event_type, pid):
+            return False
+        if self.__methods is not None and (method or b"").upper() not in self.__methods:
+            return False
+        url = url or b""
+        if self.__urls is not None and not self.__urls.matches(url):
+            return False
+        if self.__hosts is not None and not self.__hosts.matches(_url_host(url)):
+            return False
+        return True
+
+    def match_conn(self, event_type: int, local_addr: bytes, remote_addr: bytes, pid: int) -> bool:
+        """
+        判断 TCP/UDP 事件是否需要处理。
+
+        :param local_addr: 回调传入的原始本地地址字节，例如 b"127.0.0.1:5000"。
+        :param remote_addr: 回调传入的原始远程地址字节。
+        """
+        if not self.__common(event_type, pid):
+            return False
+        if self.__local is not None and not self.__local.contains(local_addr):
+            return False
+        if self.__remote is not None and not self.__remote.contains(remote_addr):
+            return False
+        return True
@@ -1,6 +1,102 @@
+import json
 from ctypes import create_string_buffer
+from typing import Any
 
-from SunnyNet import SunnyDLL, tools
+from SunnyNet import SunnyDLL, Codec
+from SunnyNet.Headers import Headers
+
+
+class ClientResponse:
+    """
+    SunnyHTTPClient 响应快照
+
+    一次性复制状态码、协议头和响应数据，之后在同一个客户端上 open 新的请求不影响已有快照。
+    响应数据在第一次调用 get_body 时才按 Content-Encoding 解压。
+    """
+
+    __slots__ = ("__status_code", "__raw_headers", "__headers", "__raw_body", "__body", "__error")
+
+    def __init__(self, status_code: int, raw_headers: str, raw_body: bytes, error: str = ""):
+        """
+        :param status_code: 状态码，请求失败时为 0。
+        :param raw_headers: 完整响应协议头字符串。
+        :param raw_body: 未解压的响应数据。
+        :param error: 错误信息。
+        """
+        self.__status_code = status_code
+        self.__raw_headers = raw_headers
+        self.__headers = None
+        self.__raw_body = raw_body
+        self.__body = None
+        self.__error = error
+
+    def __repr__(self) -> str:
+        return "<ClientResponse %d, %d bytes>" % (self.__status_code, len(self.__raw_body))
+
+    @property
+    def ok(self) -> bool:
+        """ 状态码是否为 2xx/3xx。 """
+        return 200 <= self.__status_code < 400
+
+    def get_status_code(self) -> int:
+        """ 状态码，请求失败时为 0。 """
+        return self.__status_code
+
+    def get_error(self) -> str:
+        """ 请求失败时的错误信息。 """
+        return self.__error
+
+    def get_headers(self) -> str:
+        """ 完整响应协议头字符串。 """
+        return self.__raw_headers
+
+    def headers(self) -> Headers:
+        """ 解析后的响应协议头（副本，修改不影响快照）。 """
+        if self.__headers is None:
+            self.__headers = Headers.parse(self.__raw_headers)
+        return Headers(self.__headers.items())
+
+    def get_response_header(self, name: str) -> str:
+        """ 获取指定的响应协议头，不存在时返回空字符串。 """
+        if self.__headers is None:
+            self.__headers = Headers.parse(self.__raw_headers)
+        return self.__headers.get(name, "")
+
+    def get_raw_body(self) -> bytes:
+        """ 未解压的响应数据。 """
+        return self.__raw_body
+
+    def get_body_length(self) -> int:
+        """ 未解压的响应数据长度。 """
+        return len(self.__raw_body)
+
+    def get_body(self) -> bytes:
+        """ 解压后的响应数据，解压失败时返回原始数据。 """
+        if self.__body is None:
+            encoding = self.get_response_header("Content-Encoding")
+            body = self.__raw_body
+            if encoding and body:
+                body = Codec.decompress(encoding, body) or body
+            self.__body = body
+        return self.__body
+
+    def get_body_string(self, encoding: str = None) -> str:
+        """
+        响应数据的字符串表示。
+
+        :param encoding: 编码，None 时依次尝试 UTF-8、GBK。
+        """
+        body = self.get_body()
+        if encoding:
+            return body.decode(encoding)
+        try:
+            return body.decode("utf-8")
+        except UnicodeDecodeError:
+            return body.decode("gbk", errors="replace")
+
+    def json(self) -> Any:
+        """ 把响应数据解析为 JSON。 """
+        return json.loads(self.get_body())
 
 
 class SunnyHTTPClient:
@@ -69,7 +165,7 @@ class SunnyHTTPClient:
         """
         if not isinstance(ip, str):
             raise TypeError("参数类型错误：ip 应为字符串")
-        return bool(SunnyDLL.DLLSunny.HTTPSetOutRouterIP(self.__client_context, ip))
+        return bool(SunnyDLL.DLLSunny.HTTPSetOutRouterIP(self.__client_context, create_string_buffer(ip.encode("utf-8"))))
 
     def set_header(self, name: str, value: str):
         """
@@ -116,7 +212,7 @@ class SunnyHTTPClient:
         """
         return SunnyDLL.PointerToText(SunnyDLL.DLLSunny.HTTPGetRequestHeader(self.__client_context))
 
-    def set_request_ServerIP(self, ip: str):
+    def set_request_ServerIP(self, ip: str) -> None:
         """
         设置请求实际连接地址
         设置后将不再使用URL或协议头中的HOST地址
@@ -125,8 +221,7 @@ class SunnyHTTPClient:
         """
         if not isinstance(ip, str):
             raise TypeError("参数类型错误")
-        return SunnyDLL.PointerToText(
-            SunnyDLL.DLLSunny.HTTPSetServerIP(self.__client_context, create_string_buffer(ip.encode("utf-8"))))
+        SunnyDLL.DLLSunny.HTTPSetServerIP(self.__client_context, create_string_buffer(ip.encode("utf-8")))
 
     def set_timeouts(self, timeout: int):
         """
@@ -140,22 +235,25 @@ class SunnyHTTPClient:
             raise TypeError("参数类型错误")
         SunnyDLL.DLLSunny.HTTPSetTimeouts(self.__client_context, timeout)
 
-    def send(self, data=""):
+    def send(self, data="", snapshot: bool = False):
         """
         发送请求数据。
 
-        :param data: 可以是字节数组或字符串。
+        :param data: 可以是字节数组（bytes、bytearray、memoryview、mmap，不会额外复制）或字符串。
+        :param snapshot: 为 True 时发送完成后返回 ClientResponse 快照，等同于再调用 get_response()。
 
         :raises TypeError: 如果参数类型不正确。
         """
-        if isinstance(data, bytes):
-            SunnyDLL.DLLSunny.HTTPSendBin(self.__client_context, create_string_buffer(data), len(data))
-            return
-        if isinstance(data, str):
-            encoded_data = data.encode("utf-8")
-            SunnyDLL.DLLSunny.HTTPSendBin(self.__client_context, create_string_buffer(encoded_data), len(encoded_data))
-            return
-        raise TypeError("参数类型错误")
+        if isinstance(data, SunnyDLL.BufferTypes):
+            pointer, length = SunnyDLL.BytesToPointer(data)
+        elif isinstance(data, str):
+            pointer = data.encode("utf-8")
+            length = len(pointer)
+        else:
+            raise TypeError("参数类型错误")
+        SunnyDLL.DLLSunny.HTTPSendBin(self.__client_context, pointer, length)
+        if snapshot:
+            return self.get_response()
 
     def get_body_length(self) -> int:
         """
@@ -204,42 +302,44 @@ class SunnyHTTPClient:
         """
         return SunnyDLL.PtrToInt(SunnyDLL.DLLSunny.HTTPGetCode(self.__client_context))
 
-    def get_body(self) -> bytes:
-        """
-        获取响应内容。
-
-        :return: 返回响应内容的字节数组。
-        """
+    def __read_body(self) -> bytes:
+        """ 读取未解压的响应内容。 """
         body_length = self.get_body_length()
         if body_length < 1:
             return b""
         body_pointer = SunnyDLL.DLLSunny.HTTPGetBody(self.__client_context)
         body_data = SunnyDLL.PtrToByte(body_pointer, 0, body_length)
         SunnyDLL.DLLSunny.Free(body_pointer)
-        encoding = self.get_response_header("Content-Encoding").lower()
-
-        # 根据编码格式进行解压
-        if encoding == "gzip":
-            decompressed_data = tools.GzipUnCompress(body_data)
-            if len(decompressed_data) > 0:
-                return decompressed_data
-        if encoding == "br":
-            decompressed_data = tools.BrUnCompress(body_data)
-            if len(decompressed_data) > 0:
-                return decompressed_data
-        if encoding == "deflate":
-            decompressed_data = tools.DeflateUnCompress(body_data)
-            if len(decompressed_data) > 0:
-                return decompressed_data
-        if encoding == "zstd":
-            decompressed_data = tools.ZSTDUnCompress(body_data)
-            if len(decompressed_data) > 0:
-                return decompressed_data
-        if encoding == "zlib":
-            decompressed_data = tools.ZlibUnCompress(body_data)
-            if len(decompressed_data) > 0:
-                return decompressed_data
+        return body_data
+
+    def get_response(self) -> ClientResponse:
+        """
+        获取当前响应的快照。
+
+        按固定顺序一次读取状态码、完整协议头和未解压的响应数据（请求失败时只读取错误信息），
+        Content-Encoding 从已读取的协议头中解析，不再单独查询；响应数据在第一次 get_body 时才解压。
 
+        :return: ClientResponse，之后再次 open/send 不会影响它。
+        """
+        context = self.__client_context
+        status_code = SunnyDLL.PtrToInt(SunnyDLL.DLLSunny.HTTPGetCode(context))
+        if status_code <= 0:
+            return ClientResponse(status_code, "", b"", self.get_error())
+        raw_headers = SunnyDLL.PointerToText(SunnyDLL.DLLSunny.HTTPGetHeads(context))
+        return ClientResponse(status_code, raw_headers, self.__read_body())
+
+    def get_body(self) -> bytes:
+        """
+        获取响应内容。
+
+        :return: 返回响应内容的字节数组。
+        """
+        body_data = self.__read_body()
+        if not body_data:
+            return b""
+        encoding = self.get_response_header("Content-Encoding")
+        if encoding:
+            return Codec.decompress(encoding, body_data) or body_data
         return body_data
 
     def get_body_string(self) -> str:
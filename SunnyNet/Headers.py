@@ -0,0 +1,173 @@
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+
+class Headers:
+    """
+    协议头多值字典
+
+    名称不区分大小写，同名协议头可以有多个值，保留首次出现时的名称写法和顺序。
+    由 Request.headers() / Response.headers() 一次性解析完整协议头得到，
+    修改只在本地记录，回调返回时（或调用 flush_headers() 时）一次性写回。
+
+    用法::
+
+        headers = Conn.get_request().headers()
+        headers["User-Agent"] = "SunnyNet"
+        headers.add("X-Trace", "1")
+        del headers["Cookie"]
+    """
+
+    __slots__ = ("__items", "__modified")
+
+    def __init__(self, items: Iterable[Tuple[str, str]] = ()):
+        """
+        :param items: (名称, 值) 序列。
+        """
+        # {小写名称: [名称, [值, ...]]}
+        self.__items = {}
+        self.__modified = False
+        for name, value in items:
+            self.__append(name, value)
+
+    @classmethod
+    def parse(cls, text: str) -> "Headers":
+        """
+        解析完整协议头字符串，每行一个 "名称: 值"。
+
+        :param text: 协议头字符串。
+        :return: Headers 对象。
+        """
+        headers = cls()
+        for line in text.split("\n"):
+            name, sep, value = line.partition(":")
+            if not sep:
+                continue
+            name = name.strip()
+            if name:
+                headers.__append(name, value.strip())
+        return headers
+
+    def __append(self, name: str, value: str) -> None:
+        entry = self.__items.get(name.lower())
+        if entry is None:
+            self.__items[name.lower()] = [name, [value]]
+        else:
+            entry[1].append(value)
+
+    @staticmethod
+    def __check(name, value=None) -> None:
+        if not isinstance(name, str):
+            raise TypeError("参数类型错误：name 应为字符串")
+        if value is not None and not isinstance(value, str):
+            raise TypeError("参数类型错误：value 应为字符串")
+        if "\r" in name or "\n" in name or ":" in name:
+            raise ValueError("参数错误：name 不能包含换行或冒号")
+        if value is not None and ("\r" in value or "\n" in value):
+            raise ValueError("参数错误：value 不能包含换行")
+
+    def is_modified(self) -> bool:
+        """ 是否有尚未写回的修改。 """
+        return self.__modified
+
+    def mark_flushed(self) -> None:
+        """ 标记修改已写回。 """
+        self.__modified = False
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        获取第一个值。
+
+        :param name: 协议头名称，不区分大小写。
+        :param default: 不存在时返回的值。
+        """
+        entry = self.__items.get(name.lower())
+        return entry[1][0] if entry else default
+
+    def get_all(self, name: str) -> List[str]:
+        """
+        获取全部值。
+
+        :param name: 协议头名称，不区分大小写。
+        :return: 值列表，不存在时为空列表。
+        """
+        entry = self.__items.get(name.lower())
+        return list(entry[1]) if entry else []
+
+    def add(self, name: str, value: str) -> None:
+        """ 追加一个值，不影响已有的同名协议头。 """
+        self.__check(name, value)
+        self.__append(name, value)
+        self.__modified = True
+
+    def set(self, name: str, value: Union[str, List[str], Tuple[str, ...]]) -> None:
+        """ 替换同名协议头的全部值，传入空列表等同于 remove。 """
+        values = [value] if isinstance(value, str) else list(value)
+        self.__check(name)
+        for item in values:
+            self.__check(name, item)
+        if not values:
+            self.remove(name)
+            return
+        key = name.lower()
+        entry = self.__items.get(key)
+        if entry is None:
+            self.__items[key] = [name, values]
+        else:
+            entry[1] = values
+        self.__modified = True
+
+    def remove(self, name: str) -> bool:
+        """
+        删除同名协议头的全部值。
+
+        :return: 存在并已删除时返回 True。
+        """
+        if self.__items.pop(name.lower(), None) is None:
+            return False
+        self.__modified = True
+        return True
+
+    def clear(self) -> None:
+        """ 删除全部协议头。 """
+        if self.__items:
+            self.__items.clear()
+            self.__modified = True
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """ 依次返回每个 (名称, 值)，同名多个值会返回多次。 """
+        for name, values in self.__items.values():
+            for value in values:
+                yield name, value
+
+    def keys(self) -> List[str]:
+        """ 返回全部协议头名称（每个名称一次）。 """
+        return [entry[0] for entry in self.__items.values()]
+
+    def to_text(self) -> str:
+        """ 转换为完整协议头字符串。 """
+        return "".join("%s: %s\r\n" % item for item in self.items())
+
+    def __getitem__(self, name: str) -> str:
+        entry = self.__items.get(name.lower())
+        if entry is None:
+            raise KeyError(name)
+        return entry[1][0]
+
+    def __setitem__(self, name: str, value: str) -> None:
+        self.set(name, value)
+
+    def __delitem__(self, name: str) -> None:
+        if not self.remove(name):
+            raise KeyError(name)
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and name.lower() in self.__items
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __repr__(self) -> str:
+        return "Headers(%r)" % list(self.items())
@@ -0,0 +1,160 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from .Event import HTTPEvent
+
+STOP = object()
+""" 中间件返回 STOP 时不再执行后续中间件。 """
+
+
+class Pipeline:
+    """
+    HTTP 中间件管道
+
+    按登记顺序依次执行多个中间件，每个中间件接收同一个 HTTPEvent，
+    可以通过 get_request()/get_response() 读取和修改数据，返回 Pipeline.STOP 时终止后续中间件。
+
+    登记完成后管道会被编译为一个展开的分发函数，事件到达时不再遍历列表，也不做任何签名检查。
+    开启 timing 时每个中间件的调用次数和耗时单独统计，可通过 stats() 查看。
+    计数保存在每个线程自己的列表中，热路径上不加锁，stats() 读取时再汇总。
+
+    用法::
+
+        pipeline = Pipeline()
+        pipeline.use(add_auth_header, event_types=[HTTPEvent.EVENT_TYPE_REQUEST])
+        pipeline.use(block_ads)
+        pipeline.use(log_traffic)
+        app.set_callback(http_callback=pipeline)
+    """
+
+    STOP = STOP
+
+    def __init__(self, timing: bool = True):
+        """
+        :param timing: 是否统计每个中间件的耗时。
+        """
+        self.__timing = timing
+        self.__stages = []
+        self.__lock = threading.Lock()
+        self.__counters = []
+        self.__baseline = []
+        self.__dispatch = self.__compile()
+
+    def use(self, stage: Callable[[HTTPEvent], object], name: Optional[str] = None,
+            event_types: Iterable[int] = None) -> Callable:
+        """
+        在管道末尾添加中间件。
+
+        :param stage: 中间件函数，接收一个 HTTPEvent 参数，返回 Pipeline.STOP 时终止管道。
+        :param name: 统计中显示的名称，默认为函数名。
+        :param event_types: 只在这些事件类型上执行，请使用 HTTPEvent.EVENT_TYPE_ 常量；None 表示全部。
+        :return: 原中间件函数，便于作为装饰器使用。
+        """
+        if not callable(stage):
+            raise TypeError("参数类型错误：stage 应为函数")
+        if isinstance(event_types, int):
+            event_types = [event_types]
+        if name is None:
+            name = getattr(stage, "__name__", type(stage).__name__)
+        with self.__lock:
+            self.__stages.append((name, stage, None if event_types is None else frozenset(event_types)))
+            self.__dispatch = self.__compile()
+        return stage
+
+    def stage(self, name: Optional[str] = None, event_types: Iterable[int] = None) -> Callable:
+        """ use 的装饰器形式。 """
+
+        def decorator(stage):
+            return self.use(stage, name, event_types)
+
+        return decorator
+
+    def __compile(self) -> Callable[[HTTPEvent], None]:
+        """ 把当前中间件列表展开为一个分发函数。 """
+        stages = list(self.__stages)
+        size = len(stages)
+        # 每个线程第一次执行时登记自己的 ([调用次数], [耗时])，之后只有该线程写入
+        local = threading.local()
+        counters = []
+        lock = self.__lock
+
+        def register():
+            local.counters = ([0] * size, [0] * size)
+            with lock:
+                counters.append(local.counters)
+            return local.counters
+
+        self.__counters = counters
+        self.__baseline = [(0, 0)] * size
+        namespace = {"_STOP": STOP, "_clock": time.perf_counter_ns, "_local": local, "_register": register}
+        filtered = any(types is not None for _, _, types in stages)
+        lines = ["def _dispatch(Conn):"]
+        if self.__timing and stages:
+            lines.append("    try:")
+            lines.append("        _calls, _elapsed = _local.counters")
+            lines.append("    except AttributeError:")
+            lines.append("        _calls, _elapsed = _register()")
+        if filtered:
+            lines.append("    _type = Conn.get_event_type()")
+        for index, (_, func, types) in enumerate(stages):
+            namespace["_s%d" % index] = func
+            indent = "    "
+            if types is not None:
+                namespace["_t%d" % index] = types
+                lines.append("    if _type in _t%d:" % index)
+                indent = "        "
+            if self.__timing:
+                lines.append(indent + "_start = _clock()")
+                lines.append(indent + "_r = _s%d(Conn)" % index)
+                lines.append(indent + "_elapsed[%d] += _clock() - _start" % index)
+                lines.append(indent + "_calls[%d] += 1" % index)
+            else:
+                lines.append(indent + "_r = _s%d(Conn)" % index)
+            lines.append(indent + "if _r is _STOP:")
+            lines.append(indent + "    return")
+        lines.append("    return")
+        exec(compile("\n".join(lines), "<SunnyNet.Pipeline>", "exec"), namespace)
+        return namespace["_dispatch"]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取每个中间件的统计信息。
+
+        :return: {名称: {"calls": 调用次数, "total_ms": 总耗时(毫秒), "avg_us": 平均耗时(微秒)}}
+        """
+        result = {}
+        with self.__lock:
+            for index, (name, _, _) in enumerate(self.__stages):
+                calls, total = self.__total(index)
+                base_calls, base_total = self.__baseline[index]
+                calls -= base_calls
+                total -= base_total
+                if name in result:
+                    name = "%s#%d" % (name, index)
+                result[name] = {
+                    "calls": calls,
+                    "total_ms": total / 1e6,
+                    "avg_us": total / calls / 1e3 if calls else 0.0,
+                }
+        return result
+
+    def reset_stats(self) -> None:
+        """ 清空统计信息。 """
+        with self.__lock:
+            # 其他线程可能正在累加自己的计数，不直接清零，记录当前值作为起点
+            self.__baseline = [self.__total(index) for index in range(len(self.__stages))]
+
+    def __total(self, index: int) -> tuple:
+        """ 汇总所有线程中第 index 个中间件的 (调用次数, 耗时)。 """
+        calls = total = 0
+        for thread_calls, thread_elapsed in self.__counters:
+            calls += thread_calls[index]
+            total += thread_elapsed[index]
+        return calls, total
+
+    def __len__(self) -> int:
+        return len(self.__stages)
+
+    def __call__(self, Conn: HTTPEvent) -> None:
+        self.__dispatch(Conn)
@@ -74,17 +74,17 @@ class Queue:
         """
         将数据推入队列。
 
-        :param data: 可以是字节数组或字符串。
+        :param data: 可以是字节数组（bytes、bytearray、memoryview、mmap，不会额外复制）或字符串。
         """
         if self._id == "":
             return
-        if isinstance(data, bytes):
-            SunnyDLL.DLLSunny.QueuePush(create_string_buffer(self._id.encode("utf-8")), create_string_buffer(data),
-                                        len(data))
+        if isinstance(data, SunnyDLL.BufferTypes):
+            pointer, length = SunnyDLL.BytesToPointer(data)
+            SunnyDLL.DLLSunny.QueuePush(create_string_buffer(self._id.encode("utf-8")), pointer, length)
         elif isinstance(data, str):
             encoded_data = data.encode("utf-8")
-            SunnyDLL.DLLSunny.QueuePush(create_string_buffer(self._id.encode("utf-8")),
-                                        create_string_buffer(encoded_data), len(encoded_data))
+            SunnyDLL.DLLSunny.QueuePush(create_string_buffer(self._id.encode("utf-8")), encoded_data,
+                                        len(encoded_data))
         else:
             raise TypeError("参数类型错误：data 应为字节数组或字符串")
 
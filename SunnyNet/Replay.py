@@ -0,0 +1,299 @@
+import base64
+import gzip
+import json
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from .Headers import Headers
+from .HTTPClient import SunnyHTTPClient
+
+# 由客户端根据 URL 和 Body 自动生成，回放时不复制
+_SKIP_HEADERS = frozenset(("content-length", "connection", "transfer-encoding", "keep-alive", "proxy-connection",
+                           "upgrade", "te", "trailer"))
+
+
+class ReplayRequest:
+    """ 一条待回放的请求。 """
+
+    __slots__ = ("method", "url", "headers", "body", "timestamp", "http2_config")
+
+    def __init__(self, method: str, url: str, headers: Iterable = (), body: bytes = b"", timestamp: float = 0.0,
+                 http2_config: Optional[str] = None):
+        """
+        :param method: 请求方法。
+        :param url: 完整 URL。
+        :param headers: (名称, 值) 序列。
+        :param body: 请求数据。
+        :param timestamp: 原始请求时间（Unix 时间戳，秒），用于按原始间隔回放。
+        :param http2_config: 该请求使用的 HTTP/2 指纹配置，None 使用 Replayer 的设置。
+        """
+        self.method = method
+        self.url = url
+        self.headers = list(headers)
+        self.body = body
+        self.timestamp = timestamp
+        self.http2_config = http2_config
+
+
+def _har_time(value: str) -> float:
+    from datetime import datetime
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return 0.0
+
+
+def _from_har_entry(entry: dict) -> ReplayRequest:
+    request = entry["request"]
+    body = b""
+    post_data = request.get("postData")
+    if post_data and post_data.get("text"):
+        if post_data.get("encoding") == "base64":
+            body = base64.b64decode(post_data["text"])
+        else:
+            body = post_data["text"].encode("utf-8")
+    headers = [(item["name"], item["value"]) for item in request.get("headers", [])
+               if not item["name"].startswith(":")]
+    return ReplayRequest(request["method"], request["url"], headers, body, _har_time(entry.get("startedDateTime", "")))
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        import zstandard
+        import io
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+                                encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def load_har(path: str) -> List[ReplayRequest]:
+    """
+    读取 HAR 文件或 CaptureWriter 写入的 .har/.jsonl 文件（支持 .gz/.zst）。
+
+    :return: 按原始时间排序的请求列表。
+    """
+    with _open_text(path) as file:
+        if ".jsonl" in path:
+            entries = [json.loads(line) for line in file if line.strip()]
+        else:
+            entries = json.load(file)["log"]["entries"]
+    requests = [_from_har_entry(entry) for entry in entries]
+    requests.sort(key=lambda item: item.timestamp)
+    return requests
+
+
+def load_store(directory: str, **query) -> List[ReplayRequest]:
+    """
+    从 TrafficStore 读取 HTTP 请求。
+
+    :param directory: TrafficStore 的存储目录。
+    :param query: 传给 TrafficReader.query 的筛选条件，例如 host="api.example.com"。
+    :return: 按原始时间排序的请求列表，同一个 TheologyID 只取一次。
+    """
+    from .Dispatch import EventSnapshot
+    from .Store import TrafficReader
+    query["kind"] = EventSnapshot.KIND_HTTP
+    requests = []
+    seen = set()
+    with TrafficReader(directory) as reader:
+        for record in reader.query(**query):
+            if record.get_theology_id() in seen:
+                continue
+            seen.add(record.get_theology_id())
+            headers = Headers.parse(record.get_request_headers()).items()
+            requests.append(ReplayRequest(record.get_method(), record.get_url(), headers,
+                                          bytes(record.get_request_body()), record.get_timestamp()))
+    requests.sort(key=lambda item: item.timestamp)
+    return requests
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    rank = max(int(round(percent / 100.0 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class ReplayReport:
+    """ Replayer 和 fetch_many 的结果统计。延迟单位为毫秒。 """
+
+    def __init__(self, latencies: List[float], statuses: dict, errors: dict, elapsed: float, lag: float):
+        self.latencies = sorted(latencies)
+        self.statuses = statuses
+        self.errors = errors
+        self.elapsed = elapsed
+        self.lag = lag
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies)
+
+    def percentile(self, percent: float) -> float:
+        """ 延迟百分位（毫秒），例如 percentile(99)。 """
+        return _percentile(self.latencies, percent)
+
+    def summary(self) -> dict:
+        """
+        :return: 包含请求数、吞吐、各百分位延迟、状态码分布、错误分布和最大调度延迟的字典。
+        """
+        count = self.count
+        return {
+            "count": count,
+            "elapsed": self.elapsed,
+            "rate": count / self.elapsed if self.elapsed > 0 else 0.0,
+            "mean": sum(self.latencies) / count if count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.latencies[-1] if count else 0.0,
+            "statuses": dict(self.statuses),
+            "errors": dict(self.errors),
+            "max_lag": self.lag,
+        }
+
+    def __repr__(self) -> str:
+        return "ReplayReport(%r)" % self.summary()
+
+
+class Replayer:
+    """
+    流量回放 / 压测
+
+    读取抓包得到的请求（load_har、load_store），通过多个 SunnyHTTPClient 重新发送，
+    每个工作线程持有一个客户端。可以按目标速率、按并发数，或按原始请求间隔（可加速/减速）发送，
+    可以设置 HTTP/2 指纹和随机 TLS 指纹，结束后返回延迟百分位等统计。
+
+    用法::
+
+        requests = load_har("traffic.har")
+        report = Replayer(requests, concurrency=32, target="http://127.0.0.1:8080", time_warp=2.0).run()
+        print(report.summary())
+    """
+
+    def __init__(self, requests: Iterable[ReplayRequest], concurrency: int = 8, rate: Optional[float] = None,
+                 time_warp: Optional[float] = None, target: Optional[str] = None, timeout: int = 30000,
+                 http2_config: Optional[str] = None, random_tls: bool = False, proxy: Optional[str] = None,
+                 repeat: int = 1, client_factory: Callable[[], SunnyHTTPClient] = SunnyHTTPClient):
+        """
+        :param requests: 待回放的请求。
+        :param concurrency: 并发数（工作线程 / 客户端数量）。
+        :param rate: 目标速率（请求/秒），None 表示不限速，只受并发数限制。
+        :param time_warp: 按原始请求间隔回放的倍速，例如 1.0 为原速、2.0 为两倍速；设置后忽略 rate。
+        :param target: 把请求发送到该地址，例如 http://127.0.0.1:8080，保留原始路径和 Host 协议头。
+        :param timeout: 单个请求的超时时间（毫秒）。
+        :param http2_config: HTTP/2 指纹配置，请使用 tools.HTTP2_fp_Config_ 常量之一。
+        :param random_tls: 是否使用随机 TLS 指纹。
+        :param proxy: 上游代理，格式同 SunnyHTTPClient.set_proxy。
+        :param repeat: 重复回放的次数。
+        :param client_factory: 创建客户端的函数。
+        """
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise ValueError("参数错误：concurrency 应为大于 0 的整数")
+        if rate is not None and rate <= 0:
+            raise ValueError("参数错误：rate 应大于 0")
+        if time_warp is not None and time_warp <= 0:
+            raise ValueError("参数错误：time_warp 应大于 0")
+        if not isinstance(repeat, int) or repeat < 1:
+            raise ValueError("参数错误：repeat 应为大于 0 的整数")
+        self.__pass = list(requests)
+        self.__repeat = repeat
+        self.__requests = self.__pass * repeat
+        self.__concurrency = concurrency
+        self.__rate = rate
+        self.__time_warp = time_warp
+        self.__target = urlsplit(target) if target else None
+        self.__timeout = timeout
+        self.__http2_config = http2_config
+        self.__random_tls = random_tls
+        self.__proxy = proxy
+        self.__client_factory = client_factory
+        self.__lock = threading.Lock()
+
+    def __url(self, url: str) -> str:
+        if self.__target is None:
+            return url
+        parts = urlsplit(url)
+        return urlunsplit((self.__target.scheme, self.__target.netloc, parts.path, parts.query, ""))
+
+    def __schedule(self) -> List[float]:
+        """ 计算每个请求相对开始时间的发送时刻（秒）。 """
+        count = len(self.__requests)
+        if self.__time_warp is not None and count:
+            first = self.__pass[0].timestamp
+            offsets = [max(item.timestamp - first, 0.0) / self.__time_warp for item in self.__pass]
+            # 每次重复接在上一次之后，两次之间间隔平均请求间隔，而不是全部从 0 开始
+            span = max(offsets)
+            if len(offsets) > 1:
+                span += span / (len(offsets) - 1)
+            return [offset + index * span for index in range(self.__repeat) for offset in offsets]
+        if self.__rate is not None:
+            return [index / self.__rate for index in range(count)]
+        return [0.0] * count
+
+    def __send(self, client: SunnyHTTPClient, request: ReplayRequest):
+        client.open(request.method, self.__url(request.url))
+        http2_config = request.http2_config or self.__http2_config
+        if http2_config:
+            client.set_http2_config(http2_config)
+        if self.__random_tls:
+            client.set_random_tls(True)
+        if self.__proxy:
+            client.set_proxy(self.__proxy)
+        client.set_timeouts(self.__timeout)
+        for name, value in request.headers:
+            if name.lower() not in _SKIP_HEADERS:
+                client.set_header(name, value)
+        client.send(request.body or b"")
+        return client.get_status_code()
+
+    def run(self) -> ReplayReport:
+        """ 执行回放，阻塞到全部请求完成。 """
+        offsets = self.__schedule()
+        jobs = queue.Queue(self.__concurrency)
+        latencies = []
+        statuses = {}
+        errors = {}
+        lag = [0.0]
+
+        def worker():
+            client = self.__client_factory()
+            while True:
+                request = jobs.get()
+                if request is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    status = self.__send(client, request)
+                    error = client.get_error() if status <= 0 else ""
+                except Exception as e:
+                    status, error = 0, repr(e)
+                elapsed = (time.perf_counter() - started) * 1000
+                with self.__lock:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+                    if error:
+                        errors[error] = errors.get(error, 0) + 1
+
+        threads = [threading.Thread(target=worker, name=f"SunnyNet-replay-{i}", daemon=True)
+                   for i in range(self.__concurrency)]
+        for thread in threads:
+            thread.start()
+        start = time.perf_counter()
+        for offset, request in zip(offsets, self.__requests):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            jobs.put(request)
+            # 工作线程全忙时调度会落后于计划时间，记录最大落后量
+            lag[0] = max(lag[0], time.perf_counter() - start - offset)
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+        return ReplayReport(latencies, statuses, errors, time.perf_counter() - start, lag[0])
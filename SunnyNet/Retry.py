@@ -0,0 +1,225 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Mapping, Optional, Tuple, Union
+
+from .ClientPool import ClientPool
+from .HTTPClient import ClientResponse
+from .Replay import _percentile
+from .Router import _split_url
+
+HeadersType = Union[Mapping[str, str], Iterable[Tuple[str, str]], None]
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+HEDGE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class _HostState:
+    """ 单个主机的重试预算和最近延迟。 """
+
+    __slots__ = ("tokens", "latencies")
+
+    def __init__(self, reserve: float, samples: int):
+        self.tokens = reserve
+        self.latencies = deque(maxlen=samples)
+
+
+class RetryClient:
+    """
+    带重试、退避和对冲请求的 SunnyHTTPClient 执行器
+
+    状态码在 retry_statuses 中，或请求失败（状态码为 0，错误信息来自 get_error）时重试，
+    两次尝试之间按指数退避并加随机抖动。每个主机有重试预算：每个请求存入 retry_budget 个令牌，
+    每次重试消耗一个，最多积累 budget_reserve 个，上游大面积故障时重试不会成倍放大流量。
+
+    开启对冲后，幂等请求超过该主机最近延迟的 hedge_percentile 分位（或固定的 hedge_after）仍未完成时，
+    用连接池中的另一个客户端再发一次，取先完成的结果，另一个在后台完成后归还连接池。
+
+    用法::
+
+        client = RetryClient(retries=3, hedge=True, timeout=10000, proxy="http://127.0.0.1:8888")
+        response = client.request("GET", "https://example.com/")
+        print(response.get_status_code(), client.stats())
+    """
+
+    def __init__(self, retries: int = 3, retry_statuses: Iterable[int] = RETRY_STATUSES,
+                 retry_errors: Union[bool, Iterable[str]] = True, backoff: float = 0.1, max_backoff: float = 5.0,
+                 retry_budget: float = 0.2, budget_reserve: float = 10.0, hedge: bool = False,
+                 hedge_after: Optional[float] = None, hedge_percentile: float = 95.0, hedge_min_samples: int = 20,
+                 hedge_methods: Iterable[str] = HEDGE_METHODS, pool: Optional[ClientPool] = None,
+                 max_workers: int = 32, timeout: Optional[int] = None, proxy: str = "", redirect: bool = True,
+                 http2_config: Optional[str] = None, random_tls: bool = False, out_router_ip: str = ""):
+        """
+        :param retries: 最多重试次数（不含第一次）。
+        :param retry_statuses: 需要重试的状态码。
+        :param retry_errors: 请求失败时是否重试；也可以是错误信息关键字列表，只重试包含关键字的错误。
+        :param backoff: 第一次重试的退避上限（秒），之后每次翻倍，实际等待时间在 0 到上限之间随机。
+        :param max_backoff: 退避上限的最大值（秒）。
+        :param retry_budget: 每个请求为所在主机存入的重试令牌数，0 表示只使用 budget_reserve。
+        :param budget_reserve: 每个主机最多积累的重试令牌数，也是初始令牌数。
+        :param hedge: 是否开启对冲请求。
+        :param hedge_after: 固定的对冲等待时间（毫秒），None 时使用最近延迟的 hedge_percentile 分位。
+        :param hedge_percentile: 对冲等待时间使用的延迟分位。
+        :param hedge_min_samples: 主机的延迟样本少于该数量时不对冲（hedge_after 为 None 时）。
+        :param hedge_methods: 允许对冲的请求方法，默认只对冲幂等请求。
+        :param pool: 客户端连接池，None 时创建一个。
+        :param max_workers: 对冲使用的线程池大小。
+        :param timeout: 单次尝试的超时时间（毫秒）。
+        :param proxy: 上游代理，格式同 SunnyHTTPClient.set_proxy。
+        :param redirect: 是否允许自动重定向。
+        :param http2_config: HTTP/2 指纹配置，请使用 tools.HTTP2_fp_Config_ 常量之一。
+        :param random_tls: 是否使用随机 TLS 指纹。
+        :param out_router_ip: 出口 IP。
+        """
+        if not isinstance(retries, int) or retries < 0:
+            raise ValueError("参数错误：retries 应为大于等于 0 的整数")
+        if backoff < 0 or max_backoff < 0:
+            raise ValueError("参数错误：backoff、max_backoff 不能小于 0")
+        self.__retries = retries
+        self.__retry_statuses = frozenset(retry_statuses)
+        if isinstance(retry_errors, bool):
+            self.__retry_errors = retry_errors
+        else:
+            self.__retry_errors = tuple(retry_errors)
+        self.__backoff = backoff
+        self.__max_backoff = max_backoff
+        self.__retry_budget = retry_budget
+        self.__budget_reserve = budget_reserve
+        self.__hedge = hedge
+        self.__hedge_after = hedge_after
+        self.__hedge_percentile = hedge_percentile
+        self.__hedge_min_samples = hedge_min_samples
+        self.__hedge_methods = frozenset(method.upper() for method in hedge_methods)
+        self.__pool = pool if pool is not None else ClientPool(max_idle=max_workers)
+        self.__config = dict(timeout=timeout, proxy=proxy, redirect=redirect, http2_config=http2_config,
+                             random_tls=random_tls, out_router_ip=out_router_ip)
+        self.__executor = ThreadPoolExecutor(max_workers, thread_name_prefix="SunnyNet-hedge") if hedge else None
+        self.__hosts = {}
+        self.__lock = threading.Lock()
+        self.__counters = {"requests": 0, "attempts": 0, "retries": 0, "budget_exhausted": 0,
+                           "hedges": 0, "hedge_wins": 0}
+
+    def __host(self, host: str) -> _HostState:
+        state = self.__hosts.get(host)
+        if state is None:
+            state = self.__hosts[host] = _HostState(self.__budget_reserve, max(self.__hedge_min_samples, 100))
+        return state
+
+    def __should_retry(self, response: ClientResponse) -> bool:
+        status_code = response.get_status_code()
+        if status_code > 0:
+            return status_code in self.__retry_statuses
+        if isinstance(self.__retry_errors, bool):
+            return self.__retry_errors
+        error = response.get_error()
+        return any(keyword in error for keyword in self.__retry_errors)
+
+    def __attempt(self, method: str, url: str, headers: list, data, state: _HostState) -> ClientResponse:
+        started = time.perf_counter()
+        with self.__pool.client(**self.__config) as client:
+            client.open(method, url)
+            for name, value in headers:
+                client.set_header(name, value)
+            response = client.send(data, snapshot=True)
+        if response.get_status_code() > 0:
+            with self.__lock:
+                state.latencies.append((time.perf_counter() - started) * 1000)
+        return response
+
+    def __hedge_delay(self, state: _HostState) -> Optional[float]:
+        """ 对冲等待时间（秒），样本不足时返回 None。 """
+        if self.__hedge_after is not None:
+            return self.__hedge_after / 1000
+        with self.__lock:
+            if len(state.latencies) < self.__hedge_min_samples:
+                return None
+            latencies = sorted(state.latencies)
+        return _percentile(latencies, self.__hedge_percentile) / 1000
+
+    def __hedged_attempt(self, method: str, url: str, headers: list, data, state: _HostState) -> ClientResponse:
+        delay = self.__hedge_delay(state)
+        if delay is None:
+            return self.__attempt(method, url, headers, data, state)
+        primary = self.__executor.submit(self.__attempt, method, url, headers, data, state)
+        done, _ = wait((primary,), timeout=delay)
+        if done:
+            return primary.result()
+        self.__count("hedges")
+        backup = self.__executor.submit(self.__attempt, method, url, headers, data, state)
+        futures = {primary, backup}
+        finished = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                finished = future
+                if future.result().get_status_code() > 0:
+                    if future is backup:
+                        self.__count("hedge_wins")
+                    return future.result()
+        # 两个都失败时返回失败的响应；都抛出异常时抛出第一个请求的异常
+        return (finished or primary).result()
+
+    def __count(self, name: str, value: int = 1) -> None:
+        with self.__lock:
+            self.__counters[name] += value
+
+    def request(self, method: str, url: str, headers: HeadersType = None, data=b"") -> ClientResponse:
+        """
+        发送请求，按策略重试和对冲。
+
+        :param method: 请求方法。
+        :param url: 完整 URL。
+        :param headers: 请求头，字典或 (名称, 值) 序列。
+        :param data: 请求数据，bytes 或字符串。
+        :return: 最后一次尝试的 ClientResponse。
+        """
+        if isinstance(headers, Mapping):
+            headers = list(headers.items())
+        else:
+            headers = list(headers or ())
+        hedge = self.__hedge and method.upper() in self.__hedge_methods
+        with self.__lock:
+            state = self.__host(_split_url(url)[0])
+            state.tokens = min(state.tokens + self.__retry_budget, self.__budget_reserve)
+            self.__counters["requests"] += 1
+        attempt = 0
+        while True:
+            self.__count("attempts")
+            if hedge:
+                response = self.__hedged_attempt(method, url, headers, data, state)
+            else:
+                response = self.__attempt(method, url, headers, data, state)
+            if attempt >= self.__retries or not self.__should_retry(response):
+                return response
+            with self.__lock:
+                if state.tokens < 1:
+                    self.__counters["budget_exhausted"] += 1
+                    return response
+                state.tokens -= 1
+                self.__counters["retries"] += 1
+            time.sleep(random.uniform(0, min(self.__max_backoff, self.__backoff * (2 ** attempt))))
+            attempt += 1
+
+    def get(self, url: str, headers: HeadersType = None) -> ClientResponse:
+        return self.request("GET", url, headers)
+
+    def post(self, url: str, data=b"", headers: HeadersType = None) -> ClientResponse:
+        return self.request("POST", url, headers, data)
+
+    def stats(self) -> dict:
+        """
+        获取计数。
+
+        :return: 包含 requests、attempts、retries、budget_exhausted、hedges、hedge_wins 的字典。
+        """
+        with self.__lock:
+            return dict(self.__counters)
+
+    def close(self) -> None:
+        """ 等待进行中的对冲请求结束并关闭线程池。 """
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
@@ -0,0 +1,356 @@
+import fnmatch
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from .Event import HTTPEvent
+from .FileBody import FileBody
+from .Router import _split_url
+
+PHASE_REQUEST = "request"
+PHASE_RESPONSE = "response"
+
+_BODY_ACTIONS = ("replace", "regex")
+_JSON_ACTIONS = ("json_set", "json_delete")
+_HEADER_ACTIONS = ("header_add", "header_set", "header_remove")
+_ACTIONS = _BODY_ACTIONS + _JSON_ACTIONS + _HEADER_ACTIONS + ("status",)
+
+# 作用于整个正则的内联标志，例如 (?i)
+_INLINE_FLAGS = re.compile(rb"\(\?[aiLmsux]+\)")
+
+
+def _as_list(value) -> Optional[list]:
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes, int)):
+        return [value]
+    return list(value)
+
+
+def _to_bytes(value: Union[str, bytes]) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else bytes(value)
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    """ 解析 JSON Pointer (RFC 6901)，例如 /data/0/name。 """
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError("参数错误：JSON Pointer 应以 / 开头：%s" % pointer)
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _json_parent(document, tokens: List[str]):
+    node = document
+    for token in tokens[:-1]:
+        if isinstance(node, dict):
+            node = node.get(token)
+        elif isinstance(node, list) and token.isdigit() and int(token) < len(node):
+            node = node[int(token)]
+        else:
+            return None
+        if node is None:
+            return None
+    return node
+
+
+def _json_set(document, tokens: List[str], value) -> bool:
+    parent = _json_parent(document, tokens)
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+        return True
+    if isinstance(parent, list):
+        if key == "-":
+            parent.append(value)
+            return True
+        if key.isdigit() and int(key) < len(parent):
+            parent[int(key)] = value
+            return True
+    return False
+
+
+def _json_delete(document, tokens: List[str]) -> bool:
+    parent = _json_parent(document, tokens)
+    key = tokens[-1]
+    if isinstance(parent, dict) and key in parent:
+        del parent[key]
+        return True
+    if isinstance(parent, list) and key.isdigit() and int(key) < len(parent):
+        del parent[int(key)]
+        return True
+    return False
+
+
+class _Scope:
+    """ 一组作用范围相同的规则，创建时编译为一个多模式正则和若干操作。 """
+
+    __slots__ = ("phase", "hosts", "paths", "methods", "content_types",
+                 "passes", "json_ops", "header_ops", "status")
+
+    def __init__(self, phase: str, hosts, paths, methods, content_types):
+        self.phase = phase
+        self.hosts = None if hosts is None else re.compile(
+            "|".join("(?:%s)" % fnmatch.translate(host.lower()) for host in hosts))
+        self.paths = None if paths is None else tuple(path.rstrip("/") for path in paths)
+        self.methods = None if methods is None else frozenset(method.upper() for method in methods)
+        self.content_types = None if content_types is None else tuple(value.lower() for value in content_types)
+        # [(正则, 替换模板或函数)]，按顺序执行
+        self.passes = []
+        self.json_ops = []
+        self.header_ops = []
+        self.status = None
+
+    def compile(self, body_rules: List[dict]) -> None:
+        """
+        编译 replace/regex 规则。
+
+        相邻的简单规则（replace，以及没有 flags、分组和内联标志的 regex）合并为一个正则，每条规则对应一个命名分组，
+        一次扫描完成替换；带 flags、分组（反向引用）或内联标志的 regex 单独编译为一步，保证语义不变。
+        各步按规则顺序依次执行。
+        """
+        parts = []
+        replacements = []
+        for rule in body_rules:
+            if rule["action"] == "replace":
+                regex = None
+                source = re.escape(_to_bytes(rule["find"]))
+            else:
+                regex = re.compile(_to_bytes(rule["pattern"]), rule.get("flags", 0))
+                source = regex.pattern
+                if rule.get("flags") or regex.groups or _INLINE_FLAGS.search(source):
+                    self.__merge(parts, replacements)
+                    parts, replacements = [], []
+                    self.passes.append((regex, _to_bytes(rule.get("with", b""))))
+                    continue
+            parts.append(b"(?P<_r%d>%s)" % (len(parts), source))
+            replacements.append((regex, _to_bytes(rule.get("with", b""))))
+        self.__merge(parts, replacements)
+
+    def __merge(self, parts: List[bytes], replacements: list) -> None:
+        if not parts:
+            return
+        if len(parts) == 1 and replacements[0][0] is not None:
+            self.passes.append(replacements[0])
+            return
+        pattern = re.compile(b"|".join(parts))
+
+        def substitute(match, replacements=replacements):
+            index = int(match.lastgroup[2:])
+            regex, replacement = replacements[index]
+            if regex is None:
+                return replacement
+            # 用单独编译的规则展开 \g<0> 等引用
+            own = regex.match(match.string, match.start(), match.end())
+            return own.expand(replacement) if own is not None else match.group()
+
+        self.passes.append((pattern, substitute))
+
+    def matches(self, phase: str, host: str, path: str, method: str, get_content_type: Callable[[], str]) -> bool:
+        if self.phase != phase:
+            return False
+        if self.methods is not None and method not in self.methods:
+            return False
+        if self.hosts is not None and self.hosts.match(host) is None:
+            return False
+        if self.paths is not None and not any(
+                not prefix or path == prefix or path.startswith(prefix + "/") for prefix in self.paths):
+            return False
+        if self.content_types is not None:
+            content_type = get_content_type().lower()
+            if not any(content_type.startswith(value) for value in self.content_types):
+                return False
+        return True
+
+class RewriteEngine:
+    """
+    声明式 Body 改写引擎
+
+    从 JSON/YAML 加载规则，创建时按作用范围（阶段、主机名、路径前缀、方法、Content-Type）分组编译，
+    同一范围内相邻的简单 replace/regex 规则合并为一个正则，一次扫描完成替换；带 flags、分组或内联标志的 regex 单独执行。
+    没有规则命中的 Body 不会被修改，也不会重新编码。
+
+    规则格式::
+
+        {
+          "rules": [
+            {"host": "*.example.com", "path": "/api", "content_type": "application/json",
+             "phase": "response", "action": "json_set", "pointer": "/data/vip", "value": true},
+            {"host": "www.example.com", "action": "replace", "find": "foo", "with": "bar"},
+            {"action": "regex", "pattern": "token=\\\\w+", "with": "token=***"},
+            {"action": "header_set", "name": "Cache-Control", "value": "no-store"},
+            {"action": "header_remove", "name": "Content-Security-Policy"},
+            {"path": "/ads", "action": "status", "code": 404}
+          ]
+        }
+
+    action 可选：replace、regex、json_set、json_delete、header_add、header_set、header_remove、status；
+    phase 可选 request / response，默认 response；host、path、methods、content_type 可以是字符串或列表。
+
+    用法::
+
+        engine = RewriteEngine.from_file("rules.yaml")
+        app.set_callback(http_callback=engine)
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]):
+        """
+        :param rules: 规则列表，格式见类说明。
+        """
+        groups = {}
+        for rule in rules:
+            if not isinstance(rule, dict):
+                raise TypeError("参数类型错误：规则应为字典")
+            action = rule.get("action")
+            if action not in _ACTIONS:
+                raise ValueError("参数错误：不支持的 action：%r" % (action,))
+            phase = rule.get("phase", PHASE_RESPONSE)
+            if phase not in (PHASE_REQUEST, PHASE_RESPONSE):
+                raise ValueError("参数错误：phase 应为 request 或 response")
+            if action == "status" and phase != PHASE_RESPONSE:
+                raise ValueError("参数错误：status 只能用于 response 阶段")
+            key = (phase,
+                   tuple(_as_list(rule.get("host")) or ()) or None,
+                   tuple(_as_list(rule.get("path")) or ()) or None,
+                   tuple(_as_list(rule.get("methods")) or ()) or None,
+                   tuple(_as_list(rule.get("content_type")) or ()) or None)
+            groups.setdefault(key, []).append(rule)
+        self.__scopes = []
+        for (phase, hosts, paths, methods, content_types), items in groups.items():
+            scope = _Scope(phase, hosts, paths, methods, content_types)
+            scope.compile([rule for rule in items if rule["action"] in _BODY_ACTIONS])
+            for rule in items:
+                action = rule["action"]
+                if action in _JSON_ACTIONS:
+                    scope.json_ops.append((action, _parse_pointer(rule["pointer"]), rule.get("value")))
+                elif action in _HEADER_ACTIONS:
+                    scope.header_ops.append((action, rule["name"], rule.get("value", "")))
+                elif action == "status":
+                    scope.status = int(rule["code"])
+            self.__scopes.append(scope)
+
+    @classmethod
+    def from_dict(cls, config: Union[Dict[str, Any], List[Dict[str, Any]]]) -> "RewriteEngine":
+        """ 从 {"rules": [...]} 或规则列表创建。 """
+        if isinstance(config, dict):
+            config = config.get("rules", [])
+        return cls(config)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RewriteEngine":
+        """
+        从文件加载规则，.yaml/.yml 需要安装 PyYAML，其余按 JSON 解析。
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            if path.lower().endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("加载 YAML 规则需要安装 PyYAML：pip install pyyaml")
+                config = yaml.safe_load(file)
+            else:
+                config = json.load(file)
+        return cls.from_dict(config or {})
+
+    def __len__(self) -> int:
+        return len(self.__scopes)
+
+    def apply(self, Conn: HTTPEvent) -> bool:
+        """
+        对事件应用规则。
+
+        :return: 有任何修改时返回 True。
+        """
+        event_type = Conn.get_event_type()
+        if event_type == HTTPEvent.EVENT_TYPE_REQUEST:
+            phase = PHASE_REQUEST
+            target = Conn.get_request()
+            get_headers = target.headers
+        elif event_type == HTTPEvent.EVENT_TYPE_RESPONSE:
+            phase = PHASE_RESPONSE
+            target = Conn.get_response()
+            get_headers = target.headers
+        else:
+            return False
+        host, path = _split_url(Conn.get_url())
+        method = Conn.get_method().upper()
+        content_type = lambda: get_headers().get("Content-Type", "")
+        scopes = [scope for scope in self.__scopes if scope.matches(phase, host, path, method, content_type)]
+        if not scopes:
+            return False
+
+        changed = False
+        body = None
+        body_changed = False
+        encoded = False
+        for scope in scopes:
+            if scope.passes or scope.json_ops:
+                if body is None:
+                    body, encoded = self.__read_body(phase, target, get_headers)
+                for pattern, replacement in scope.passes:
+                    new_body, count = pattern.subn(replacement, body)
+                    if count:
+                        body = new_body
+                        body_changed = True
+                if scope.json_ops:
+                    new_body = self.__apply_json(body, scope.json_ops)
+                    if new_body is not None:
+                        body = new_body
+                        body_changed = True
+            if scope.header_ops:
+                headers = get_headers()
+                for action, name, value in scope.header_ops:
+                    if action == "header_add":
+                        headers.add(name, value)
+                    elif action == "header_set":
+                        headers.set(name, value)
+                    else:
+                        headers.remove(name)
+                changed = True
+            if scope.status is not None:
+                target.set_status_code(scope.status)
+                changed = True
+        if body_changed:
+            if encoded:
+                # 写回的是解压后的数据，去掉压缩标记
+                get_headers().remove("Content-Encoding")
+            # 协议头修改先写回，再写入 Body，避免压缩标记和新 Body 不一致
+            target.flush_headers()
+            target.set_body(body)
+            changed = True
+        return changed
+
+    @staticmethod
+    def __read_body(phase: str, target, get_headers):
+        """ 读取用于匹配的 Body，响应有压缩时读取解压后的数据。 """
+        if phase == PHASE_RESPONSE and get_headers().get("Content-Encoding"):
+            body = target.body_auto()
+            # 解压失败时 body_auto 返回原始数据
+            encoded = body is not target.body()
+        else:
+            body = target.body()
+            encoded = False
+        if isinstance(body, FileBody):
+            body = body.tobytes()
+        return body, encoded
+
+    @staticmethod
+    def __apply_json(body: bytes, operations) -> Optional[bytes]:
+        try:
+            document = json.loads(body)
+        except ValueError:
+            return None
+        changed = False
+        for action, tokens, value in operations:
+            if not tokens:
+                continue
+            if action == "json_set":
+                changed = _json_set(document, tokens, value) or changed
+            else:
+                changed = _json_delete(document, tokens) or changed
+        if not changed:
+            return None
+        return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def __call__(self, Conn: HTTPEvent) -> None:
+        self.apply(Conn)
@@ -0,0 +1,201 @@
+from typing import Callable, Iterable, Optional
+
+from .Event import HTTPEvent
+
+
+class _HostNode:
+    """ 主机名字典树节点，按反转后的域名标签逐级存放，例如 www.example.com -> com/example/www。 """
+
+    __slots__ = ("children", "wildcard", "paths")
+
+    def __init__(self):
+        self.children = {}
+        self.wildcard = None
+        self.paths = None
+
+
+class _PathNode:
+    """ 路径前缀树节点，按 / 分隔的路径段逐级存放。 """
+
+    __slots__ = ("children", "handlers")
+
+    def __init__(self):
+        self.children = {}
+        self.handlers = None
+
+
+def _split_url(url: str):
+    """ 把 URL 拆分为 (主机名, 路径)，主机名已转为小写并去掉端口。 """
+    start = url.find("://")
+    start = 0 if start < 0 else start + 3
+    end = len(url)
+    for sep in "/?#":
+        pos = url.find(sep, start, end)
+        if pos >= 0:
+            end = pos
+    host = url[start:end]
+    at = host.rfind("@")
+    if at >= 0:
+        host = host[at + 1:]
+    if host.startswith("["):
+        host = host[1:].split("]", 1)[0]
+    else:
+        host = host.split(":", 1)[0]
+    path = url[end:]
+    for sep in "?#":
+        pos = path.find(sep)
+        if pos >= 0:
+            path = path[:pos]
+    return host.lower(), path or "/"
+
+
+def _path_segments(path: str):
+    return [segment for segment in path.split("/") if segment]
+
+
+class Router:
+    """
+    HTTP 路由
+
+    按主机名（支持 *.example.com 通配子域名）、路径前缀和请求方法登记多个回调，
+    主机名存放在反转标签字典树中，路径存放在路径段前缀树中，
+    查找耗时只与 URL 长度有关，与路由数量无关。
+
+    精确主机名优先于通配主机名，更长的路径前缀优先于更短的前缀，
+    指定了方法/事件类型的路由优先于未指定的路由。
+
+    用法::
+
+        router = Router()
+
+        @router.route("api.example.com", "/v1/users", methods=["POST"])
+        def users(Conn: HTTPEvent): ...
+
+        app.set_callback(http_callback=router)
+    """
+
+    def __init__(self, default: Optional[Callable[[HTTPEvent], None]] = None):
+        """
+        :param default: 没有匹配路由时调用的回调，None 表示不处理。
+        """
+        self.__root = _HostNode()
+        self.__default = default
+
+    def add(self, host: Optional[str], path: str, handler: Callable[[HTTPEvent], None],
+            methods: Iterable[str] = None, event_types: Iterable[int] = None) -> None:
+        """
+        登记路由。
+
+        :param host: 主机名，例如 www.example.com、*.example.com；None 或 "*" 表示任意主机。
+        :param path: 路径前缀，按路径段匹配，例如 /api 匹配 /api 和 /api/x，不匹配 /apix。
+        :param handler: 回调函数，接收一个 HTTPEvent 参数。
+        :param methods: 请求方法，例如 ["GET", "POST"]；None 表示任意方法。
+        :param event_types: 事件类型，请使用 HTTPEvent.EVENT_TYPE_ 常量；None 表示全部。
+        """
+        if not callable(handler):
+            raise TypeError("参数类型错误：handler 应为函数")
+        if host is not None and not isinstance(host, str):
+            raise TypeError("参数类型错误：host 应为字符串")
+        if not isinstance(path, str):
+            raise TypeError("参数类型错误：path 应为字符串")
+        node = self.__root
+        if host is not None and host != "*":
+            labels = host.lower().strip(".").split(".")
+            wildcard = labels[0] == "*"
+            if wildcard:
+                labels = labels[1:]
+            for label in reversed(labels):
+                node = node.children.setdefault(label, _HostNode())
+            if wildcard:
+                if node.wildcard is None:
+                    node.wildcard = _HostNode()
+                node = node.wildcard
+        elif node.wildcard is None:
+            node.wildcard = _HostNode()
+            node = node.wildcard
+        else:
+            node = node.wildcard
+        if node.paths is None:
+            node.paths = _PathNode()
+        path_node = node.paths
+        for segment in _path_segments(path):
+            path_node = path_node.children.setdefault(segment, _PathNode())
+        if path_node.handlers is None:
+            path_node.handlers = {}
+        method_keys = [None] if methods is None else [m.upper() for m in ([methods] if isinstance(methods, str) else methods)]
+        type_keys = [None] if event_types is None else ([event_types] if isinstance(event_types, int) else list(event_types))
+        for method in method_keys:
+            for event_type in type_keys:
+                path_node.handlers[(method, event_type)] = handler
+
+    def route(self, host: Optional[str], path: str = "/", methods: Iterable[str] = None,
+              event_types: Iterable[int] = None) -> Callable:
+        """ add 的装饰器形式。 """
+
+        def decorator(handler):
+            self.add(host, path, handler, methods, event_types)
+            return handler
+
+        return decorator
+
+    def __host_candidates(self, host: str):
+        """ 返回匹配主机名的节点，越具体的越靠前。 """
+        candidates = []
+        node = self.__root
+        if node.wildcard is not None:
+            candidates.append(node.wildcard)
+        labels = host.split(".")
+        for index in range(len(labels) - 1, -1, -1):
+            node = node.children.get(labels[index])
+            if node is None:
+                break
+            # *.example.com 只匹配子域名，至少还剩一个标签
+            if index > 0 and node.wildcard is not None:
+                candidates.append(node.wildcard)
+            if index == 0:
+                candidates.append(node)
+        candidates.reverse()
+        return candidates
+
+    @staticmethod
+    def __lookup_path(root: _PathNode, segments, method: str, event_type: int):
+        matched = []
+        node = root
+        if node.handlers is not None:
+            matched.append(node.handlers)
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.handlers is not None:
+                matched.append(node.handlers)
+        for handlers in reversed(matched):
+            handler = (handlers.get((method, event_type)) or handlers.get((method, None))
+                       or handlers.get((None, event_type)) or handlers.get((None, None)))
+            if handler is not None:
+                return handler
+        return None
+
+    def match(self, url: str, method: str = "GET", event_type: int = None) -> Optional[Callable]:
+        """
+        查找 URL 对应的回调。
+
+        :return: 回调函数；没有匹配时返回默认回调（可能为 None）。
+        """
+        host, path = _split_url(url)
+        segments = None
+        method = method.upper()
+        for node in self.__host_candidates(host):
+            if node.paths is None:
+                continue
+            if segments is None:
+                segments = _path_segments(path)
+            handler = self.__lookup_path(node.paths, segments, method, event_type)
+            if handler is not None:
+                return handler
+        return self.__default
+
+    def __call__(self, Conn: HTTPEvent) -> None:
+        handler = self.match(Conn.get_url(), Conn.get_method(), Conn.get_event_type())
+        if handler is not None:
+            handler(Conn)
@@ -0,0 +1,432 @@
+import fnmatch
+import json
+import mmap
+import os
+import queue
+import re
+import struct
+import threading
+import zlib
+from typing import Iterator, List, Optional, Tuple, Union
+
+from .Dispatch import EventSnapshot
+from .FileBody import FileBody
+from .Router import _split_url
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_CODEC_NONE = 0
+_CODEC_ZLIB = 1
+_CODEC_ZSTD = 2
+
+# 数据块头：压缩后长度、原始长度、压缩方式
+_BLOCK_HEADER = struct.Struct("<IIB")
+_U32 = struct.Struct("<I")
+
+# 索引中每条记录的字段顺序
+_ROW_TIME, _ROW_KIND, _ROW_HOST, _ROW_PID, _ROW_STATUS, _ROW_THEOLOGY, _ROW_EVENT = range(7)
+
+
+def _record_host(snapshot: EventSnapshot) -> str:
+    if snapshot.kind in (EventSnapshot.KIND_HTTP, EventSnapshot.KIND_WEBSOCKET):
+        return _split_url(snapshot.get_url())[0]
+    address = snapshot.get_remote_addr()
+    if address.startswith("["):
+        return address[1:].split("]", 1)[0]
+    return address.rsplit(":", 1)[0] if address.count(":") == 1 else address
+
+
+def _encode_record(snapshot: EventSnapshot) -> bytes:
+    """ 记录格式：u32 元数据长度 + 元数据 JSON + 依次每个二进制字段（u32 长度 + 数据）。 """
+    meta = {}
+    blobs = []
+    for name, value in snapshot.fields.items():
+        if isinstance(value, FileBody):
+            # Response.SPILL_THRESHOLD 生效时响应体是 FileBody，直接写入映射的数据
+            blobs.append((name, value.mmap))
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            blobs.append((name, bytes(value)))
+        else:
+            meta[name] = value
+    meta["_kind"] = snapshot.kind
+    meta["_blobs"] = [name for name, _ in blobs]
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    parts = [_U32.pack(len(meta_bytes)), meta_bytes]
+    for _, value in blobs:
+        parts.append(_U32.pack(len(value)))
+        parts.append(value)
+    return b"".join(parts)
+
+
+def _decode_record(data: memoryview) -> EventSnapshot:
+    meta_length = _U32.unpack_from(data, 0)[0]
+    offset = 4 + meta_length
+    meta = json.loads(bytes(data[4:offset]))
+    kind = meta.pop("_kind")
+    for name in meta.pop("_blobs"):
+        length = _U32.unpack_from(data, offset)[0]
+        offset += 4
+        meta[name] = bytes(data[offset:offset + length])
+        offset += length
+    return EventSnapshot(kind, meta)
+
+
+class TrafficStore:
+    """
+    分段二进制流量存储
+
+    接收 HTTP/TCP/UDP/WebSocket 四种事件，回调线程只复制快照并入队，由后台线程写入。
+    记录带长度前缀，按数据块压缩后追加写入分段文件（seg-000001.dat），
+    每个数据块在旁路索引（seg-000001.idx）中记录偏移、时间范围以及每条记录的时间戳、主机、PID、状态码和 TheologyID。
+    读取请使用 TrafficReader。
+
+    用法::
+
+        store = TrafficStore("./traffic")
+        app.set_callback(http_callback=store, tcp_callback=store, ws_callback=store, udp_callback=store)
+        ...
+        store.close()
+    """
+
+    def __init__(self, directory: str, block_size: int = 256 * 1024, segment_size: int = 256 * 1024 * 1024,
+                 compress: Optional[str] = "zlib", capture_body: bool = True, max_queue: int = 10000,
+                 flush_interval: float = 1.0):
+        """
+        :param directory: 存储目录。
+        :param block_size: 数据块压缩前的大小，越大压缩率越高，查询时解压的数据也越多。
+        :param segment_size: 单个分段文件的最大字节数。
+        :param compress: None、"zlib" 或 "zstd"（需要安装 zstandard）。
+        :param capture_body: 是否保存请求/响应/消息数据。
+        :param max_queue: 队列最大长度，队列已满时丢弃新的快照。
+        :param flush_interval: 空闲时把未满的数据块写入磁盘的间隔（秒）。
+        """
+        if compress not in (None, "zlib", "zstd"):
+            raise ValueError("参数错误：compress 应为 None、zlib 或 zstd")
+        if compress == "zstd" and zstandard is None:
+            raise ImportError("zstd 压缩需要安装 zstandard：pip install zstandard")
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__block_size = block_size
+        self.__segment_size = segment_size
+        self.__codec = {None: _CODEC_NONE, "zlib": _CODEC_ZLIB, "zstd": _CODEC_ZSTD}[compress]
+        self.__compressor = zstandard.ZstdCompressor() if compress == "zstd" else None
+        self.__capture_body = capture_body
+        self.__flush_interval = flush_interval
+        self.__queue = queue.Queue(max_queue)
+        self.__lock = threading.Lock()
+        self.__counters = {"captured": 0, "dropped": 0, "written": 0, "failed": 0, "blocks": 0}
+        self.__records = []
+        self.__rows = []
+        self.__buffered = 0
+        self.__segment = None
+        self.__index = None
+        self.__segment_number = max([int(name[4:10]) for name in os.listdir(directory)
+                                     if name.startswith("seg-") and name.endswith(".dat")] or [0])
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, name="SunnyNet-store", daemon=True)
+        self.__thread.start()
+
+    def __call__(self, Conn) -> None:
+        if self.__closed:
+            return
+        try:
+            snapshot = EventSnapshot.capture(Conn, self.__capture_body)
+        except Exception:
+            return
+        try:
+            self.__queue.put_nowait(snapshot)
+        except queue.Full:
+            self.__count("dropped")
+            return
+        self.__count("captured")
+
+    def append(self, snapshot: EventSnapshot) -> None:
+        """ 直接写入一个快照（例如从其他来源导入）。 """
+        self.__queue.put(snapshot)
+        self.__count("captured")
+
+    def __count(self, name: str, value: int = 1) -> None:
+        with self.__lock:
+            self.__counters[name] += value
+
+    def stats(self) -> dict:
+        """
+        获取计数。
+
+        :return: 包含 captured、dropped、written、failed（编码或写入失败）、blocks、queued 的字典。
+        """
+        with self.__lock:
+            stats = dict(self.__counters)
+        stats["queued"] = self.__queue.qsize()
+        return stats
+
+    def close(self, wait: bool = True) -> None:
+        """
+        停止写入并关闭文件。
+
+        :param wait: 是否等待队列中的快照全部写入。
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__queue.put(None)
+        if wait:
+            self.__thread.join()
+
+    def __run(self) -> None:
+        while True:
+            try:
+                snapshot = self.__queue.get(timeout=self.__flush_interval)
+            except queue.Empty:
+                self.__flush_block()
+                continue
+            if snapshot is None:
+                break
+            try:
+                self.__add(snapshot)
+            except Exception:
+                self.__count("failed")
+        self.__flush_block()
+        if self.__segment is not None:
+            self.__segment.close()
+            self.__index.close()
+
+    def __add(self, snapshot: EventSnapshot) -> None:
+        record = _encode_record(snapshot)
+        self.__records.append(_U32.pack(len(record)))
+        self.__records.append(record)
+        self.__rows.append([
+            snapshot.get_timestamp(),
+            snapshot.kind,
+            _record_host(snapshot),
+            snapshot.get_pid(),
+            snapshot.get_status_code(),
+            snapshot.get_theology_id(),
+            snapshot.get_event_type(),
+        ])
+        self.__buffered += 4 + len(record)
+        if self.__buffered >= self.__block_size:
+            self.__flush_block()
+
+    def __open_segment(self) -> None:
+        if self.__segment is not None:
+            self.__segment.close()
+            self.__index.close()
+        self.__segment_number += 1
+        base = os.path.join(self.__directory, "seg-%06d" % self.__segment_number)
+        self.__segment = open(base + ".dat", "ab")
+        self.__index = open(base + ".idx", "a", encoding="utf-8")
+
+    def __flush_block(self) -> None:
+        if not self.__rows:
+            return
+        raw = b"".join(self.__records)
+        if self.__codec == _CODEC_ZLIB:
+            data = zlib.compress(raw, 6)
+        elif self.__codec == _CODEC_ZSTD:
+            data = self.__compressor.compress(raw)
+        else:
+            data = raw
+        if self.__segment is None or self.__segment.tell() + len(data) > self.__segment_size:
+            self.__open_segment()
+        offset = self.__segment.tell()
+        self.__segment.write(_BLOCK_HEADER.pack(len(data), len(raw), self.__codec))
+        self.__segment.write(data)
+        self.__segment.flush()
+        times = [row[_ROW_TIME] for row in self.__rows]
+        # 索引在数据写入后再追加，读取方只会看到完整的数据块
+        self.__index.write(json.dumps({
+            "offset": offset,
+            "length": _BLOCK_HEADER.size + len(data),
+            "t0": min(times),
+            "t1": max(times),
+            "rows": self.__rows,
+        }, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.__index.flush()
+        self.__count("written", len(self.__rows))
+        self.__count("blocks")
+        self.__records = []
+        self.__rows = []
+        self.__buffered = 0
+
+
+class _Segment:
+    """ 一个分段文件的索引和 mmap。 """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.blocks = []
+        self.index_offset = 0
+        self.file = None
+        self.mmap = None
+
+    def refresh(self) -> None:
+        """ 读取索引中新增的数据块。 """
+        with open(self.path + ".idx", "r", encoding="utf-8") as file:
+            file.seek(self.index_offset)
+            while True:
+                line = file.readline()
+                if not line.endswith("\n"):
+                    break
+                self.index_offset = file.tell()
+                block = json.loads(line)
+                hosts = {row[_ROW_HOST] for row in block["rows"]}
+                pids = {row[_ROW_PID] for row in block["rows"]}
+                statuses = [row[_ROW_STATUS] for row in block["rows"]]
+                self.blocks.append((block, hosts, pids, min(statuses), max(statuses)))
+
+    def view(self, offset: int, length: int) -> memoryview:
+        if self.mmap is None or offset + length > len(self.mmap):
+            self.close()
+            self.file = open(self.path + ".dat", "rb")
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self.mmap)[offset:offset + length]
+
+    def close(self) -> None:
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:
+                # 仍有记录引用该 mmap 时由垃圾回收释放
+                pass
+            self.mmap = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class TrafficReader:
+    """
+    TrafficStore 的读取器
+
+    索引常驻内存，数据文件通过 mmap 访问。查询先按数据块的时间范围、主机、PID、状态码跳过不相关的块，
+    再按每条记录的索引筛选，只解压包含匹配记录的数据块，只解码匹配的记录。
+
+    用法::
+
+        reader = TrafficReader("./traffic")
+        for record in reader.query(host="api.example.com", status=(500, 599), start=t1, end=t2):
+            print(record.get_url(), record.get_status_code())
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: TrafficStore 的存储目录。
+        """
+        self.__directory = directory
+        self.__segments = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """ 加载新增的分段和数据块（存储仍在写入时可以重复调用）。 """
+        for name in sorted(os.listdir(self.__directory)):
+            if not (name.startswith("seg-") and name.endswith(".idx")):
+                continue
+            base = os.path.join(self.__directory, name[:-4])
+            segment = self.__segments.get(base)
+            if segment is None:
+                segment = self.__segments[base] = _Segment(base)
+            segment.refresh()
+
+    def __len__(self) -> int:
+        return sum(len(block[0]["rows"]) for segment in self.__segments.values() for block in segment.blocks)
+
+    def query(self, start: float = None, end: float = None, host: str = None, pid: int = None,
+              status: Union[int, Tuple[int, int]] = None, kind: str = None, theology_id: int = None,
+              event_type: int = None) -> Iterator[EventSnapshot]:
+        """
+        查询记录，条件之间为“且”，未设置的条件不限制。
+
+        :param start: 起始时间戳（含）。
+        :param end: 结束时间戳（含）。
+        :param host: 主机名，可以使用通配符，例如 *.example.com；TCP/UDP 为远程 IP。
+        :param pid: 进程 PID。
+        :param status: HTTP 状态码，或 (最小值, 最大值) 范围，例如 (500, 599)。
+        :param kind: EventSnapshot.KIND_ 常量之一。
+        :param theology_id: 唯一 ID。
+        :param event_type: 事件类型，对应事件类的 EVENT_TYPE_ 常量。
+        :return: 按写入顺序返回匹配的 EventSnapshot。
+        """
+        if isinstance(status, int):
+            status = (status, status)
+        host_pattern = None
+        if host is not None:
+            host = host.lower()
+            if any(char in host for char in "*?["):
+                host_pattern = re.compile(fnmatch.translate(host))
+        for segment in self.__segments.values():
+            for block, hosts, pids, status_min, status_max in segment.blocks:
+                if start is not None and block["t1"] < start:
+                    continue
+                if end is not None and block["t0"] > end:
+                    continue
+                if pid is not None and pid not in pids:
+                    continue
+                if status is not None and (status_max < status[0] or status_min > status[1]):
+                    continue
+                if host is not None:
+                    if host_pattern is None:
+                        if host not in hosts:
+                            continue
+                    elif not any(host_pattern.match(item) for item in hosts):
+                        continue
+                matched = []
+                for position, row in enumerate(block["rows"]):
+                    if start is not None and row[_ROW_TIME] < start:
+                        continue
+                    if end is not None and row[_ROW_TIME] > end:
+                        continue
+                    if pid is not None and row[_ROW_PID] != pid:
+                        continue
+                    if status is not None and not status[0] <= row[_ROW_STATUS] <= status[1]:
+                        continue
+                    if kind is not None and row[_ROW_KIND] != kind:
+                        continue
+                    if theology_id is not None and row[_ROW_THEOLOGY] != theology_id:
+                        continue
+                    if event_type is not None and row[_ROW_EVENT] != event_type:
+                        continue
+                    if host is not None:
+                        if host_pattern is None and row[_ROW_HOST] != host:
+                            continue
+                        if host_pattern is not None and host_pattern.match(row[_ROW_HOST]) is None:
+                            continue
+                    matched.append(position)
+                if matched:
+                    yield from self.__read_block(segment, block, matched)
+
+    def get(self, theology_id: int) -> List[EventSnapshot]:
+        """ 获取同一个 TheologyID 的全部记录（例如同一请求的请求、响应事件）。 """
+        return list(self.query(theology_id=theology_id))
+
+    @staticmethod
+    def __read_block(segment: _Segment, block: dict, positions: List[int]) -> Iterator[EventSnapshot]:
+        view = segment.view(block["offset"], block["length"])
+        compressed_length, raw_length, codec = _BLOCK_HEADER.unpack_from(view, 0)
+        data = view[_BLOCK_HEADER.size:_BLOCK_HEADER.size + compressed_length]
+        if codec == _CODEC_ZLIB:
+            data = memoryview(zlib.decompress(data))
+        elif codec == _CODEC_ZSTD:
+            data = memoryview(zstandard.ZstdDecompressor().decompress(data, max_output_size=raw_length))
+        wanted = set(positions)
+        offset = 0
+        for position in range(positions[-1] + 1):
+            length = _U32.unpack_from(data, offset)[0]
+            if position in wanted:
+                yield _decode_record(data[offset + 4:offset + 4 + length])
+            offset += 4 + length
+        view.release()
+
+    def close(self) -> None:
+        """ 关闭全部 mmap。 """
+        for segment in self.__segments.values():
+            segment.close()
+
+    def __enter__(self) -> "TrafficReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
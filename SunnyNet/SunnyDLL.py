@@ -3,6 +3,7 @@
 import struct
 import ctypes
 from ctypes import *
+import mmap
 import os
 import sys
 import platform
@@ -193,9 +194,184 @@ def _load_library():
         return False
 
 
-# 这个类 是动态加载DLL时 设置返回值为指针
+# Go 导出函数的参数/返回值类型 (Go 的 int 与指针同宽, 32位环境下为 c_int)
+_GoInt = c_int64 if __RuntimeEnvironment else c_int
+_GoPtr = c_void_p
+_GoBool = c_bool
+
+# 导出函数原型表 函数名: (返回值类型, (参数类型, ...))
+# 按 windows/SunnyNet64.h 中的 C 导出函数声明填写 (Java_com_SunnyNet_api_ 开头的是 JNI 入口, 不使用)
+# char* 对应 c_char_p (调用方传入编码后的 bytes 或 create_string_buffer, 传入 str 会直接报错), GoInt64 固定为 c_int64
+# 回调函数在 .h 中声明为 GoInt, 这里用 _GoPtr 以便直接传入 CFUNCTYPE 对象, 两者宽度相同
+# 返回值为 None 表示无返回值, 参数表以外多传入的参数按 ctypes 默认规则转换
+_PROTOTYPES = {
+    # 基础
+    "Free": (None, (_GoPtr,)),
+    "GetSunnyVersion": (_GoPtr, ()),
+    # SunnyNet 中间件
+    "CreateSunnyNet": (_GoInt, ()),
+    "ReleaseSunnyNet": (_GoBool, (_GoInt,)),
+    "SunnyNetStart": (_GoBool, (_GoInt,)),
+    "SunnyNetSetPort": (_GoBool, (_GoInt, _GoInt)),
+    "SunnyNetClose": (_GoBool, (_GoInt,)),
+    "SunnyNetSetCert": (_GoBool, (_GoInt, _GoInt)),
+    "SunnyNetInstallCert": (_GoPtr, (_GoInt,)),
+    "SunnyNetSetCallback": (_GoBool, (_GoInt, _GoPtr, _GoPtr, _GoPtr, _GoPtr)),
+    "SetScriptCall": (None, (_GoInt, _GoPtr, _GoPtr)),
+    "SetScriptPage": (_GoPtr, (_GoInt, c_char_p)),
+    "SunnyNetSocket5AddUser": (_GoBool, (_GoInt, c_char_p, c_char_p)),
+    "SunnyNetVerifyUser": (_GoBool, (_GoInt, _GoBool)),
+    "SunnyNetSocket5DelUser": (_GoBool, (_GoInt, c_char_p)),
+    "SunnyNetGetSocket5User": (_GoPtr, (_GoInt,)),
+    "SunnyNetMustTcp": (None, (_GoInt, _GoBool)),
+    "SunnyNetError": (_GoPtr, (_GoInt,)),
+    "CompileProxyRegexp": (_GoBool, (_GoInt, c_char_p)),
+    "SetMustTcpRegexp": (_GoBool, (_GoInt, c_char_p, _GoBool)),
+    "SetGlobalProxy": (_GoBool, (_GoInt, c_char_p, _GoInt)),
+    "ExportCert": (_GoPtr, (_GoInt,)),
+    "SetHTTPRequestMaxUpdateLength": (_GoBool, (_GoInt, c_int64)),
+    "CancelIEProxy": (_GoBool, (_GoInt,)),
+    "SetIeProxy": (_GoBool, (_GoInt,)),
+    "SetRandomTLS": (_GoBool, (_GoInt, _GoBool)),
+    "SetOutRouterIP": (_GoBool, (_GoInt, c_char_p)),
+    "SetDnsServer": (None, (c_char_p,)),
+    "DisableTCP": (_GoBool, (_GoInt, _GoBool)),
+    "DisableUDP": (_GoBool, (_GoInt, _GoBool)),
+    "OpenDrive": (_GoBool, (_GoInt, _GoBool)),
+    "UnDrive": (None, (_GoInt,)),
+    "ProcessAddName": (None, (_GoInt, c_char_p)),
+    "ProcessDelName": (None, (_GoInt, c_char_p)),
+    "ProcessAddPid": (None, (_GoInt, _GoInt)),
+    "ProcessDelPid": (None, (_GoInt, _GoInt)),
+    "ProcessALLName": (None, (_GoInt, _GoBool, _GoBool)),
+    "ProcessCancelAll": (None, (_GoInt,)),
+    "AddHttpCertificate": (_GoBool, (c_char_p, _GoInt, _GoInt)),
+    "DelHttpCertificate": (None, (c_char_p,)),
+    # HTTP 请求
+    "RawRequestDataToFile": (_GoBool, (_GoInt, _GoPtr, _GoInt)),
+    "IsRequestRawBody": (_GoBool, (_GoInt,)),
+    "GetRequestBodyLen": (_GoInt, (_GoInt,)),
+    "GetRequestBody": (_GoPtr, (_GoInt,)),
+    "SetRequestData": (_GoBool, (_GoInt, _GoPtr, _GoInt)),
+    "SetRequestOutTime": (None, (_GoInt, _GoInt)),
+    "SetRequestHTTP2Config": (_GoBool, (_GoInt, c_char_p)),
+    "RandomRequestCipherSuites": (_GoBool, (_GoInt,)),
+    "SetRequestProxy": (_GoBool, (_GoInt, c_char_p, _GoInt)),
+    "SetRequestALLHeader": (None, (_GoInt, c_char_p)),
+    "SetRequestAllCookie": (None, (_GoInt, c_char_p)),
+    "SetRequestHeader": (None, (_GoInt, c_char_p, c_char_p)),
+    "SetRequestUrl": (_GoBool, (_GoInt, c_char_p)),
+    "SetRequestCookie": (None, (_GoInt, c_char_p, c_char_p)),
+    "DelRequestHeader": (None, (_GoInt, c_char_p)),
+    "GetRequestAllHeader": (_GoPtr, (_GoInt,)),
+    "GetRequestHeader": (_GoPtr, (_GoInt, c_char_p)),
+    "GetRequestProto": (_GoPtr, (_GoInt,)),
+    "GetRequestALLCookie": (_GoPtr, (_GoInt,)),
+    "GetRequestCookie": (_GoPtr, (_GoInt, c_char_p)),
+    "GetRequestClientIp": (_GoPtr, (_GoInt,)),
+    "RequestSetOutRouterIP": (_GoBool, (_GoInt, c_char_p)),
+    # HTTP 响应
+    "SetResponseStatus": (None, (_GoInt, _GoInt)),
+    "GetResponseStatusCode": (_GoInt, (_GoInt,)),
+    "GetResponseStatus": (_GoPtr, (_GoInt,)),
+    "GetResponseServerAddress": (_GoPtr, (_GoInt,)),
+    "GetResponseBodyLen": (_GoInt, (_GoInt,)),
+    "GetResponseBody": (_GoPtr, (_GoInt,)),
+    "SetResponseData": (_GoBool, (_GoInt, _GoPtr, _GoInt)),
+    "SetResponseHeader": (None, (_GoInt, c_char_p, c_char_p)),
+    "SetResponseAllHeader": (None, (_GoInt, c_char_p)),
+    "DelResponseHeader": (None, (_GoInt, c_char_p)),
+    "GetResponseAllHeader": (_GoPtr, (_GoInt,)),
+    "GetResponseHeader": (_GoPtr, (_GoInt, c_char_p)),
+    # TCP / UDP / WebSocket
+    "SetTcpAgent": (_GoBool, (_GoInt, c_char_p, _GoInt)),
+    "SetTcpConnectionIP": (_GoBool, (_GoInt, c_char_p)),
+    "SetTcpBody": (_GoBool, (_GoInt, _GoInt, _GoPtr, _GoInt)),
+    "TcpSendMsg": (_GoInt, (_GoInt, _GoPtr, _GoInt)),
+    "TcpSendMsgClient": (_GoInt, (_GoInt, _GoPtr, _GoInt)),
+    "TcpCloseClient": (_GoBool, (_GoInt,)),
+    "GetUdpData": (_GoPtr, (_GoInt,)),
+    "SetUdpData": (_GoBool, (_GoInt, _GoPtr, _GoInt)),
+    "UdpSendToServer": (_GoBool, (_GoInt, _GoPtr, _GoInt)),
+    "UdpSendToClient": (_GoBool, (_GoInt, _GoPtr, _GoInt)),
+    "GetWebsocketBodyLen": (_GoInt, (_GoInt,)),
+    "GetWebsocketBody": (_GoPtr, (_GoInt,)),
+    "SetWebsocketBody": (_GoBool, (_GoInt, _GoPtr, _GoInt)),
+    "SendWebsocketBody": (_GoBool, (_GoInt, _GoInt, _GoPtr, _GoInt)),
+    "SendWebsocketClientBody": (_GoBool, (_GoInt, _GoInt, _GoPtr, _GoInt)),
+    "CloseWebsocket": (_GoBool, (_GoInt,)),
+    # HTTP 客户端
+    "CreateHTTPClient": (_GoInt, ()),
+    "RemoveHTTPClient": (None, (_GoInt,)),
+    # 随包的 .h 文件中没有该函数，按旧版本库的行为声明
+    "HTTPClientGetErr": (_GoPtr, (_GoInt,)),
+    "HTTPOpen": (None, (_GoInt, c_char_p, c_char_p)),
+    "HTTPSetHeader": (None, (_GoInt, c_char_p, c_char_p)),
+    "HTTPSetProxyIP": (_GoBool, (_GoInt, c_char_p)),
+    "HTTPSetTimeouts": (None, (_GoInt, _GoInt)),
+    "HTTPSetServerIP": (None, (_GoInt, c_char_p)),
+    "HTTPSetRedirect": (_GoBool, (_GoInt, _GoBool)),
+    "HTTPSetRandomTLS": (_GoBool, (_GoInt, _GoBool)),
+    "HTTPSetH2Config": (_GoBool, (_GoInt, c_char_p)),
+    "HTTPSetOutRouterIP": (_GoBool, (_GoInt, c_char_p)),
+    "HTTPSendBin": (None, (_GoInt, _GoPtr, _GoInt)),
+    "HTTPGetRequestHeader": (_GoPtr, (_GoInt,)),
+    "HTTPGetBodyLen": (_GoInt, (_GoInt,)),
+    "HTTPGetBody": (_GoPtr, (_GoInt,)),
+    "HTTPGetHeads": (_GoPtr, (_GoInt,)),
+    "HTTPGetHeader": (_GoPtr, (_GoInt, c_char_p)),
+    "HTTPGetCode": (_GoInt, (_GoInt,)),
+    # 证书管理器
+    "CreateCertificate": (_GoInt, ()),
+    "RemoveCertificate": (None, (_GoInt,)),
+    "SetInsecureSkipVerify": (_GoBool, (_GoInt, _GoBool)),
+    "LoadP12Certificate": (_GoBool, (_GoInt, c_char_p, c_char_p)),
+    "LoadX509KeyPair": (_GoBool, (_GoInt, c_char_p, c_char_p)),
+    "LoadX509Certificate": (_GoBool, (_GoInt, c_char_p, c_char_p, c_char_p)),
+    "SetServerName": (_GoBool, (_GoInt, c_char_p)),
+    "GetServerName": (_GoPtr, (_GoInt,)),
+    "AddCertPoolPath": (_GoBool, (_GoInt, c_char_p)),
+    "AddCertPoolText": (_GoBool, (_GoInt, c_char_p)),
+    "AddClientAuth": (_GoBool, (_GoInt, _GoInt)),
+    "CreateCA": (
+        _GoBool,
+        (_GoInt, c_char_p, c_char_p, c_char_p, c_char_p, c_char_p, c_char_p, _GoInt, _GoInt),
+    ),
+    "ExportPub": (_GoPtr, (_GoInt,)),
+    "ExportKEY": (_GoPtr, (_GoInt,)),
+    "ExportCA": (_GoPtr, (_GoInt,)),
+    "GetCommonName": (_GoPtr, (_GoInt,)),
+    "ExportP12": (_GoBool, (_GoInt, c_char_p, c_char_p)),
+    # 队列
+    "CreateQueue": (None, (c_char_p,)),
+    "QueueRelease": (None, (c_char_p,)),
+    "QueueIsEmpty": (_GoBool, (c_char_p,)),
+    "QueueLength": (_GoInt, (c_char_p,)),
+    "QueuePush": (None, (c_char_p, _GoPtr, _GoInt)),
+    "QueuePull": (_GoPtr, (c_char_p,)),
+    # 压缩/编码工具
+    "BrCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "BrUnCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "DeflateCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "DeflateUnCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "ZSTDCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "ZSTDDecompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "GzipCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "GzipUnCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "ZlibCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "ZlibUnCompress": (_GoPtr, (_GoPtr, _GoInt)),
+    "PbToJson": (_GoPtr, (_GoPtr, _GoInt)),
+    "JsonToPB": (_GoPtr, (_GoPtr, _GoInt)),
+}
+
+
+# 这个类 是动态加载DLL时 按原型表绑定函数
+# 每个函数只在第一次访问时绑定一次, 之后缓存在实例上, 不再经过 __getattr__
 class LibSunny:
     def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
         if not _load_library():
             raise RuntimeError(f"库文件未加载: {_library_error}")
 
@@ -210,7 +386,13 @@ class LibSunny:
         if func is None:
             raise RuntimeError(f"函数 {name} 为 None")
 
-        func.restype = ctypes.POINTER(ctypes.c_int)
+        prototype = _PROTOTYPES.get(name)
+        if prototype is None:
+            # 原型表中没有的函数 保持旧的行为 返回值按指针处理
+            func.restype = ctypes.POINTER(ctypes.c_int)
+        else:
+            func.restype, func.argtypes = prototype
+        self.__dict__[name] = func
         return func
 
 
@@ -222,11 +404,9 @@ def PtrToByte(ptr, skip, num) -> bytearray | bytes:
     result_as_int = ctypes.cast(ptr, ctypes.c_void_p).value
     if result_as_int == None:
         return bytearray()
-    result_as_int += skip
-    new_result_ptr = ctypes.cast(result_as_int, ctypes.POINTER(ctypes.c_int))
-    buffer = ctypes.create_string_buffer(num)
-    ctypes.memmove(buffer, new_result_ptr, num)
-    return buffer.raw
+    if num <= 0:
+        return b""
+    return ctypes.string_at(result_as_int + skip, num)
 
 
 # 指针到整数
@@ -245,21 +425,11 @@ def PtrToInt(ptr) -> int:
         )
 
 
-# 指针到字符串
+# 指针到字符串 (string_at 在C侧一次完成查找结束符和复制)
 def PointerToText(ptr) -> str:
-    if ptr == 0:
+    if not ptr:
         return ""
-    buff = b""
-    i = 0
-    while True:
-        bs = PtrToByte(ptr, i, 1)
-        i += 1
-        if len(bs) == 0:
-            break
-        if bs[0] == 0:
-            break
-        buff = buff + bs
-
+    buff = ctypes.string_at(ptr)
     DLLSunny.Free(
         ptr
     )  # 释放Sunny的指针,只要是Sunny返回的bytes 或 string 都需要释放指针
@@ -277,13 +447,156 @@ def BytesToText(buff) -> str:
         return buff.decode("gbk")
 
 
+# 可以直接传给DLL的二进制数据类型
+BufferTypes = (bytes, bytearray, memoryview, mmap.mmap)
+
+
+class _Py_buffer(ctypes.Structure):
+    _fields_ = [
+        ("buf", c_void_p),
+        ("obj", c_void_p),
+        ("len", c_ssize_t),
+        ("itemsize", c_ssize_t),
+        ("readonly", c_int),
+        ("ndim", c_int),
+        ("format", c_char_p),
+        ("shape", c_void_p),
+        ("strides", c_void_p),
+        ("suboffsets", c_void_p),
+        ("internal", c_void_p),
+    ]
+
+
+ctypes.pythonapi.PyObject_GetBuffer.argtypes = (ctypes.py_object, ctypes.POINTER(_Py_buffer), c_int)
+ctypes.pythonapi.PyObject_GetBuffer.restype = c_int
+ctypes.pythonapi.PyBuffer_Release.argtypes = (ctypes.POINTER(_Py_buffer),)
+ctypes.pythonapi.PyBuffer_Release.restype = None
+
+
+class _ReadOnlyPointer:
+    """
+    只读缓冲区 (只读 mmap、bytes 切片等) 的地址, 可直接作为 c_void_p 参数传给DLL
+
+    通过 PyObject_GetBuffer 取得地址并持有缓冲区导出, 对象存活期间 mmap 不能被关闭或改变大小,
+    对象被回收时释放。
+    """
+
+    __slots__ = ("__buffer", "_as_parameter_")
+
+    def __init__(self, view: memoryview):
+        self.__buffer = None
+        buffer = _Py_buffer()
+        # PyBUF_SIMPLE, 调用方已保证是连续内存
+        ctypes.pythonapi.PyObject_GetBuffer(view, ctypes.byref(buffer), 0)
+        self.__buffer = buffer
+        self._as_parameter_ = c_void_p(buffer.buf)
+
+    def __del__(self):
+        if self.__buffer is not None:
+            ctypes.pythonapi.PyBuffer_Release(ctypes.byref(self.__buffer))
+            self.__buffer = None
+
+
+# 二进制数据到 (指针参数, 长度), 直接指向原有内存, 不额外复制
+# 只读的 mmap/memoryview 通过 _ReadOnlyPointer 传递地址, 只有非连续内存才会复制一次
+# 返回的指针参数需要保持引用直到DLL调用结束
+def BytesToPointer(data):
+    if isinstance(data, bytes):
+        return data, len(data)
+    view = memoryview(data)
+    if not view.c_contiguous:
+        data = view.tobytes()
+        return data, len(data)
+    view = view.cast("B")
+    length = view.nbytes
+    if length == 0:
+        return b"", 0
+    if not view.readonly:
+        return (ctypes.c_char * length).from_buffer(view), length
+    if isinstance(view.obj, bytes) and view.nbytes == len(view.obj):
+        return view.obj, length
+    return _ReadOnlyPointer(view), length
+
+
+# 读取DLL协商的长度前缀 (前8个字节是长度)
+def _PrefixedLength(ptr) -> int:
+    address = PtrToInt(ptr)
+    if address == 0:
+        return 0
+    return ctypes.c_int64.from_address(address).value
+
+
 # 指针到字节数组 (DLL协商的前8个字节是长度)
 def PointerToBytes(ptr) -> bytearray:
-    siz = PtrToInt(ptr)
-    if siz == 0:
+    siz = _PrefixedLength(ptr)
+    if siz <= 0:
+        if PtrToInt(ptr) != 0:
+            DLLSunny.Free(ptr)
         return bytearray()
     buf = PtrToByte(ptr, 8, siz)
     DLLSunny.Free(
         ptr
     )  # 释放Sunny的指针,只要是Sunny返回的bytes 或 string 都需要释放指针
     return buf
+
+
+class BorrowedBuffer:
+    """
+    借用的原生内存
+
+    将 Sunny 返回的指针以只读 memoryview 的形式暴露, 不复制数据。
+    memoryview 仅在 with 块内有效, 退出时释放指针 (free=False 时不释放)。
+
+    用法::
+
+        with Conn.get_response().body_view() as view:
+            hashlib.sha256(view).hexdigest()
+    """
+
+    def __init__(self, ptr, size: int, skip: int = 0, free: bool = True):
+        """
+        :param ptr: Sunny 返回的指针。
+        :param size: 数据长度。
+        :param skip: 数据相对指针的偏移。
+        :param free: 退出时是否调用 Free 释放指针。
+        """
+        self.__view = None
+        self.__ptr = 0
+        self.__ptr = PtrToInt(ptr)
+        self.__size = max(int(size), 0) if self.__ptr else 0
+        self.__skip = skip
+        self.__free = free
+
+    @classmethod
+    def length_prefixed(cls, ptr) -> "BorrowedBuffer":
+        """ 借用前8个字节是长度的指针 (与 PointerToBytes 的格式相同)。 """
+        return cls(ptr, _PrefixedLength(ptr), 8)
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __enter__(self) -> memoryview:
+        if self.__size == 0:
+            self.__view = memoryview(b"")
+        else:
+            array = (ctypes.c_ubyte * self.__size).from_address(
+                self.__ptr + self.__skip
+            )
+            self.__view = memoryview(array).cast("B").toreadonly()
+        return self.__view
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def close(self) -> None:
+        """ 释放 memoryview 和指针, 可重复调用。 """
+        if self.__view is not None:
+            self.__view.release()
+            self.__view = None
+        if self.__ptr and self.__free:
+            DLLSunny.Free(self.__ptr)
+        self.__ptr = 0
+        self.__size = 0
@@ -1,12 +1,15 @@
+import asyncio
 import ctypes
 import inspect
 
-from . import SunnyDLL
+from . import Codec, SunnyDLL
 from .CertManager import CertManager
 from ctypes import *
 from typing import Callable
 
 from .Event import HTTPEvent, TCPEvent, UDPEvent, WebSocketEvent
+from .Filter import EventFilter
+from .Dispatch import EVENT_TYPES, LoopThread, wrap_callback
 from .SunnyDLL import PtrToInt
 from .tools import check_function_signature
 
@@ -34,6 +37,8 @@ class SunnyNet:
     def __init__(self):
         """创建Sunny中间件对象, 可创建多个实例"""
         self.__context = None  # 先初始化为 None，防止析构时出错
+        self.__loop_thread = LoopThread()
+        self.__loop = None
 
         try:
             # 确保库已加载，这会初始化所有回调类型
@@ -65,12 +70,18 @@ class SunnyNet:
                 self.__ScriptCodeCallback__
             )
 
-            self.__ws_callback__py = None
-            self.__tcp_callback__py = None
-            self.__http_callback__py = None
-            self.__udp_callback__py = None
+            # 事件类型 -> 回调函数, 没有登记的事件类型不会创建事件对象
+            self.__http_handlers = {}
+            self.__tcp_handlers = {}
+            self.__ws_handlers = {}
+            self.__udp_handlers = {}
+            self.__native_registered = False
             self.__ScriptLogCallback__py = None
             self.__ScriptCodeCallback__py = None
+            self.__http_filter = None
+            self.__tcp_filter = None
+            self.__ws_filter = None
+            self.__udp_filter = None
 
             # 创建 SunnyNet 上下文
             context_result = SunnyDLL.DLLSunny.CreateSunnyNet()
@@ -90,31 +101,36 @@ class SunnyNet:
                 SunnyDLL.DLLSunny.ReleaseSunnyNet(self.__context)
             except Exception:
                 pass  # 忽略析构时的错误
+        if hasattr(self, "_SunnyNet__loop_thread"):
+            self.__loop_thread.close()
+
+    # 以下回调参数均已由 ctypes 转为 int/bytes, 这里不做任何解码或 DLL 调用,
+    # 事件对象在首次访问对应字段时才解码
 
     def __http_callback__(
         self, SunnyContext, TheologyID, MessageId, EventType, Method, URL, Error, pid
     ):
-        if self.__http_callback__py is None:
+        handler = self.__http_handlers.get(EventType)
+        if handler is None:
+            return
+        if self.__http_filter is not None and not self.__http_filter.match_http(
+            EventType, Method, URL, pid
+        ):
             return
-        _SunnyContext = PtrToInt(SunnyContext)
-        _EventType = PtrToInt(EventType)
-        _Method = SunnyDLL.BytesToText(Method)
-        _URL = SunnyDLL.BytesToText(URL)
-        _Error = SunnyDLL.BytesToText(Error)
-        _pid = PtrToInt(pid)
-        _TheologyID = PtrToInt(TheologyID)
-        _MessageId = PtrToInt(MessageId)
         obj = HTTPEvent(
-            _SunnyContext,
-            _TheologyID,
-            _MessageId,
-            _EventType,
-            _Method,
-            _URL,
-            _Error,
-            _pid,
+            SunnyContext,
+            TheologyID,
+            MessageId,
+            EventType,
+            Method,
+            URL,
+            Error,
+            pid,
         )
-        self.__http_callback__py(obj)
+        try:
+            handler(obj)
+        finally:
+            obj.flush_headers()
 
     def __tcp_callback__(
         self,
@@ -128,75 +144,69 @@ class SunnyNet:
         TheologyID,
         pid,
     ):
-        if self.__tcp_callback__py is None:
+        handler = self.__tcp_handlers.get(EventType)
+        if handler is None:
+            return
+        if self.__tcp_filter is not None and not self.__tcp_filter.match_conn(
+            EventType, LocalAddr, RemoteAddr, pid
+        ):
             return
-        _SunnyContext = PtrToInt(SunnyContext)
-        _EventType = PtrToInt(EventType)
-        _pid = PtrToInt(pid)
-        _LocalAddr = SunnyDLL.BytesToText(LocalAddr)
-        _RemoteAddr = SunnyDLL.BytesToText(RemoteAddr)
-        _TheologyID = PtrToInt(TheologyID)
-        _MessageId = PtrToInt(MessageId)
-        _bs = SunnyDLL.PtrToByte(data, 0, ln)
         obj = TCPEvent(
-            _SunnyContext,
-            _LocalAddr,
-            _RemoteAddr,
-            _TheologyID,
-            _MessageId,
-            _EventType,
-            _pid,
-            _bs,
+            SunnyContext,
+            LocalAddr,
+            RemoteAddr,
+            TheologyID,
+            MessageId,
+            EventType,
+            pid,
+            None,
+            data,
+            ln,
         )
-        self.__tcp_callback__py(obj)
+        handler(obj)
 
     def __udp_callback__(
         self, SunnyContext, LocalAddr, RemoteAddr, EventType, MessageId, TheologyID, pid
     ):
-        if self.__udp_callback__py is None:
+        handler = self.__udp_handlers.get(EventType)
+        if handler is None:
+            return
+        if self.__udp_filter is not None and not self.__udp_filter.match_conn(
+            EventType, LocalAddr, RemoteAddr, pid
+        ):
             return
-        _SunnyContext = PtrToInt(SunnyContext)
-        _EventType = PtrToInt(EventType)
-        _pid = PtrToInt(pid)
-        _LocalAddr = SunnyDLL.BytesToText(LocalAddr)
-        _RemoteAddr = SunnyDLL.BytesToText(RemoteAddr)
-        _TheologyID = PtrToInt(TheologyID)
-        _MessageId = PtrToInt(MessageId)
         obj = UDPEvent(
-            _SunnyContext,
-            _LocalAddr,
-            _RemoteAddr,
-            _TheologyID,
-            _MessageId,
-            _EventType,
-            _pid,
+            SunnyContext,
+            LocalAddr,
+            RemoteAddr,
+            TheologyID,
+            MessageId,
+            EventType,
+            pid,
         )
-        self.__udp_callback__py(obj)
+        handler(obj)
 
     def __ws_callback__(
         self, SunnyContext, TheologyID, MessageId, EventType, Method, URL, pid, wsType
     ):
-        if self.__ws_callback__py is None:
+        handler = self.__ws_handlers.get(EventType)
+        if handler is None:
+            return
+        if self.__ws_filter is not None and not self.__ws_filter.match_http(
+            EventType, Method, URL, pid
+        ):
             return
-        _SunnyContext = PtrToInt(SunnyContext)
-        _EventType = PtrToInt(EventType)
-        _Method = SunnyDLL.BytesToText(Method)
-        _URL = SunnyDLL.BytesToText(URL)
-        _pid = PtrToInt(pid)
-        _TheologyID = PtrToInt(TheologyID)
-        _MessageId = PtrToInt(MessageId)
-        _wsType = PtrToInt(wsType)
         obj = WebSocketEvent(
-            _SunnyContext,
-            _TheologyID,
-            _MessageId,
-            _EventType,
-            _Method,
-            _URL,
-            _pid,
-            _wsType,
+            SunnyContext,
+            TheologyID,
+            MessageId,
+            EventType,
+            Method,
+            URL,
+            pid,
+            wsType,
         )
-        self.__ws_callback__py(obj)
+        handler(obj)
 
     def __ScriptLogCallback__(self, LogInfo):
         if self.__ScriptLogCallback__py == None:
@@ -224,6 +234,11 @@ class SunnyNet:
         udp_callback: Callable[[UDPEvent], None] = None,
         ScriptLogCallback: Callable[[str], None] = None,
         ScriptCodeCallback: Callable[[str], None] = None,
+        http_filter: EventFilter = None,
+        tcp_filter: EventFilter = None,
+        ws_filter: EventFilter = None,
+        udp_filter: EventFilter = None,
+        loop: asyncio.AbstractEventLoop = None,
     ) -> None:
         """
         设置回调函数
@@ -233,42 +248,81 @@ class SunnyNet:
         :param udp_callback: UDP回调函数
         :param ScriptLogCallback: 脚本日志输出回调 需接收一个 str 参数
         :param ScriptCodeCallback: 脚本代码保存回调 需接收一个 str 参数
-        """
-        if not check_function_signature(ScriptCodeCallback, (str,), None):
+        :param http_filter: HTTP事件过滤器 不匹配的事件不会创建事件对象 也不会调用回调
+        :param tcp_filter: TCP事件过滤器
+        :param ws_filter: WebSocket事件过滤器
+        :param udp_filter: UDP事件过滤器
+        :param loop: 执行 async def 回调的事件循环 不填写则由中间件在后台线程中创建一个
+        ----
+        HTTP/TCP/UDP/WebSocket 回调可以是 async def 函数, 协程会提交到事件循环中执行:
+        可以修改数据的事件(请求/响应/发送/接收/即将连接) 回调线程会等待协程执行完成,
+        其他只读事件 提交后立即返回, 此时请不要再修改事件数据
+        ----
+        只读的回调(日志/统计) 可以传入 WorkerPool 对象, 回调线程只复制事件快照后立即返回,
+        由线程池/进程池处理, 队列满时按 WorkerPool 的策略丢弃或阻塞
+        """
+        for f in (http_filter, tcp_filter, ws_filter, udp_filter):
+            if f is not None and not isinstance(f, EventFilter):
+                raise TypeError("参数类型错误：过滤器应为 EventFilter 对象")
+        if ScriptCodeCallback is not None and not check_function_signature(
+            ScriptCodeCallback, (str,), None
+        ):
             raise TypeError(
                 f"Callback function type error {type(ScriptCodeCallback).__name__}"
             )
-        if not check_function_signature(ScriptLogCallback, (str,), None):
+        if ScriptLogCallback is not None and not check_function_signature(
+            ScriptLogCallback, (str,), None
+        ):
             raise TypeError(
                 f"Callback function type error {type(ScriptLogCallback).__name__}"
             )
-        if not check_function_signature(http_callback, (HTTPEvent,), None):
+        if http_callback is not None and not check_function_signature(
+            http_callback, (HTTPEvent,), None
+        ):
             raise TypeError(
                 f"Callback function type error {type(http_callback).__name__}"
             )
-        if not check_function_signature(tcp_callback, (TCPEvent,), None):
+        if tcp_callback is not None and not check_function_signature(
+            tcp_callback, (TCPEvent,), None
+        ):
             raise TypeError(
                 f"Callback function type error {type(tcp_callback).__name__}"
             )
-        if not check_function_signature(udp_callback, (UDPEvent,), None):
+        if udp_callback is not None and not check_function_signature(
+            udp_callback, (UDPEvent,), None
+        ):
             raise TypeError(
                 f"Callback function type error {type(udp_callback).__name__}"
             )
-        if not check_function_signature(ws_callback, (WebSocketEvent,), None):
+        if ws_callback is not None and not check_function_signature(
+            ws_callback, (WebSocketEvent,), None
+        ):
             raise TypeError(
                 f"Callback function type error {type(ws_callback).__name__}"
             )
-        self.__ws_callback__py = ws_callback
-        self.__tcp_callback__py = tcp_callback
-        self.__http_callback__py = http_callback
-        self.__udp_callback__py = udp_callback
+        if loop is not None and not isinstance(loop, asyncio.AbstractEventLoop):
+            raise TypeError("参数类型错误：loop 应为 asyncio 事件循环")
+        self.__loop = loop
+        self.__ws_handlers = self.__handler_table(ws_callback, WebSocketEvent)
+        self.__tcp_handlers = self.__handler_table(tcp_callback, TCPEvent)
+        self.__http_handlers = self.__handler_table(http_callback, HTTPEvent)
+        self.__udp_handlers = self.__handler_table(udp_callback, UDPEvent)
         self.__ScriptLogCallback__py = ScriptLogCallback
         self.__ScriptCodeCallback__py = ScriptCodeCallback
+        self.__http_filter = http_filter
+        self.__tcp_filter = tcp_filter
+        self.__ws_filter = ws_filter
+        self.__udp_filter = udp_filter
 
         SunnyDLL.DLLSunny.SetScriptCall(
             self.__context, self.__ScriptLogCallback, self.__ScriptCodeCallback
         )
+        self.__native_registered = False
+        self.__register_native()
 
+    def __register_native(self) -> None:
+        if self.__native_registered:
+            return
         SunnyDLL.DLLSunny.SunnyNetSetCallback(
             self.__context,
             self.__http_callback,
@@ -276,6 +330,107 @@ class SunnyNet:
             self.__ws_callback,
             self.__udp_callback,
         )
+        self.__native_registered = True
+
+    def __get_loop(self) -> asyncio.AbstractEventLoop:
+        if self.__loop is not None:
+            return self.__loop
+        return self.__loop_thread.loop()
+
+    def __handler_table(self, callback, event_class) -> dict:
+        if callback is None:
+            return {}
+        callback = wrap_callback(callback, event_class, self.__get_loop)
+        return dict.fromkeys(EVENT_TYPES[event_class], callback)
+
+    def __on(self, table: dict, event_class, event_type: int, callback) -> Callable:
+        if callback is not None and not check_function_signature(
+            callback, (event_class,), None
+        ):
+            raise TypeError(
+                f"Callback function type error {type(callback).__name__}"
+            )
+        # 复制后整体替换 回调线程读取时不需要加锁
+        table = dict(table)
+        if callback is None:
+            table.pop(event_type, None)
+        else:
+            table[event_type] = wrap_callback(callback, event_class, self.__get_loop)
+        if event_class is HTTPEvent:
+            self.__http_handlers = table
+        elif event_class is TCPEvent:
+            self.__tcp_handlers = table
+        elif event_class is UDPEvent:
+            self.__udp_handlers = table
+        else:
+            self.__ws_handlers = table
+        self.__register_native()
+        return callback
+
+    # 以下按事件类型单独登记回调 可作为装饰器使用 例如:
+    #   @app.on_response
+    #   def log(Conn: HTTPEvent): ...
+    # 传入 None 取消登记; 再次调用 set_callback 会替换对应种类的全部登记
+
+    def on_request(self, callback: Callable[[HTTPEvent], None]) -> Callable:
+        """登记 HTTP 发起请求事件的回调"""
+        return self.__on(self.__http_handlers, HTTPEvent, HTTPEvent.EVENT_TYPE_REQUEST, callback)
+
+    def on_response(self, callback: Callable[[HTTPEvent], None]) -> Callable:
+        """登记 HTTP 请求完成事件的回调"""
+        return self.__on(self.__http_handlers, HTTPEvent, HTTPEvent.EVENT_TYPE_RESPONSE, callback)
+
+    def on_error(self, callback: Callable[[HTTPEvent], None]) -> Callable:
+        """登记 HTTP 请求错误事件的回调"""
+        return self.__on(self.__http_handlers, HTTPEvent, HTTPEvent.EVENT_TYPE_ERROR, callback)
+
+    def on_tcp_about(self, callback: Callable[[TCPEvent], None]) -> Callable:
+        """登记 TCP 即将连接事件的回调"""
+        return self.__on(self.__tcp_handlers, TCPEvent, TCPEvent.EVENT_TYPE_ABOUT, callback)
+
+    def on_tcp_connect(self, callback: Callable[[TCPEvent], None]) -> Callable:
+        """登记 TCP 连接成功事件的回调"""
+        return self.__on(self.__tcp_handlers, TCPEvent, TCPEvent.EVENT_TYPE_OK, callback)
+
+    def on_tcp_send(self, callback: Callable[[TCPEvent], None]) -> Callable:
+        """登记 TCP 客户端发送数据事件的回调"""
+        return self.__on(self.__tcp_handlers, TCPEvent, TCPEvent.EVENT_TYPE_SEND, callback)
+
+    def on_tcp_receive(self, callback: Callable[[TCPEvent], None]) -> Callable:
+        """登记 TCP 客户端收到数据事件的回调"""
+        return self.__on(self.__tcp_handlers, TCPEvent, TCPEvent.EVENT_TYPE_RECEIVE, callback)
+
+    def on_tcp_close(self, callback: Callable[[TCPEvent], None]) -> Callable:
+        """登记 TCP 连接关闭事件的回调"""
+        return self.__on(self.__tcp_handlers, TCPEvent, TCPEvent.EVENT_TYPE_CLOSE, callback)
+
+    def on_udp_send(self, callback: Callable[[UDPEvent], None]) -> Callable:
+        """登记 UDP 客户端发送数据事件的回调"""
+        return self.__on(self.__udp_handlers, UDPEvent, UDPEvent.EVENT_TYPE_SEND, callback)
+
+    def on_udp_receive(self, callback: Callable[[UDPEvent], None]) -> Callable:
+        """登记 UDP 客户端收到数据事件的回调"""
+        return self.__on(self.__udp_handlers, UDPEvent, UDPEvent.EVENT_TYPE_RECEIVE, callback)
+
+    def on_udp_close(self, callback: Callable[[UDPEvent], None]) -> Callable:
+        """登记 UDP 关闭事件的回调"""
+        return self.__on(self.__udp_handlers, UDPEvent, UDPEvent.EVENT_TYPE_CLOSED, callback)
+
+    def on_ws_connect(self, callback: Callable[[WebSocketEvent], None]) -> Callable:
+        """登记 WebSocket 连接成功事件的回调"""
+        return self.__on(self.__ws_handlers, WebSocketEvent, WebSocketEvent.EVENT_TYPE_CONNECTION_SUCCESS, callback)
+
+    def on_ws_send(self, callback: Callable[[WebSocketEvent], None]) -> Callable:
+        """登记 WebSocket 客户端发送数据事件的回调"""
+        return self.__on(self.__ws_handlers, WebSocketEvent, WebSocketEvent.EVENT_TYPE_SEND, callback)
+
+    def on_ws_receive(self, callback: Callable[[WebSocketEvent], None]) -> Callable:
+        """登记 WebSocket 客户端收到数据事件的回调"""
+        return self.__on(self.__ws_handlers, WebSocketEvent, WebSocketEvent.EVENT_TYPE_RECEIVE, callback)
+
+    def on_ws_close(self, callback: Callable[[WebSocketEvent], None]) -> Callable:
+        """登记 WebSocket 断开连接事件的回调"""
+        return self.__on(self.__ws_handlers, WebSocketEvent, WebSocketEvent.EVENT_TYPE_CLOSE, callback)
 
     def context(self) -> int:
         """获取当前Sunny中间件的上下文"""
@@ -322,7 +477,9 @@ class SunnyNet:
         """
         if not isinstance(ip, str):
             raise TypeError("参数类型错误：ip 应为字符串")
-        return bool(SunnyDLL.DLLSunny.SetOutRouterIP(self.__context, ip))
+        return bool(
+            SunnyDLL.DLLSunny.SetOutRouterIP(self.__context, create_string_buffer(ip.encode("utf-8")))
+        )
 
     def export_cert(self) -> str:
         """导出已设置的证书"""
@@ -339,9 +496,8 @@ class SunnyNet:
         """
         if not isinstance(server_name, str):
             raise TypeError("参数类型错误：server_name 应为字符串")
-        SunnyDLL.DLLSunny.SetDnsServer(
-            self.__context, create_string_buffer(server_name.encode("utf-8"))
-        )
+        # DNS 服务器是全局设置，对所有中间件实例生效
+        SunnyDLL.DLLSunny.SetDnsServer(create_string_buffer(server_name.encode("utf-8")))
 
     def must_tcp(self, enable: bool) -> None:
         """
@@ -382,10 +538,14 @@ class SunnyNet:
         """
         if not isinstance(username, str):
             raise TypeError("参数类型错误：username 应为字符串")
-        SunnyDLL.DLLSunny.SunnyNetSocket5DelUser(self.__context, username)
+        SunnyDLL.DLLSunny.SunnyNetSocket5DelUser(
+            self.__context, create_string_buffer(username.encode("utf-8"))
+        )
 
     def start(self) -> bool:
         """启动中间件，绑定端口"""
+        # 解压后端在启动时测速，不占用第一个回调的时间
+        Codec.warmup()
         return bool(SunnyDLL.DLLSunny.SunnyNetStart(self.__context))
 
     def stop(self) -> None:
@@ -415,7 +575,7 @@ class SunnyNet:
         if not isinstance(page, str):
             raise TypeError("参数类型错误：page 应为字符串")
         return SunnyDLL.PointerToText(
-            SunnyDLL.DLLSunny.SetScriptPage(self.__context, page)
+            SunnyDLL.DLLSunny.SetScriptPage(self.__context, create_string_buffer(page.encode("utf-8")))
         )
 
     def is_script_code_supported(self) -> bool:
@@ -618,7 +778,9 @@ class SunnyNet:
 
     def un_drive(self) -> bool:
         """卸载驱动（仅在Windows上有效，需管理员权限）,如果卸载成功，会立即重启系统，只要没有重启系统，即为失败"""
-        return bool(SunnyDLL.DLLSunny.UnDrive(self.__context))
+        # 原生函数没有返回值，卸载成功时系统已经重启，能执行到这里即为失败
+        SunnyDLL.DLLSunny.UnDrive(self.__context)
+        return False
 
     def add_http_certRules(
         self, host: str, cert_manager: CertManager, rules: int
@@ -639,16 +801,11 @@ class SunnyNet:
             create_string_buffer(bytes(host, "utf-8")), cert_manager.context(), rules
         )
 
-    def del_http_certRules(self, host: str) -> bool:
+    def del_http_certRules(self, host: str) -> None:
         """
         删除指定主机的证书
         :param host: 主机名
-        :return: 是否删除成功
         """
         if not isinstance(host, str):
             raise TypeError("参数类型错误：host 应为字符串")
-        return bool(
-            SunnyDLL.DLLSunny.DelHttpCertificate(
-                create_string_buffer(host.encode("utf-8"))
-            )
-        )
+        SunnyDLL.DLLSunny.DelHttpCertificate(create_string_buffer(host.encode("utf-8")))
@@ -1,6 +1,4 @@
-from ctypes import create_string_buffer
-
-from SunnyNet.SunnyDLL import DLLSunny as __dll
+from SunnyNet.SunnyDLL import DLLSunny as __dll, BufferTypes, BytesToPointer
 
 TARGET_CLIENT = 1
 """ 消息发送目标常量：发送到客户端。 """
@@ -18,11 +16,13 @@ def SendMessage(SendTarget: int, TheologyID: int, message: bytes) -> bool:
         raise TypeError("参数类型错误")
     if not isinstance(TheologyID, int):
         raise TypeError("参数类型错误")
-    if not isinstance(message, bytes):
+    if not isinstance(message, BufferTypes):
         raise TypeError("参数类型错误")
+    pointer, length = BytesToPointer(message)
+    # 返回值为写入的字节数
     if SendTarget == TARGET_SERVER:
-        return bool(__dll.TcpSendMsg(TheologyID, create_string_buffer(message), len(message)))
-    return bool(__dll.TcpSendMsgClient(TheologyID, create_string_buffer(message), len(message)))
+        return __dll.TcpSendMsg(TheologyID, pointer, length) > 0
+    return __dll.TcpSendMsgClient(TheologyID, pointer, length) > 0
 
 
 def Close(TheologyID: int) -> bool:
@@ -1,5 +1,4 @@
-from SunnyNet.SunnyDLL import DLLSunny as __dll
-from ctypes import create_string_buffer
+from SunnyNet.SunnyDLL import DLLSunny as __dll, BufferTypes, BytesToPointer
 
 TARGET_CLIENT = 1
 """ 消息发送目标常量：发送到客户端。 """
@@ -17,8 +16,9 @@ def SendMessage(SendTarget: int, TheologyID: int, message: bytes) -> bool:
         raise TypeError("参数类型错误")
     if not isinstance(TheologyID, int):
         raise TypeError("参数类型错误")
-    if not isinstance(message, bytes):
+    if not isinstance(message, BufferTypes):
         raise TypeError("参数类型错误")
+    pointer, length = BytesToPointer(message)
     if SendTarget == TARGET_SERVER:
-        return bool(__dll.UdpSendToServer(TheologyID, create_string_buffer(message), len(message)))
-    return bool(__dll.UdpSendToClient(TheologyID, create_string_buffer(message), len(message)))
+        return bool(__dll.UdpSendToServer(TheologyID, pointer, length))
+    return bool(__dll.UdpSendToClient(TheologyID, pointer, length))
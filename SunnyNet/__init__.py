@@ -5,10 +5,25 @@ SunnyNet - 网络中间件
 
 from .SunnyNet import SunnyNet, Version
 from .Event import HTTPEvent, TCPEvent, UDPEvent, WebSocketEvent
-from .HTTPClient import SunnyHTTPClient
+from .Headers import Headers
+from .FileBody import FileBody
+from .HTTPClient import SunnyHTTPClient, ClientResponse
+from .ClientPool import ClientPool
+from .AsyncHTTPClient import AsyncSunnyHTTPClient
+from .Retry import RetryClient
 from .CertManager import CertManager
 from .Queue import Queue
-from . import TCPTools, UDPTools, WebsocketTools, tools
+from .Filter import EventFilter
+from .Router import Router
+from .Pipeline import Pipeline
+from .Rewrite import RewriteEngine
+from .Cache import ResponseCache
+from .Capture import CaptureWriter
+from .Store import TrafficStore, TrafficReader
+from .Replay import Replayer
+from .Fetch import fetch_many
+from .Dispatch import EventSnapshot, WorkerPool
+from . import TCPTools, UDPTools, WebsocketTools, tools, Codec
 
 __version__ = "1.4.0"
 __author__ = "秦天"
@@ -20,11 +35,30 @@ __all__ = [
     "TCPEvent",
     "UDPEvent",
     "WebSocketEvent",
+    "Headers",
+    "FileBody",
     "SunnyHTTPClient",
+    "ClientResponse",
+    "ClientPool",
+    "AsyncSunnyHTTPClient",
+    "RetryClient",
     "CertManager",
     "Queue",
+    "EventFilter",
+    "Router",
+    "Pipeline",
+    "RewriteEngine",
+    "ResponseCache",
+    "CaptureWriter",
+    "TrafficStore",
+    "TrafficReader",
+    "Replayer",
+    "fetch_many",
+    "EventSnapshot",
+    "WorkerPool",
     "TCPTools",
     "UDPTools",
     "WebsocketTools",
     "tools",
+    "Codec",
 ]
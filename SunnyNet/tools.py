@@ -32,77 +32,87 @@ def check_function_signature(func: Callable, param_types: Tuple[Type, ...], retu
 
 def BrCompress(bin: bytes) -> bytes:
     """ brotli Br压缩 """
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.BrCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.BrCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def BrUnCompress(bin: bytes) -> bytes:
     """ brotli 解压缩 """
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.BrUnCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.BrUnCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def DeflateCompress(bin: bytes) -> bytes:
     """ (可能等同于zlib压缩) """
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.DeflateCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.DeflateCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def DeflateUnCompress(bin: bytes) -> bytes:
     """ (可能等同于zlib解压缩) """
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.DeflateUnCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.DeflateUnCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def ZSTDCompress(bin: bytes) -> bytes:
     """ (可能等同于zlib压缩) """
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.ZSTDCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.ZSTDCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def ZSTDUnCompress(bin: bytes) -> bytes:
     """ (可能等同于zlib解压缩) """
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.ZSTDDecompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.ZSTDDecompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def GzipCompress(bin: bytes) -> bytes:
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.GzipCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.GzipCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def GzipUnCompress(bin: bytes) -> bytes:
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.GzipUnCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.GzipUnCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def ZlibCompress(bin: bytes) -> bytes:
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.ZlibCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.ZlibCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
 def ZlibUnCompress(bin: bytes) -> bytes:
-    if not isinstance(bin, bytes):
+    if not isinstance(bin, SunnyDLL.BufferTypes):
         return bytearray()
-    Ptr = SunnyDLL.DLLSunny.ZlibUnCompress(create_string_buffer(bin), len(bin))
+    pointer, length = SunnyDLL.BytesToPointer(bin)
+    Ptr = SunnyDLL.DLLSunny.ZlibUnCompress(pointer, length)
     return SunnyDLL.PointerToBytes(Ptr)
 
 
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+PointerToText 测速：旧的逐字节读取 与 现在的 ctypes.string_at 对比
+
+不需要加载 SunnyNet 库文件：字符串放在 ctypes 缓冲区中模拟库返回的指针，Free 替换为空函数。
+
+用法::
+
+    python benchmarks/pointer_to_text.py
+"""
+import ctypes
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SunnyNet import SunnyDLL
+
+# 缓存到实例上后不会再经过 __getattr__ 加载库文件
+SunnyDLL.DLLSunny.__dict__["Free"] = lambda ptr: None
+
+
+def _old_pointer_to_text(ptr) -> str:
+    """ 修改前的实现：每个字节调用一次 PtrToByte 并拼接。 """
+    if not ptr:
+        return ""
+    buff = b""
+    i = 0
+    while True:
+        bs = SunnyDLL.PtrToByte(ptr, i, 1)
+        i += 1
+        if len(bs) == 0:
+            break
+        if bs[0] == 0:
+            break
+        buff = buff + bs
+    SunnyDLL.DLLSunny.Free(ptr)
+    try:
+        return buff.decode("utf-8")
+    except:
+        return buff.decode("gbk")
+
+
+def _header_block(size: int) -> bytes:
+    """ 生成约 size 字节的协议头文本。 """
+    line = b"X-Benchmark-Header: abcdefghijklmnopqrstuvwxyz0123456789\r\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def _measure(func, ptr) -> float:
+    """ 单次调用的平均耗时（微秒）。 """
+    timer = timeit.Timer(lambda: func(ptr))
+    number, _ = timer.autorange()
+    return min(timer.repeat(3, number)) / number * 1e6
+
+
+def main():
+    print("%-8s %14s %14s %10s" % ("大小", "逐字节(us)", "string_at(us)", "倍数"))
+    for size in (64, 1024, 16 * 1024, 64 * 1024):
+        text = _header_block(size)
+        buffer = ctypes.create_string_buffer(text)
+        ptr = ctypes.cast(buffer, ctypes.c_void_p).value
+        assert _old_pointer_to_text(ptr) == SunnyDLL.PointerToText(ptr) == text.decode("utf-8")
+        old = _measure(_old_pointer_to_text, ptr)
+        new = _measure(SunnyDLL.PointerToText, ptr)
+        print("%-8s %14.1f %14.1f %10.0f" % ("%dKB" % (size // 1024) if size >= 1024 else "%dB" % size,
+                                              old, new, old / new))
+
+
+if __name__ == "__main__":
+    main()
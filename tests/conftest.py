@@ -0,0 +1,202 @@
+import ctypes
+import gc
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SunnyNet import SunnyDLL
+
+
+class FakeDLL:
+    """
+    模拟 SunnyNet 库中与 HTTP 消息相关的导出函数，按 MessageId 保存协议头和 Body。
+
+    返回的指针指向 ctypes 缓冲区，缓冲区保存在 _buffers 中直到测试结束。
+    """
+
+    def __init__(self):
+        self.clients = {}
+        self.response_headers = {}
+        self.response_bodies = {}
+        self.request_headers = {}
+        self.request_bodies = {}
+        self.calls = []
+        self._buffers = []
+
+    def _pointer(self, data: bytes) -> int:
+        buffer = ctypes.create_string_buffer(data, len(data) + 1)
+        self._buffers.append(buffer)
+        return ctypes.addressof(buffer)
+
+    @staticmethod
+    def _text(value) -> str:
+        """ char* 参数：按 c_char_p 的规则检查类型，传入 str 时与真实库一样报错。 """
+        ctypes.c_char_p.from_param(value)
+        return (value.value if isinstance(value, ctypes.Array) else value).decode("utf-8")
+
+    @staticmethod
+    def _read(pointer, length: int) -> bytes:
+        if isinstance(pointer, bytes):
+            return pointer[:length]
+        pointer = getattr(pointer, "_as_parameter_", pointer)
+        if isinstance(pointer, ctypes.c_void_p):
+            pointer = pointer.value
+        if isinstance(pointer, int):
+            return ctypes.string_at(pointer, length)
+        return ctypes.string_at(ctypes.addressof(pointer), length)
+
+    def Free(self, ptr):
+        pass
+
+    def GetResponseAllHeader(self, message_id):
+        self.calls.append("GetResponseAllHeader")
+        return self._pointer(self.response_headers.get(message_id, "").encode("utf-8"))
+
+    def SetResponseAllHeader(self, message_id, buffer):
+        self.calls.append("SetResponseAllHeader")
+        self.response_headers[message_id] = buffer.value.decode("utf-8")
+
+    def GetResponseBodyLen(self, message_id):
+        return len(self.response_bodies.get(message_id, b""))
+
+    def GetResponseBody(self, message_id):
+        return self._pointer(self.response_bodies.get(message_id, b""))
+
+    def SetResponseData(self, message_id, pointer, length):
+        self.calls.append("SetResponseData")
+        self.response_bodies[message_id] = self._read(pointer, length)
+
+    def GetRequestAllHeader(self, message_id):
+        self.calls.append("GetRequestAllHeader")
+        return self._pointer(self.request_headers.get(message_id, "").encode("utf-8"))
+
+    def SetRequestALLHeader(self, message_id, buffer):
+        self.calls.append("SetRequestALLHeader")
+        self.request_headers[message_id] = buffer.value.decode("utf-8")
+
+    def GetRequestBodyLen(self, message_id):
+        return len(self.request_bodies.get(message_id, b""))
+
+    def GetRequestBody(self, message_id):
+        return self._pointer(self.request_bodies.get(message_id, b""))
+
+    def SetRequestData(self, message_id, pointer, length):
+        self.calls.append("SetRequestData")
+        self.request_bodies[message_id] = self._read(pointer, length)
+        return 1
+
+
+    def GetRequestClientIp(self, message_id):
+        self.calls.append("GetRequestClientIp")
+        return self._pointer(b"127.0.0.1")
+
+    def CreateHTTPClient(self):
+        context = len(self.clients) + 1
+        self.clients[context] = {}
+        return context
+
+    def RemoveHTTPClient(self, context):
+        self.clients.pop(context, None)
+
+    def HTTPSetRedirect(self, context, allow):
+        self.clients[context]["redirect"] = bool(allow)
+
+    def HTTPSetTimeouts(self, context, timeout):
+        self.clients[context]["timeout"] = timeout
+
+    def HTTPSetRandomTLS(self, context, enable):
+        self.clients[context]["random_tls"] = bool(enable)
+
+    def HTTPSetProxyIP(self, context, proxy):
+        self.clients[context]["proxy"] = self._text(proxy)
+        return True
+
+    def HTTPSetOutRouterIP(self, context, ip):
+        self.clients[context]["out_router_ip"] = self._text(ip)
+        return True
+
+
+_FAKE_NAMES = [name for name in vars(FakeDLL) if name[0].isupper()]
+
+
+@pytest.fixture
+def fake_dll():
+    """ 把 FakeDLL 的函数放进 DLLSunny 的绑定缓存，测试结束后移除。 """
+    fake = FakeDLL()
+    cache = SunnyDLL.DLLSunny.__dict__
+    saved = {name: cache[name] for name in _FAKE_NAMES if name in cache}
+    for name in _FAKE_NAMES:
+        cache[name] = getattr(fake, name)
+    yield fake
+    # 测试中创建的客户端在析构时还会调用 RemoveHTTPClient
+    gc.collect()
+    for name in _FAKE_NAMES:
+        cache.pop(name, None)
+    cache.update(saved)
+
+
+def native_available() -> bool:
+    """ 库文件能否加载，端到端测试在没有库文件时跳过。 """
+    return SunnyDLL._load_library()
+
+
+class _OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        origin = self.server.origin
+        with origin.lock:
+            origin.requests.append((time.perf_counter(), self.command, self.path, dict(self.headers), body))
+            origin.active += 1
+            origin.max_active = max(origin.max_active, origin.active)
+        if origin.delay:
+            time.sleep(origin.delay)
+        with origin.lock:
+            origin.active -= 1
+        payload = b'{"ok":true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+class LocalOrigin:
+    """ 本地 http.server 源站，记录收到的请求 (时间, 方法, 路径, 协议头, Body)。 """
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+        self.delay = 0.0
+        self.active = 0
+        self.max_active = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _OriginHandler)
+        self.server.daemon_threads = True
+        self.server.origin = self
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def local_origin():
+    origin = LocalOrigin()
+    yield origin
+    origin.close()
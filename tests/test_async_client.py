@@ -0,0 +1,99 @@
+import asyncio
+import http.client
+from urllib.parse import urlsplit
+
+import pytest
+
+from SunnyNet.AsyncHTTPClient import AsyncSunnyHTTPClient
+from SunnyNet.ClientPool import ClientPool, PooledClient
+from SunnyNet.HTTPClient import ClientResponse
+
+from conftest import native_available
+
+
+class _StdlibPooledClient(PooledClient):
+    """ 原生上下文由 fake_dll 提供，请求通过 http.client 发送到本地源站。 """
+
+    def open(self, method, url):
+        self.used = True
+        self.request = (method, url, [])
+
+    def set_header(self, name, value):
+        self.request[2].append((name, value))
+
+    def send(self, data=b"", snapshot=False):
+        method, url, headers = self.request
+        parts = urlsplit(url)
+        connection = http.client.HTTPConnection(parts.netloc, timeout=10)
+        try:
+            connection.request(method, parts.path or "/", body=data or None, headers=dict(headers))
+            response = connection.getresponse()
+            body = response.read()
+            raw_headers = "".join("%s: %s\r\n" % item for item in response.getheaders())
+            self.status = response.status
+            return ClientResponse(response.status, raw_headers, body)
+        finally:
+            connection.close()
+
+    def get_status_code(self):
+        return getattr(self, "status", 0)
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_async_client_against_local_origin(fake_dll, local_origin):
+    local_origin.delay = 0.05
+
+    async def main():
+        pool = ClientPool(client_class=_StdlibPooledClient)
+        async with AsyncSunnyHTTPClient(max_concurrency=8, per_host=2, pool=pool) as client:
+            responses = await asyncio.gather(*[client.get(local_origin.url + "/item/%d" % i) for i in range(8)])
+            limits = client._AsyncSunnyHTTPClient__host_limits
+            return responses, dict(limits), pool.stats()
+
+    responses, limits, stats = _run(main())
+    assert [response.get_status_code() for response in responses] == [200] * 8
+    assert responses[0].json() == {"ok": True}
+    assert len(local_origin.requests) == 8
+    # 单个主机最多 2 个并发
+    assert local_origin.max_active <= 2
+    # 请求结束后不保留主机的并发限制
+    assert limits == {}
+    assert stats["created"] <= 2
+
+
+def test_host_limits_do_not_grow(fake_dll, local_origin):
+    async def main():
+        pool = ClientPool(client_class=_StdlibPooledClient)
+        async with AsyncSunnyHTTPClient(max_concurrency=4, per_host=1, pool=pool) as client:
+            # 同一个源站用不同的主机名访问
+            urls = [local_origin.url.replace("127.0.0.1", host) for host in ("127.0.0.1", "localhost")]
+            for _ in range(3):
+                await asyncio.gather(*[client.get(url + "/") for url in urls])
+            return dict(client._AsyncSunnyHTTPClient__host_limits)
+
+    assert _run(main()) == {}
+
+
+def test_timeout_releases_host_limit(fake_dll, local_origin):
+    local_origin.delay = 0.5
+
+    async def main():
+        pool = ClientPool(client_class=_StdlibPooledClient)
+        async with AsyncSunnyHTTPClient(max_concurrency=2, per_host=1, pool=pool) as client:
+            with pytest.raises(asyncio.TimeoutError):
+                await client.get(local_origin.url + "/slow", timeout=0.1)
+            return dict(client._AsyncSunnyHTTPClient__host_limits)
+
+    assert _run(main()) == {}
+
+
+@pytest.mark.skipif(not native_available(), reason="需要 SunnyNet 库文件")
+def test_async_client_with_sunny_client(local_origin):
+    async def main():
+        async with AsyncSunnyHTTPClient(max_concurrency=4, per_host=2) as client:
+            return await asyncio.gather(*[client.get(local_origin.url + "/") for _ in range(4)])
+
+    assert [response.get_status_code() for response in _run(main())] == [200] * 4
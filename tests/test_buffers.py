@@ -0,0 +1,58 @@
+import ctypes
+
+import pytest
+
+from SunnyNet.FileBody import FileBody
+from SunnyNet.SunnyDLL import BytesToPointer
+
+_memmove = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t)(
+    ctypes.cast(ctypes.memmove, ctypes.c_void_p).value)
+
+
+def _copy_through_c(data) -> bytes:
+    """ 模拟DLL按 (指针, 长度) 读取数据。 """
+    pointer, length = BytesToPointer(data)
+    target = ctypes.create_string_buffer(length)
+    _memmove(target, pointer, length)
+    return target.raw
+
+
+def test_bytes_and_writable_buffers_are_passed_directly():
+    data = b"hello world"
+    assert BytesToPointer(data)[0] is data
+    array = bytearray(b"abc")
+    pointer, length = BytesToPointer(array)
+    assert length == 3 and ctypes.addressof(pointer) == ctypes.addressof((ctypes.c_char * 3).from_buffer(array))
+
+
+def test_readonly_slice_is_not_copied():
+    data = b"0123456789"
+    view = memoryview(data)[2:6]
+    pointer, length = BytesToPointer(view)
+    assert length == 4
+    base = ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p).value
+    assert pointer._as_parameter_.value == base + 2
+    assert _copy_through_c(view) == b"2345"
+
+
+def test_file_body_mmap_is_not_copied(tmp_path):
+    path = tmp_path / "body.bin"
+    path.write_bytes(b"x" * 100000 + b"end")
+    body = FileBody(str(path))
+    try:
+        pointer, length = BytesToPointer(body.mmap)
+        assert length == 100003
+        assert not isinstance(pointer, bytes)
+        # 指针存活期间 mmap 被导出，不能关闭
+        with pytest.raises(BufferError):
+            body.mmap.close()
+        del pointer
+        assert _copy_through_c(body.mmap)[-3:] == b"end"
+    finally:
+        body.close()
+
+
+def test_non_contiguous_view_is_copied():
+    view = memoryview(b"abcdef")[::2]
+    pointer, length = BytesToPointer(view)
+    assert pointer == b"ace" and length == 3
@@ -0,0 +1,28 @@
+from SunnyNet.ClientPool import ClientPool
+
+
+def test_pooled_client_applies_config(fake_dll):
+    pool = ClientPool()
+    client = pool.client(proxy="http://127.0.0.1:8888", timeout=5000, redirect=False, out_router_ip="192.168.1.2")
+    assert len(fake_dll.clients) == 1
+    settings = list(fake_dll.clients.values())[0]
+    assert settings == {"redirect": False, "proxy": "http://127.0.0.1:8888", "timeout": 5000,
+                        "out_router_ip": "192.168.1.2"}
+
+
+def test_reset_reapplies_pool_config(fake_dll):
+    pool = ClientPool()
+    client = pool.client(timeout=3000, random_tls=True, out_router_ip="10.0.0.5")
+    client.reset()
+    # reset 删除旧上下文并创建新的，只剩一个上下文
+    assert len(fake_dll.clients) == 1
+    settings = list(fake_dll.clients.values())[0]
+    assert settings == {"redirect": True, "timeout": 3000, "random_tls": True, "out_router_ip": "10.0.0.5"}
+
+
+def test_released_client_is_reused(fake_dll):
+    pool = ClientPool()
+    with pool.client(timeout=1000) as client:
+        pass
+    assert pool.client(timeout=1000) is client
+    assert pool.stats()["reused"] == 1
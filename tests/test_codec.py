@@ -0,0 +1,46 @@
+import gzip
+import zlib
+
+import pytest
+
+from SunnyNet import Codec
+
+
+def test_gzip_multi_member_and_truncated():
+    raw = b"hello world " * 1000
+    data = gzip.compress(raw) + gzip.compress(b"tail")
+    assert Codec.decompress("gzip", data) == raw + b"tail"
+    single = gzip.compress(raw)
+    assert Codec._gzip(single, Codec.MAX_SIZE) == raw
+    with pytest.raises(zlib.error):
+        Codec._gzip(single[:len(single) // 2], Codec.MAX_SIZE)
+
+
+def test_gzip_limit():
+    data = gzip.compress(b"\0" * 1000000)
+    assert Codec.decompress("gzip", data, max_size=1000) is None
+
+
+def test_zstd_multi_frame():
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor()
+    data = compressor.compress(b"first frame ") + compressor.compress(b"second frame")
+    assert Codec._zstd(data, Codec.MAX_SIZE) == b"first frame second frame"
+
+
+def test_brotli_limit_and_truncated():
+    brotli = pytest.importorskip("brotli")
+    raw = b"\0" * 10000000
+    data = brotli.compress(raw)
+    assert Codec._brotli(data, len(raw)) == raw
+    with pytest.raises(Codec._LimitExceeded):
+        Codec._brotli(data, 100000)
+    text = brotli.compress(bytes(range(256)) * 1000)
+    with pytest.raises(brotli.error):
+        Codec._brotli(text[:len(text) // 2], Codec.MAX_SIZE)
+
+
+def test_warmup_orders_all_encodings():
+    Codec.warmup()
+    for encoding in ("gzip", "deflate", "zlib", "br", "zstd"):
+        assert encoding in Codec._ordered
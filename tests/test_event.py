@@ -0,0 +1,31 @@
+from SunnyNet.Event import HTTPEvent, Request, Response
+
+
+def _event(event_type=HTTPEvent.EVENT_TYPE_REQUEST) -> HTTPEvent:
+    return HTTPEvent(0, 1, 1, event_type, b"POST", b"https://example.com/api", b"", 0)
+
+
+def test_client_ip_is_read_once(fake_dll):
+    event = _event()
+    assert event.get_client_ip() == "127.0.0.1"
+    assert event.get_client_ip() == "127.0.0.1"
+    assert fake_dll.calls.count("GetRequestClientIp") == 1
+
+
+def test_response_set_body_flushes_pending_headers(fake_dll):
+    fake_dll.response_headers[1] = "A: 1\r\n"
+    response = Response(1)
+    response.headers()["B"] = "2"
+    response.set_body(b"yy")
+    response.flush_headers()
+    assert fake_dll.response_headers[1] == "A: 1\r\nB: 2\r\n"
+    assert fake_dll.response_bodies[1] == b"yy"
+
+
+def test_request_set_body_flushes_pending_headers(fake_dll):
+    fake_dll.request_headers[1] = "A: 1\r\n"
+    request = Request(1)
+    request.headers()["B"] = "2"
+    request.set_body(b"yy")
+    assert fake_dll.request_headers[1] == "A: 1\r\nB: 2\r\n"
+    assert fake_dll.calls.index("SetRequestALLHeader") < fake_dll.calls.index("SetRequestData")
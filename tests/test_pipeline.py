@@ -0,0 +1,76 @@
+import threading
+
+from SunnyNet.Pipeline import Pipeline
+
+
+class _Event:
+    def __init__(self, event_type=1):
+        self.event_type = event_type
+
+    def get_event_type(self):
+        return self.event_type
+
+
+def _run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_stats_counts_every_call_across_threads():
+    pipeline = Pipeline()
+    pipeline.use(lambda event: None, name="first")
+    pipeline.use(lambda event: Pipeline.STOP if event.event_type == 2 else None, name="second")
+    pipeline.use(lambda event: None, name="third")
+    events = [_Event(1), _Event(2)]
+
+    def worker():
+        for _ in range(5000):
+            for event in events:
+                pipeline(event)
+
+    _run_threads(worker, 8)
+    stats = pipeline.stats()
+    assert stats["first"]["calls"] == 80000
+    assert stats["second"]["calls"] == 80000
+    assert stats["third"]["calls"] == 40000
+    assert stats["first"]["total_ms"] > 0
+
+
+def test_event_type_filter_and_reset():
+    pipeline = Pipeline()
+    seen = []
+    pipeline.use(seen.append, name="request", event_types=1)
+    pipeline.use(seen.append, name="response", event_types=[2])
+    pipeline(_Event(1))
+    pipeline(_Event(2))
+    pipeline(_Event(2))
+    stats = pipeline.stats()
+    assert (stats["request"]["calls"], stats["response"]["calls"]) == (1, 2)
+
+    pipeline.reset_stats()
+    assert pipeline.stats()["response"] == {"calls": 0, "total_ms": 0.0, "avg_us": 0.0}
+    _run_threads(lambda: pipeline(_Event(2)), 3)
+    assert pipeline.stats()["response"]["calls"] == 3
+    assert len(seen) == 6
+
+
+def test_use_after_dispatch_restarts_counters():
+    pipeline = Pipeline()
+    pipeline.use(lambda event: None, name="first")
+    pipeline(_Event())
+    pipeline.use(lambda event: None, name="second")
+    pipeline(_Event())
+    stats = pipeline.stats()
+    assert stats["first"]["calls"] == 1
+    assert stats["second"]["calls"] == 1
+
+
+def test_without_timing():
+    pipeline = Pipeline(timing=False)
+    seen = []
+    pipeline.use(seen.append)
+    pipeline(_Event())
+    assert seen and pipeline.stats()["append"]["calls"] == 0
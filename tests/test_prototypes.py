@@ -0,0 +1,58 @@
+import ctypes
+import os
+import re
+
+import pytest
+
+from SunnyNet import SunnyDLL
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DECLARATION = re.compile(r"extern (?:__declspec\(dllexport\) )?([\w*]+) (\w+)\((.*?)\);")
+# 回调参数在 .h 中为 GoInt，原型表中使用同宽的指针类型以便传入 CFUNCTYPE 对象
+_CALLBACK_EXPORTS = {"SunnyNetSetCallback"}
+
+
+def _declarations(path: str) -> dict:
+    with open(path, encoding="utf-8", errors="replace") as file:
+        text = file.read()
+    result = {}
+    for ret, name, args in _DECLARATION.findall(text):
+        if not name.startswith("Java_"):
+            result[name] = (ret, [arg.rsplit(" ", 1)[0].strip() for arg in args.split(",") if arg.strip()])
+    return result
+
+
+def _ctype(go_type: str, go_int):
+    return {
+        "void": None,
+        "GoInt": go_int,
+        "GoInt64": ctypes.c_int64,
+        "GoUint8": ctypes.c_bool,
+        "GoUintptr": ctypes.c_void_p,
+        "char*": ctypes.c_char_p,
+    }[go_type]
+
+
+def test_prototypes_match_header():
+    declarations = _declarations(os.path.join(_ROOT, "windows/SunnyNet64.h"))
+    for name, (restype, argtypes) in SunnyDLL._PROTOTYPES.items():
+        if name not in declarations or name in _CALLBACK_EXPORTS:
+            continue
+        ret, args = declarations[name]
+        assert restype is _ctype(ret, SunnyDLL._GoInt), name
+        assert list(argtypes) == [_ctype(arg, SunnyDLL._GoInt) for arg in args], name
+
+
+def test_32bit_header_declares_same_types():
+    # 原型表按 Go 类型选择 ctypes 类型，32 位和 64 位头文件中的 Go 类型必须一致
+    declarations64 = _declarations(os.path.join(_ROOT, "windows/SunnyNet64.h"))
+    declarations32 = _declarations(os.path.join(_ROOT, "windows/SunnyNet.h"))
+    for name in SunnyDLL._PROTOTYPES:
+        if name in declarations64:
+            assert declarations32.get(name) == declarations64[name], name
+
+
+def test_char_pointer_rejects_str():
+    assert SunnyDLL._PROTOTYPES["SetOutRouterIP"][1] == (SunnyDLL._GoInt, ctypes.c_char_p)
+    with pytest.raises(TypeError):
+        ctypes.c_char_p.from_param("192.168.1.2")
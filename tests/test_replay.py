@@ -0,0 +1,106 @@
+import http.client
+from urllib.parse import urlsplit
+
+import pytest
+
+from SunnyNet.Replay import Replayer, ReplayRequest
+
+from conftest import native_available
+
+
+class _StdlibClient:
+    """ 与 Replayer 使用的 SunnyHTTPClient 方法相同、基于 http.client 的客户端。 """
+
+    def __init__(self):
+        self.__request = None
+        self.__headers = []
+        self.__status = 0
+        self.__error = ""
+        self.__timeout = 30.0
+
+    def open(self, method, url):
+        self.__request = (method, url)
+        self.__headers = []
+
+    def set_http2_config(self, config):
+        pass
+
+    def set_random_tls(self, enable=True):
+        pass
+
+    def set_proxy(self, proxy):
+        pass
+
+    def set_timeouts(self, timeout):
+        self.__timeout = timeout / 1000
+
+    def set_header(self, name, value):
+        self.__headers.append((name, value))
+
+    def send(self, data=b""):
+        method, url = self.__request
+        parts = urlsplit(url)
+        connection = http.client.HTTPConnection(parts.netloc, timeout=self.__timeout)
+        try:
+            connection.putrequest(method, parts.path + ("?" + parts.query if parts.query else ""), skip_host=True)
+            for name, value in self.__headers:
+                connection.putheader(name, value)
+            if not any(name.lower() == "host" for name, _ in self.__headers):
+                connection.putheader("Host", parts.netloc)
+            connection.putheader("Content-Length", str(len(data)))
+            connection.endheaders(data)
+            response = connection.getresponse()
+            response.read()
+            self.__status, self.__error = response.status, ""
+        except OSError as e:
+            self.__status, self.__error = 0, repr(e)
+        finally:
+            connection.close()
+
+    def get_status_code(self):
+        return self.__status
+
+    def get_error(self):
+        return self.__error
+
+
+def _requests():
+    return [
+        ReplayRequest("GET", "https://api.example.com/a?x=1", [("Host", "api.example.com"), ("X-Id", "1")],
+                      timestamp=100.0),
+        ReplayRequest("POST", "https://api.example.com/b", [("Host", "api.example.com"), ("Connection", "close")],
+                      b"payload", timestamp=100.1),
+        ReplayRequest("GET", "https://api.example.com/c", [("Host", "api.example.com")], timestamp=100.2),
+    ]
+
+
+def test_replay_against_local_origin(local_origin):
+    report = Replayer(_requests(), concurrency=2, target=local_origin.url, repeat=2,
+                      client_factory=_StdlibClient).run()
+    summary = report.summary()
+    assert summary["count"] == 6
+    assert summary["statuses"] == {200: 6}
+    assert not summary["errors"]
+    received = sorted((method, path, body) for _, method, path, _, body in local_origin.requests)
+    assert received == sorted([("GET", "/a?x=1", b""), ("POST", "/b", b"payload"), ("GET", "/c", b"")] * 2)
+    headers = [headers for _, _, path, headers, _ in local_origin.requests if path == "/a?x=1"][0]
+    # 保留原始 Host，逐跳协议头不复制
+    assert headers["Host"] == "api.example.com" and headers["X-Id"] == "1"
+    assert all(headers.get("Connection") != "close" for _, _, _, headers, _ in local_origin.requests)
+
+
+def test_replay_time_warp_repeat_keeps_gap(local_origin):
+    requests = _requests()
+    Replayer(requests, concurrency=4, target=local_origin.url, time_warp=1.0, repeat=2,
+             client_factory=_StdlibClient).run()
+    times = sorted(item[0] for item in local_origin.requests)
+    offsets = [value - times[0] for value in times]
+    # 原始间隔 0.1 秒，第二遍从 0.3 秒开始，而不是和第一遍最后一个请求同时发送
+    expected = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5]
+    assert all(abs(actual - wanted) < 0.05 for actual, wanted in zip(offsets, expected)), offsets
+
+
+@pytest.mark.skipif(not native_available(), reason="需要 SunnyNet 库文件")
+def test_replay_with_sunny_client(local_origin):
+    report = Replayer(_requests(), concurrency=2, target=local_origin.url).run()
+    assert report.summary()["statuses"] == {200: 3}
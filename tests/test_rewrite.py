@@ -0,0 +1,57 @@
+import gzip
+import json
+
+from SunnyNet.Event import HTTPEvent
+from SunnyNet.Headers import Headers
+from SunnyNet.Rewrite import RewriteEngine
+
+
+def _response_event(fake_dll, headers: str, body: bytes, message_id: int = 1) -> HTTPEvent:
+    fake_dll.response_headers[message_id] = headers
+    fake_dll.response_bodies[message_id] = body
+    return HTTPEvent(0, 1, message_id, HTTPEvent.EVENT_TYPE_RESPONSE, b"GET", b"https://api.example.com/v1/user",
+                     b"", 0)
+
+
+def test_rewrite_compressed_response_updates_headers_and_body(fake_dll):
+    body = gzip.compress(json.dumps({"vip": False, "name": "foo"}).encode("utf-8"))
+    event = _response_event(fake_dll, "Content-Type: application/json\r\nContent-Encoding: gzip\r\n", body)
+    engine = RewriteEngine([
+        {"host": "api.example.com", "action": "json_set", "pointer": "/vip", "value": True},
+        {"action": "header_set", "name": "X-Rewritten", "value": "1"},
+    ])
+
+    assert engine.apply(event)
+
+    headers = Headers.parse(fake_dll.response_headers[1])
+    assert headers.get("Content-Encoding") is None
+    assert headers.get("X-Rewritten") == "1"
+    assert headers.get("Content-Type") == "application/json"
+    assert json.loads(fake_dll.response_bodies[1]) == {"vip": True, "name": "foo"}
+    # 协议头在 Body 之前写回
+    calls = fake_dll.calls
+    assert calls.index("SetResponseAllHeader") < calls.index("SetResponseData")
+
+
+def test_rewrite_without_match_keeps_compressed_body(fake_dll):
+    body = gzip.compress(b"nothing to see")
+    event = _response_event(fake_dll, "Content-Encoding: gzip\r\n", body)
+    engine = RewriteEngine([{"action": "replace", "find": "secret", "with": "***"}])
+
+    assert not engine.apply(event)
+    assert fake_dll.response_bodies[1] == body
+    assert "SetResponseData" not in fake_dll.calls
+    assert "SetResponseAllHeader" not in fake_dll.calls
+
+
+def test_rewrite_regex_with_flags_on_compressed_response(fake_dll):
+    body = gzip.compress(b"Token=abc token=def")
+    event = _response_event(fake_dll, "Content-Encoding: gzip\r\n", body)
+    engine = RewriteEngine([
+        {"action": "regex", "pattern": "(?i)token=(\\w+)", "with": "token=<\\1>"},
+        {"action": "replace", "find": "<abc>", "with": "***"},
+    ])
+
+    assert engine.apply(event)
+    assert fake_dll.response_bodies[1] == b"token=*** token=<def>"
+    assert "Content-Encoding" not in Headers.parse(fake_dll.response_headers[1])